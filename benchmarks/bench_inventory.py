@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Time content discovery on a large tree: the old recursive os.listdir walk
+(isfile/isdir per entry) against the os.scandir inventory, plus incremental
+planning with and without the inventory's stat information.
+
+    python3 benchmarks/bench_inventory.py [--files N] [--per-dir D]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from build_manifest import BuildManifest, hash_file  # noqa: E402
+from generate_page import pages_from_inventory  # noqa: E402
+from inventory import scan_tree, stat_index  # noqa: E402
+
+
+def listdir_collect(content: str, dest: str):
+    """collect_pages before the inventory: sorted os.listdir plus isfile/isdir per entry."""
+    pages = []
+    for entry in sorted(os.listdir(content)):
+        entry_path = os.path.join(content, entry)
+        dest_path = os.path.join(dest, entry)
+        if os.path.isfile(entry_path) and entry_path.endswith(".md"):
+            pages.append((entry_path, os.path.splitext(dest_path)[0] + ".html"))
+        elif os.path.isdir(entry_path):
+            pages.extend(listdir_collect(entry_path, dest_path))
+    return pages
+
+
+def timed(name: str, fn):
+    start = time.perf_counter()
+    result = fn()
+    print(f"  {name:<28} {time.perf_counter() - start:8.3f} s")
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--files", type=int, default=100_000)
+    parser.add_argument("--per-dir", type=int, default=100)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        content = Path(tmp) / "content"
+        public = str(Path(tmp) / "public")
+        for i in range(args.files):
+            directory = content / f"s{i // (args.per_dir * 100)}" / f"d{(i // args.per_dir) % 100}"
+            if i % args.per_dir == 0:
+                directory.mkdir(parents=True, exist_ok=True)
+            # one asset per page, so half the entries are not sources
+            (directory / f"p{i}.md").write_text(f"# Page {i}\n", encoding="utf-8")
+            (directory / f"p{i}.png").write_bytes(b"")
+        print(f"{args.files} pages + {args.files} other files")
+
+        legacy = timed("listdir + isfile/isdir", lambda: listdir_collect(str(content), public))
+        sources = timed("scandir inventory", lambda: scan_tree(content, ".md"))
+        assert pages_from_inventory(sources, public) == legacy
+
+        manifest = BuildManifest(Path(tmp) / "manifest.json")
+        manifest.begin("t", "c")
+        stats = stat_index(sources)
+        for from_path, dest_path in legacy:
+            manifest.record(from_path, dest_path, hash_file(from_path), stats[from_path])
+        timed("plan, hashing every source", lambda: manifest.plan(legacy, "t", "c"))
+        timed("plan with inventory stats", lambda: manifest.plan(legacy, "t", "c", stats))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Measure what --check-links adds to a build: render a synthetic site with and
+without the link checker enabled and compare the wall times. The two builds
+alternate, and which goes first alternates too, so a change in machine load
+hits both; the median of the paired overheads is the steadier figure.
+
+    python3 benchmarks/bench_link_check.py [--pages N] [--blocks B] [--repeat R]
+"""
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from corpus import write_corpus  # noqa: E402
+
+import link_check  # noqa: E402
+from generate_page import collect_pages, generate_pages  # noqa: E402
+from site_index import local_path, page_url  # noqa: E402
+
+
+def build(pages, template: Path) -> float:
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _, _, error in generate_pages(pages, str(template)):
+            if error is not None:
+                raise RuntimeError(error)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=500)
+    parser.add_argument("--blocks", type=int, default=40)
+    parser.add_argument("--repeat", type=int, default=11)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        content = write_corpus(root, args.pages, args.blocks)
+        public = root / "public"
+        pages = collect_pages(str(content), str(public))
+        outputs = {Path(os.path.relpath(dest, public)).as_posix() for _, dest in pages}
+        targets = set(link_check.site_targets(outputs, root / "static"))
+
+        # the corpus links to pages it does not have: a first check finds
+        # them all, and adding them gives a site where every link resolves
+        checker = link_check.enable(targets, public)
+        build(pages, root / "template.html")
+        missing = checker.take_updates()
+        link_check.disable()
+        for ref in missing:
+            dest = dict(pages)[ref.source]
+            targets |= {local_path(ref.url, page_url(Path(dest), public))}
+
+        times = {"plain": [], "checked": []}
+        for i in range(args.repeat):
+            for kind in ("plain", "checked") if i % 2 == 0 else ("checked", "plain"):
+                if kind == "plain":
+                    times[kind].append(build(pages, root / "template.html"))
+                    continue
+                checker = link_check.enable(targets, public)
+                times[kind].append(build(pages, root / "template.html"))
+                assert not checker.take_updates()
+                link_check.disable()
+
+    # each repeat's checked build against the plain build next to it
+    ratios = [checked / plain for plain, checked in zip(times["plain"], times["checked"])]
+    best_plain, best_checked = min(times["plain"]), min(times["checked"])
+    print(f"{args.pages} pages x {args.blocks} blocks ({len(missing)} links to missing pages made targets), {args.repeat} repeats:")
+    print(f"  build             {best_plain:.3f}s best")
+    print(f"  with link check   {best_checked:.3f}s best  ({(best_checked / best_plain - 1) * 100:+.1f}%)")
+    print(f"  median overhead   {(statistics.median(ratios) - 1) * 100:+.1f}%")
+
+
+if __name__ == "__main__":
+    main()
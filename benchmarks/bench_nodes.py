@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Measure the memory footprint of the slotted node classes and the cost of the
+table-driven TextNode -> LeafNode conversion.
+
+    python3 benchmarks/bench_nodes.py [--nodes N] [--paragraphs P]
+
+Compared against copies of the original dict-backed classes and the original
+if-chain text_node_to_html_node, reported as:
+  - bytes per TextNode / LeafNode (tracemalloc, retained after construction)
+  - retained memory of a whole parsed page's node tree
+  - time to convert a page's TextNodes to LeafNodes
+"""
+import argparse
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from leafnode import LeafNode  # noqa: E402
+from markdown_to_html import markdown_to_html_node  # noqa: E402
+from parentnode import ParentNode  # noqa: E402
+from text_to_html import text_node_to_html_node  # noqa: E402
+from text_to_textnodes import text_to_textnodes  # noqa: E402
+from textnode import TextNode, TextType  # noqa: E402
+
+
+class DictTextNode:
+    def __init__(self, text, text_type, url=None):
+        self.text = text
+        self.text_type = text_type
+        self.url = url
+
+
+class DictHTMLNode:
+    def __init__(self, tag=None, value=None, children=None, props=None):
+        self.tag = tag
+        self.value = value
+        self.children = children
+        self.props = props
+
+
+def legacy_text_node_to_html_node(text_node):
+    """The original if-chain dispatch."""
+    if text_node.text_type == TextType.TEXT:
+        return LeafNode(None, text_node.text)
+    if text_node.text_type == TextType.BOLD:
+        return LeafNode("b", text_node.text)
+    if text_node.text_type == TextType.ITALIC:
+        return LeafNode("i", text_node.text)
+    if text_node.text_type == TextType.CODE:
+        return LeafNode("code", text_node.text)
+    if text_node.text_type == TextType.LINK:
+        return LeafNode("a", text_node.text, {"href": text_node.url})
+    if text_node.text_type == TextType.IMAGE:
+        return LeafNode("img", "", {"src": text_node.url, "alt": text_node.text})
+    raise ValueError(f"Unsupported TextType: {text_node.text_type}")
+
+
+def retained(build):
+    """Bytes still allocated after build() returns (its result is kept alive)."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return after - before, result
+
+
+def synthetic_page(paragraphs: int) -> str:
+    blocks = ["# Benchmark page"]
+    for i in range(paragraphs):
+        blocks.append(
+            f"Paragraph {i} has **bold** and _italic_ text, `code`, a [link](/p/{i}) "
+            f"and an ![image](/images/{i}.png) before it ends."
+        )
+        if i % 10 == 0:
+            blocks.append("\n".join(f"- item {j} with **emphasis**" for j in range(5)))
+    return "\n\n".join(blocks)
+
+
+def mirror(node, make):
+    """Copy a node tree with make(tag, value, children, props), sharing its strings."""
+    children = None if node.children is None else [mirror(c, make) for c in node.children]
+    props = None if node.props is None else dict(node.props)
+    return make(node.tag, node.value, children, props)
+
+
+def make_slotted(tag, value, children, props):
+    if children is None:
+        return LeafNode(tag, value, props)
+    return ParentNode(tag, children, props)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--nodes", type=int, default=100000)
+    parser.add_argument("--paragraphs", type=int, default=5000)
+    args = parser.parse_args(argv)
+    n = args.nodes
+    texts = [f"text {i}" for i in range(n)]  # shared so only node overhead is counted
+
+    print(f"{'per node':<28} {'dict (B)':>9} {'slots (B)':>10}")
+    size_dict, _ = retained(lambda: [DictTextNode(t, TextType.TEXT) for t in texts])
+    size_slot, _ = retained(lambda: [TextNode(t, TextType.TEXT) for t in texts])
+    print(f"{'TextNode':<28} {size_dict / n:>9.1f} {size_slot / n:>10.1f}")
+    size_dict, _ = retained(lambda: [DictHTMLNode("b", t) for t in texts])
+    size_slot, _ = retained(lambda: [LeafNode("b", t) for t in texts])
+    print(f"{'LeafNode':<28} {size_dict / n:>9.1f} {size_slot / n:>10.1f}")
+
+    page = synthetic_page(args.paragraphs)
+    tree = markdown_to_html_node(page)
+    dict_size, _ = retained(lambda: mirror(tree, DictHTMLNode))
+    slot_size, _ = retained(lambda: mirror(tree, make_slotted))
+    print(f"\npage node tree ({len(page) / 1e6:.1f} MB markdown, strings shared)")
+    print(f"  dict-backed nodes  {dict_size / 1e6:>8.2f} MB")
+    print(f"  slotted nodes      {slot_size / 1e6:>8.2f} MB")
+
+    text_nodes = []
+    for block in page.split("\n\n"):
+        text_nodes.extend(text_to_textnodes(block))
+    for label, convert in (("if-chain", legacy_text_node_to_html_node), ("table", text_node_to_html_node)):
+        start = time.perf_counter()
+        for _ in range(5):
+            for tn in text_nodes:
+                convert(tn)
+        elapsed = time.perf_counter() - start
+        print(f"convert {len(text_nodes)} nodes x5 ({label:<8}) {elapsed:.3f} s")
+
+
+if __name__ == "__main__":
+    main()
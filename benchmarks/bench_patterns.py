@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark the precompiled patterns in src/patterns.py against the
+raw-string re.* calls each parser stage used before.
+
+    python3 benchmarks/bench_patterns.py [--paragraphs N] [--repeat R]
+
+Each stage is timed twice: with a warm re cache, and with the cache cleared
+before every call (what happens once other code has evicted the parser's
+patterns), where raw-string calls have to recompile.
+"""
+import argparse
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+import patterns  # noqa: E402
+
+WORDS = "the quick brown fox jumps over lazy dog middle earth ring bearer".split()
+
+
+def synthetic_corpus(paragraphs: int, seed: int = 0):
+    """Deterministic lines of headings, list items and link/image-heavy paragraphs."""
+    rng = random.Random(seed)
+    headings, items, blocks = [], [], []
+    for i in range(paragraphs):
+        headings.append("#" * rng.randint(1, 7) + " " + " ".join(rng.choices(WORDS, k=4)))
+        items.append(f"{rng.randint(1, 20)}. " + " ".join(rng.choices(WORDS, k=6)))
+        parts = []
+        for _ in range(12):
+            r = rng.random()
+            if r < 0.2:
+                parts.append(f"[{rng.choice(WORDS)}](/p/{i})")
+            elif r < 0.3:
+                parts.append(f"![{rng.choice(WORDS)}](/images/{i}.png)")
+            else:
+                parts.append(rng.choice(WORDS))
+            parts.append("\n  " if rng.random() < 0.2 else " ")
+        blocks.append("".join(parts))
+    return headings, items, blocks
+
+
+STAGES = {
+    # stage: (inputs key, legacy call, precompiled call)
+    "heading (block_types)": (
+        "headings",
+        lambda s: re.match(r'^(#{1,6})\s+\S', s),
+        patterns.HEADING_RE.match,
+    ),
+    "ordered list (block_types)": (
+        "items",
+        lambda s: re.match(r'^(\d+)\.\s+', s),
+        patterns.ORDERED_ITEM_RE.match,
+    ),
+    "newline collapse (markdown_to_html)": (
+        "blocks",
+        lambda s: re.sub(r'\s*\n\s*', ' ', s),
+        lambda s: patterns.NEWLINE_RUN_RE.sub(' ', s),
+    ),
+    "images (extract_markdown)": (
+        "blocks",
+        lambda s: re.findall(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)", s),
+        patterns.IMAGE_RE.findall,
+    ),
+    "links (extract_markdown)": (
+        "blocks",
+        lambda s: re.findall(r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)", s),
+        patterns.LINK_RE.findall,
+    ),
+}
+
+
+def time_stage(fn, inputs, repeat: int, evicted: bool) -> float:
+    """Best-of-repeat seconds for running fn over every input."""
+    best = float("inf")
+    for _ in range(repeat):
+        re.purge()
+        start = time.perf_counter()
+        if evicted:
+            for s in inputs:
+                # model the pattern having been pushed out of re's cache
+                re.purge()
+                fn(s)
+        else:
+            for s in inputs:
+                fn(s)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--paragraphs", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    headings, items, blocks = synthetic_corpus(args.paragraphs)
+    corpus = {"headings": headings, "items": items, "blocks": blocks}
+
+    print(f"{'stage':<38} {'mode':<9} {'raw re (s)':>11} {'compiled (s)':>13} {'speedup':>8}")
+    for name, (key, legacy, compiled) in STAGES.items():
+        for evicted in (False, True):
+            t_legacy = time_stage(legacy, corpus[key], args.repeat, evicted)
+            t_compiled = time_stage(compiled, corpus[key], args.repeat, evicted)
+            mode = "evicted" if evicted else "warm"
+            print(f"{name:<38} {mode:<9} {t_legacy:>11.4f} {t_compiled:>13.4f} {t_legacy / t_compiled:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
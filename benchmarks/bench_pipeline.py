@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Measure the read-ahead/write-behind page pipeline against rendering pages one
+after another, on the synthetic corpus with simulated storage latency.
+
+    python3 benchmarks/bench_pipeline.py [--pages N] [--blocks B] [--latency MS]
+
+--latency adds a sleep to every source read and page write, standing in for a
+network-backed build volume (0 measures local disk as is).
+"""
+import argparse
+import contextlib
+import io
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from corpus import write_corpus  # noqa: E402
+
+import generate_page  # noqa: E402
+from template import load_template  # noqa: E402
+
+
+def with_latency(fn, seconds: float):
+    def slow(*args, **kwargs):
+        time.sleep(seconds)
+        return fn(*args, **kwargs)
+
+    return slow
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pages", type=int, default=300)
+    parser.add_argument("--blocks", type=int, default=40)
+    parser.add_argument("--latency", type=float, default=2.0, help="ms added to each read and write (default: 2)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    latency = args.latency / 1000
+    generate_page.read_source = with_latency(generate_page.read_source, latency)
+    generate_page.write_output = with_latency(generate_page.write_output, latency)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        content = write_corpus(Path(tmp), args.pages, args.blocks, args.seed)
+        template = str(Path(tmp) / "template.html")
+        pages = generate_page.collect_pages(str(content), str(Path(tmp) / "public"))
+
+        def sequential():
+            generate_page.make_output_dirs(dest for _, dest in pages)
+            for from_path, dest_path in pages:
+                src = generate_page.read_source(from_path)
+                html = generate_page.render_page(src, load_template(template))
+                generate_page.write_output(dest_path, html)
+
+        def pipelined():
+            for _ in generate_page.generate_pages(pages, template):
+                pass
+
+        print(f"{args.pages} pages x {args.blocks} blocks, {args.latency} ms per read/write")
+        results = {}
+        for name, fn in (("sequential", sequential), ("pipelined", pipelined)):
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                fn()
+            results[name] = time.perf_counter() - start
+            print(f"  {name:<11} {results[name]:7.3f} s")
+        print(f"  speedup     {results['sequential'] / results['pipelined']:7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
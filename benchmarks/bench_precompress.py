@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Time writing .gz sidecars for a rendered corpus: one file after another (the
+old post-build step), on the Precompressor's process pool, and again on an
+unchanged tree where every file is skipped.
+
+    python3 benchmarks/bench_precompress.py [--pages N] [--blocks B] [--jobs J] [--level L]
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from corpus import write_corpus  # noqa: E402
+
+from deploy import DeployManifest  # noqa: E402
+from generate_page import collect_pages, generate_pages  # noqa: E402
+from inventory import scan_tree  # noqa: E402
+from precompress import DEFAULT_MIN_SIZE, Precompressor, format_bytes, gzip_file  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pages", type=int, default=2000)
+    parser.add_argument("--blocks", type=int, default=40)
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--level", type=int, default=9)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        content = write_corpus(Path(tmp), args.pages, args.blocks, args.seed)
+        public = Path(tmp) / "public"
+        pages = collect_pages(str(content), str(public))
+        with contextlib.redirect_stdout(io.StringIO()):
+            for _ in generate_pages(pages, str(Path(tmp) / "template.html"), jobs=args.jobs):
+                pass
+        print(f"{args.pages} pages x {args.blocks} blocks, level {args.level}, {args.jobs} jobs")
+
+        def sequential():
+            for f in scan_tree(public, ".html"):
+                gzip_file(f.path, args.level)
+
+        deploy = DeployManifest(Path(tmp) / "deploy.json")
+
+        def pooled():
+            compressor = Precompressor(public, deploy.files, args.level, DEFAULT_MIN_SIZE, args.jobs, deploy.gzip)
+            compressor.sweep(scan_tree(public))
+            result = compressor.finish()
+            deploy.update(scan_tree(public))
+            deploy.gzip = compressor.settings()
+            return result
+
+        for name, fn in (("sequential", sequential), ("process pool", pooled), ("unchanged tree", pooled)):
+            start = time.perf_counter()
+            result = fn()
+            elapsed = time.perf_counter() - start
+            detail = ""
+            if result is not None:
+                detail = f"  ({len(result.compressed)} compressed, saved {format_bytes(result.saved)})"
+            print(f"  {name:<15} {elapsed:7.3f} s{detail}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Compare the original string-building ParentNode.to_html() with the streaming
+render_to() API on large generated documents.
+
+    python3 benchmarks/bench_render.py [--sections N] [--depth D]
+
+For each document shape it reports wall time and tracemalloc peak memory for:
+  legacy      - the pre-streaming recursive join (one string per subtree)
+  to_html     - the current to_html() (single join over all chunks)
+  render_to   - streaming into a file on disk
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from leafnode import LeafNode  # noqa: E402
+from parentnode import ParentNode  # noqa: E402
+
+
+def legacy_to_html(node) -> str:
+    """ParentNode.to_html() as it was before render_to(): join per nesting level."""
+    if node.children is None:
+        return node.to_html()
+    inner_html = "".join(legacy_to_html(child) for child in node.children)
+    return f"<{node.tag}{node.props_to_html()}>{inner_html}</{node.tag}>"
+
+
+def wide_document(sections: int) -> ParentNode:
+    """A flat page: many paragraphs of inline nodes directly under the root div."""
+    blocks = []
+    for i in range(sections):
+        blocks.append(
+            ParentNode(
+                "p",
+                [
+                    LeafNode(None, f"Paragraph {i} with some text and "),
+                    LeafNode("b", "bold words"),
+                    LeafNode(None, " and a "),
+                    LeafNode("a", "link", {"href": f"/page/{i}"}),
+                    LeafNode(None, " to somewhere else entirely. " * 4),
+                ],
+            )
+        )
+    return ParentNode("div", blocks)
+
+
+def deep_document(sections: int, depth: int) -> ParentNode:
+    """A nested page: every section is wrapped in `depth` levels of elements."""
+    blocks = []
+    for i in range(sections):
+        node = ParentNode("p", [LeafNode(None, f"Nested text {i} " * 8)])
+        for _ in range(depth):
+            node = ParentNode("div", [node, LeafNode("span", "x")])
+        blocks.append(node)
+    return ParentNode("div", blocks)
+
+
+def measure(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def run(name: str, doc: ParentNode) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        out = os.path.join(tmp, "page.html")
+
+        def stream():
+            with open(out, "w", encoding="utf-8") as f:
+                doc.render_to(f)
+
+        results = [
+            ("legacy", lambda: legacy_to_html(doc)),
+            ("to_html", doc.to_html),
+            ("render_to", stream),
+        ]
+        size = len(doc.to_html())
+        print(f"\n{name}: {size / 1e6:.1f} MB of HTML")
+        print(f"  {'method':<10} {'time (s)':>10} {'peak (MB)':>10}")
+        for label, fn in results:
+            elapsed, peak = measure(fn)
+            print(f"  {label:<10} {elapsed:>10.3f} {peak / 1e6:>10.1f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sections", type=int, default=20000)
+    parser.add_argument("--depth", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    run("wide document", wide_document(args.sections))
+    run(f"deep document (depth {args.depth})", deep_document(args.sections // 4, args.depth))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Measure the block render cache on the synthetic corpus.
+
+    python3 benchmarks/bench_render_cache.py [--pages N] [--blocks B] [--shared W] [--repeat R]
+
+--shared is the weight of verbatim boilerplate blocks in the block mix (the
+other kinds keep their default weights). Reports, for markdown_to_html_node
+plus to_html over the whole corpus:
+  off          - no cache
+  cold         - empty cache (every block misses once, then repeats hit memory)
+  warm memory  - same cache again, everything served from memory
+  warm disk    - fresh process-level cache over the populated database
+and the same for a full build through generate_pages (serial).
+"""
+import argparse
+import contextlib
+import io
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from corpus import DEFAULT_BLOCK_MIX, DEFAULT_INLINE_MIX, CorpusGenerator, write_corpus  # noqa: E402
+
+import render_cache  # noqa: E402
+from generate_page import collect_pages, generate_pages  # noqa: E402
+from markdown_to_html import markdown_to_html_node  # noqa: E402
+
+
+def best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def remove_db(path: Path) -> None:
+    for suffix in ("", "-wal", "-shm"):
+        Path(f"{path}{suffix}").unlink(missing_ok=True)
+
+
+def report(name: str, seconds: float, baseline: float) -> None:
+    # hit rate over all repeats of the stage
+    updates = render_cache.take_updates()
+    rate = ""
+    if updates:
+        stats = updates["stats"]
+        hits = stats["memory_hits"] + stats["disk_hits"]
+        lookups = hits + stats["misses"]
+        rate = f"  hit rate {hits / lookups:6.1%}" if lookups else ""
+    print(f"  {name:<12} {seconds:8.4f} s  {baseline / seconds:5.2f}x{rate}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--blocks", type=int, default=40)
+    parser.add_argument("--shared", type=float, default=3.0, help="weight of shared blocks (default: 3)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    block_mix = {**DEFAULT_BLOCK_MIX, "shared": args.shared}
+    gen = CorpusGenerator(args.seed, block_mix, DEFAULT_INLINE_MIX)
+    pages = [gen.page(args.blocks) for _ in range(args.pages)]
+
+    def render_all():
+        for page in pages:
+            markdown_to_html_node(page).to_html()
+        render_cache.flush()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_dir = Path(tmp) / "cache.sqlite"
+        print(f"parse + render: {args.pages} pages x {args.blocks} blocks, shared weight {args.shared}")
+        render_cache.disable()
+        off = best_of(render_all, args.repeat)
+        report("off", off, off)
+
+        def cold():
+            render_cache.disable()
+            remove_db(cache_dir)
+            render_cache.enable(cache_dir)
+            render_all()
+
+        report("cold", best_of(cold, args.repeat), off)
+        report("warm memory", best_of(render_all, args.repeat), off)
+
+        def warm_disk():
+            render_cache.enable(cache_dir)
+            render_all()
+
+        report("warm disk", best_of(warm_disk, args.repeat), off)
+        render_cache.disable()
+
+        content = write_corpus(Path(tmp), args.pages, args.blocks, args.seed, block_mix, DEFAULT_INLINE_MIX)
+        template = str(Path(tmp) / "template.html")
+        site = collect_pages(str(content), str(Path(tmp) / "public"))
+
+        def build():
+            with contextlib.redirect_stdout(io.StringIO()):
+                for _ in generate_pages(site, template):
+                    pass
+            render_cache.flush()
+
+        print("full build (serial):")
+        off = best_of(build, args.repeat)
+        report("off", off, off)
+        build_cache = Path(tmp) / "build-cache.sqlite"
+
+        def cold_build():
+            render_cache.disable()
+            remove_db(build_cache)
+            render_cache.enable(build_cache)
+            build()
+
+        report("cold", best_of(cold_build, args.repeat), off)
+
+        def warm_build():
+            render_cache.enable(build_cache)
+            build()
+
+        report("warm disk", best_of(warm_build, args.repeat), off)
+        render_cache.disable()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Compare peak memory and time of the in-memory page path (read_text, full node
+tree, render) with stream_page on one very large generated document.
+
+    python3 benchmarks/bench_stream.py [--mb SIZE] [--seed S]
+
+Each mode runs in a fresh child process and reports its peak RSS
+(resource.getrusage), so the numbers include the interpreter baseline.
+"""
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from corpus import TEMPLATE, CorpusGenerator  # noqa: E402
+
+
+def write_document(path: Path, megabytes: float, seed: int) -> None:
+    gen = CorpusGenerator(seed)
+    target = int(megabytes * (1 << 20))
+    written = 0
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("# Generated Reference\n\n")
+        while written < target:
+            chunk = gen.page(200) + "\n"
+            f.write(chunk)
+            written += len(chunk)
+
+
+def child(mode: str, src: str, template: str, dest: str) -> None:
+    import contextlib
+    import io
+
+    import generate_page
+
+    generate_page.STREAM_THRESHOLD = 0 if mode == "stream" else 1 << 62
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        generate_page.generate_page(src, template, dest)
+    elapsed = time.perf_counter() - start
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({"seconds": elapsed, "peak_mb": peak_kb / 1024}))
+
+
+def main() -> None:
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        child(*sys.argv[2:6])
+        return
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--mb", type=float, default=50.0, help="document size in MB (default: 50)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        src = Path(tmp) / "huge.md"
+        template = Path(tmp) / "template.html"
+        template.write_text(TEMPLATE, encoding="utf-8")
+        write_document(src, args.mb, args.seed)
+        print(f"document: {src.stat().st_size / (1 << 20):.1f} MB")
+        outputs = {}
+        for mode in ("whole", "stream"):
+            dest = Path(tmp) / f"{mode}.html"
+            out = subprocess.run(
+                [sys.executable, __file__, "--child", mode, str(src), str(template), str(dest)],
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout
+            result = json.loads(out)
+            outputs[mode] = dest.read_bytes()
+            print(f"  {mode:<7} {result['seconds']:8.2f} s  peak RSS {result['peak_mb']:8.1f} MB")
+        print(f"  identical output: {outputs['whole'] == outputs['stream']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Deterministic synthetic markdown corpus for benchmarks.
+
+The same (pages, blocks, mix, seed) always produces byte-identical files, so
+timings from different runs and machines are comparable.
+"""
+import random
+from pathlib import Path
+from typing import Dict, List
+
+WORDS = (
+    "the quick brown fox jumps over lazy dog middle earth ring bearer elves "
+    "dwarves wizard shire river mountain forest tower gate road journey song"
+).split()
+
+# relative weight of each block kind
+DEFAULT_BLOCK_MIX: Dict[str, float] = {
+    "paragraph": 6,
+    "heading": 1.5,
+    "code": 0.5,
+    "quote": 0.5,
+    "unordered_list": 1,
+    "ordered_list": 0.5,
+    # boilerplate repeated verbatim across pages (disclaimers, shared samples)
+    "shared": 0,
+}
+
+# distinct shared blocks a corpus draws from
+SHARED_POOL_SIZE = 12
+
+# chance that an inline slot in running text is each kind of markup
+DEFAULT_INLINE_MIX: Dict[str, float] = {
+    "link": 0.04,
+    "image": 0.01,
+    "bold": 0.03,
+    "italic": 0.03,
+    "code": 0.02,
+}
+
+TEMPLATE = """<!doctype html>
+<html>
+  <head>
+    <meta charset="utf-8" />
+    <title>{{ Title }}</title>
+  </head>
+  <body>
+    <article>{{ Content }}</article>
+  </body>
+</html>
+"""
+
+
+def parse_mix(spec: str, defaults: Dict[str, float]) -> Dict[str, float]:
+    """Parse "heading=2,code=0" into a copy of defaults with those weights replaced."""
+    mix = dict(defaults)
+    if not spec:
+        return mix
+    for item in spec.split(","):
+        key, _, value = item.partition("=")
+        key = key.strip()
+        if key not in defaults:
+            raise ValueError(f"Unknown mix key {key!r}; expected one of {sorted(defaults)}")
+        mix[key] = float(value)
+    return mix
+
+
+class CorpusGenerator:
+    def __init__(
+        self,
+        seed: int = 0,
+        block_mix: Dict[str, float] = DEFAULT_BLOCK_MIX,
+        inline_mix: Dict[str, float] = DEFAULT_INLINE_MIX,
+    ):
+        self.rng = random.Random(seed)
+        self.block_kinds = [k for k, w in block_mix.items() if w > 0]
+        self.block_weights = [block_mix[k] for k in self.block_kinds]
+        self.inline_mix = inline_mix
+        self._shared_seed = seed
+        self._shared: List[str] = []
+
+    def _words(self, n: int) -> str:
+        return " ".join(self.rng.choices(WORDS, k=n))
+
+    def inline_text(self, n_words: int) -> str:
+        """Running text of about n_words words with links, images and emphasis mixed in."""
+        rng = self.rng
+        parts: List[str] = []
+        for _ in range(n_words):
+            r = rng.random()
+            word = rng.choice(WORDS)
+            for kind, p in self.inline_mix.items():
+                if r < p:
+                    break
+                r -= p
+            else:
+                kind = "text"
+            if kind == "link":
+                parts.append(f"[{word} {rng.choice(WORDS)}](/blog/{rng.choice(WORDS)})")
+            elif kind == "image":
+                parts.append(f"![{word}](/images/{rng.choice(WORDS)}.png)")
+            elif kind == "bold":
+                parts.append(f"**{word}**")
+            elif kind == "italic":
+                parts.append(f"_{word}_")
+            elif kind == "code":
+                parts.append(f"`{word}()`")
+            else:
+                parts.append(word)
+        return " ".join(parts)
+
+    def _shared_pool(self) -> List[str]:
+        if not self._shared:
+            # drawn from a separate stream, so enabling shared blocks does not
+            # reshuffle the rest of the corpus
+            mix = {**DEFAULT_BLOCK_MIX, "shared": 0}
+            gen = CorpusGenerator(self._shared_seed + 1, mix, self.inline_mix)
+            self._shared = [gen.block() for _ in range(SHARED_POOL_SIZE)]
+        return self._shared
+
+    def block(self) -> str:
+        rng = self.rng
+        kind = rng.choices(self.block_kinds, self.block_weights)[0]
+        if kind == "shared":
+            return rng.choice(self._shared_pool())
+        if kind == "heading":
+            return "#" * rng.randint(2, 4) + " " + self.inline_text(rng.randint(2, 6))
+        if kind == "code":
+            lines = [f"    {self._words(rng.randint(2, 8))}" for _ in range(rng.randint(2, 10))]
+            return "```\n" + "\n".join(lines) + "\n```"
+        if kind == "quote":
+            return "\n".join("> " + self.inline_text(rng.randint(4, 14)) for _ in range(rng.randint(1, 4)))
+        if kind == "unordered_list":
+            return "\n".join("- " + self.inline_text(rng.randint(3, 12)) for _ in range(rng.randint(2, 8)))
+        if kind == "ordered_list":
+            return "\n".join(f"{i}. " + self.inline_text(rng.randint(3, 12)) for i in range(1, rng.randint(3, 9)))
+        # paragraph, wrapped over several lines like hand-written markdown
+        lines = [self.inline_text(rng.randint(6, 14)) for _ in range(rng.randint(1, 5))]
+        return "\n".join(lines)
+
+    def page(self, blocks: int) -> str:
+        out = ["# " + self._words(4).title()]
+        out.extend(self.block() for _ in range(blocks))
+        return "\n\n".join(out) + "\n"
+
+
+def write_corpus(
+    root: Path,
+    pages: int,
+    blocks: int,
+    seed: int = 0,
+    block_mix: Dict[str, float] = DEFAULT_BLOCK_MIX,
+    inline_mix: Dict[str, float] = DEFAULT_INLINE_MIX,
+) -> Path:
+    """
+    Write a site of `pages` pages with `blocks` blocks each under root/content
+    (nested a few directories deep, 100 pages per directory) plus
+    root/template.html. Returns the content directory.
+    """
+    gen = CorpusGenerator(seed, block_mix, inline_mix)
+    content = Path(root) / "content"
+    for i in range(pages):
+        page_dir = content / f"section{i // 1000}" / f"group{(i // 100) % 10}" / f"page{i}"
+        page_dir.mkdir(parents=True, exist_ok=True)
+        (page_dir / "index.md").write_text(gen.page(blocks), encoding="utf-8")
+    (Path(root) / "template.html").write_text(TEMPLATE, encoding="utf-8")
+    return content
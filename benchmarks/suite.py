@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite: time every stage of the generator on a synthetic corpus.
+
+    python3 benchmarks/suite.py run [--pages N] [--blocks B] [--block-mix SPEC]
+                                    [--inline-mix SPEC] [--seed S] [--repeat R]
+                                    [--out results.json]
+    python3 benchmarks/suite.py compare BASELINE.json CURRENT.json [--threshold 0.1]
+    python3 benchmarks/suite.py generate DIR [--pages N] [--blocks B] ...
+
+Stages: markdown_to_blocks, block_to_block_type, scan_blocks, text_to_textnodes,
+markdown_to_html_node, to_html, and a full build through
+generate_pages_recursive. Each stage reports the best and mean of --repeat
+runs; `compare` exits with status 1 if any stage's best time regressed by more
+than --threshold (a fraction, default 10%) against the baseline.
+"""
+import argparse
+import contextlib
+import io
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from corpus import DEFAULT_BLOCK_MIX, DEFAULT_INLINE_MIX, CorpusGenerator, parse_mix, write_corpus  # noqa: E402
+
+from block_scanner import scan_blocks  # noqa: E402
+from block_types import BlockType, block_to_block_type  # noqa: E402
+from generate_page import generate_pages_recursive  # noqa: E402
+from markdown_blocks import markdown_to_blocks  # noqa: E402
+from markdown_to_html import markdown_to_html_node  # noqa: E402
+from patterns import NEWLINE_RUN_RE  # noqa: E402
+from text_to_textnodes import text_to_textnodes  # noqa: E402
+
+RESULTS_VERSION = 1
+
+
+def time_runs(fn: Callable[[], object], repeat: int) -> Dict[str, object]:
+    runs: List[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        runs.append(time.perf_counter() - start)
+    return {"best": min(runs), "mean": statistics.mean(runs), "runs": runs}
+
+
+def run_suite(args) -> Dict[str, object]:
+    block_mix = parse_mix(args.block_mix, DEFAULT_BLOCK_MIX)
+    inline_mix = parse_mix(args.inline_mix, DEFAULT_INLINE_MIX)
+    gen = CorpusGenerator(args.seed, block_mix, inline_mix)
+    pages = [gen.page(args.blocks) for _ in range(args.pages)]
+
+    # inputs for the later stages, prepared outside the timed region
+    blocks = [b for page in pages for b in markdown_to_blocks(page)]
+    inline = [
+        NEWLINE_RUN_RE.sub(" ", b).strip()
+        for b in blocks
+        if block_to_block_type(b) == BlockType.PARAGRAPH
+    ]
+    trees = [markdown_to_html_node(page) for page in pages]
+
+    stages: Dict[str, Dict[str, object]] = {}
+
+    def stage(name: str, fn: Callable[[], object]) -> None:
+        stages[name] = time_runs(fn, args.repeat)
+        print(f"  {name:<24} best {stages[name]['best']:.4f} s  mean {stages[name]['mean']:.4f} s")
+
+    print(f"corpus: {args.pages} pages x {args.blocks} blocks, {sum(map(len, pages)) / 1e6:.2f} MB")
+    stage("markdown_to_blocks", lambda: [markdown_to_blocks(p) for p in pages])
+    stage("block_to_block_type", lambda: [block_to_block_type(b) for b in blocks])
+    stage("scan_blocks", lambda: [scan_blocks(p) for p in pages])
+    stage("text_to_textnodes", lambda: [text_to_textnodes(t) for t in inline])
+    stage("markdown_to_html_node", lambda: [markdown_to_html_node(p) for p in pages])
+    stage("to_html", lambda: [t.to_html() for t in trees])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        content = write_corpus(Path(tmp), args.pages, args.blocks, args.seed, block_mix, inline_mix)
+        template = str(Path(tmp) / "template.html")
+        out = str(Path(tmp) / "public")
+
+        def full_build():
+            with contextlib.redirect_stdout(io.StringIO()):
+                generate_pages_recursive(str(content), template, out)
+
+        stage("full_build", full_build)
+
+    return {
+        "version": RESULTS_VERSION,
+        "meta": {
+            "pages": args.pages,
+            "blocks": args.blocks,
+            "seed": args.seed,
+            "block_mix": block_mix,
+            "inline_mix": inline_mix,
+            "repeat": args.repeat,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "stages": stages,
+    }
+
+
+def compare(baseline: Dict[str, object], current: Dict[str, object], threshold: float) -> bool:
+    """Print a stage-by-stage comparison; return True if any stage regressed."""
+    if baseline.get("meta", {}).get("pages") != current.get("meta", {}).get("pages") or (
+        baseline.get("meta", {}).get("blocks") != current.get("meta", {}).get("blocks")
+    ):
+        print("warning: baseline and current were run on different corpus sizes")
+    regressed = False
+    print(f"{'stage':<24} {'baseline':>10} {'current':>10} {'change':>8}")
+    for name, base in baseline["stages"].items():
+        cur = current["stages"].get(name)
+        if cur is None:
+            print(f"{name:<24} {base['best']:>10.4f} {'missing':>10}")
+            continue
+        change = cur["best"] / base["best"] - 1 if base["best"] else 0.0
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressed = True
+        print(f"{name:<24} {base['best']:>10.4f} {cur['best']:>10.4f} {change:>+7.1%}{flag}")
+    return regressed
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def corpus_args(p):
+        p.add_argument("--pages", type=int, default=200)
+        p.add_argument("--blocks", type=int, default=40, help="blocks per page")
+        p.add_argument("--block-mix", default="", help="e.g. heading=2,code=1,quote=0")
+        p.add_argument("--inline-mix", default="", help="e.g. link=0.1,image=0,bold=0.05")
+        p.add_argument("--seed", type=int, default=0)
+
+    run_p = sub.add_parser("run", help="run every stage and write JSON results")
+    corpus_args(run_p)
+    run_p.add_argument("--repeat", type=int, default=5)
+    run_p.add_argument("--out", default="bench_results.json")
+
+    cmp_p = sub.add_parser("compare", help="flag regressions against a saved baseline")
+    cmp_p.add_argument("baseline")
+    cmp_p.add_argument("current")
+    cmp_p.add_argument("--threshold", type=float, default=0.10)
+
+    gen_p = sub.add_parser("generate", help="write the synthetic corpus to a directory")
+    gen_p.add_argument("dir")
+    corpus_args(gen_p)
+
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        results = run_suite(args)
+        Path(args.out).write_text(json.dumps(results, indent=1), encoding="utf-8")
+        print(f"results written to {args.out}")
+        return 0
+    if args.command == "compare":
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        current = json.loads(Path(args.current).read_text(encoding="utf-8"))
+        return 1 if compare(baseline, current, args.threshold) else 0
+    content = write_corpus(
+        Path(args.dir),
+        args.pages,
+        args.blocks,
+        args.seed,
+        parse_mix(args.block_mix, DEFAULT_BLOCK_MIX),
+        parse_mix(args.inline_mix, DEFAULT_INLINE_MIX),
+    )
+    print(f"wrote {args.pages} pages to {content}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+import itertools
+from typing import Iterable, Iterator, List, NamedTuple
+
+from block_types import BlockType, block_type_from_lines
+
+
+class Block(NamedTuple):
+    type: BlockType
+    # the block's lines: first without leading, last without trailing whitespace
+    lines: List[str]
+    # 1-based line number of the block's first line in the document
+    lineno: int
+
+
+def _opens_fence(line: str) -> bool:
+    # ``` plus an optional language hint; ```code``` on one line is not a fence
+    stripped = line.lstrip()
+    return stripped.startswith("```") and "`" not in stripped[3:]
+
+
+def _ends_fenced(buf: List[str]) -> bool:
+    # a fenced block is code only if its last non-blank line is the closing fence
+    for line in reversed(buf):
+        if not line.isspace():
+            return line.strip().startswith("```")
+    return False
+
+
+def _make_block(buf: List[str], lineno: int) -> Iterator[Block]:
+    # same trimming as str.strip() on the joined block: whitespace-only lines
+    # at either edge go, then the outer edges of the first and last line
+    start, end = 0, len(buf)
+    while start < end and buf[start].isspace():
+        start += 1
+    while end > start and buf[end - 1].isspace():
+        end -= 1
+    if start == end:
+        return
+    lines = buf[start:end]
+    lines[0] = lines[0].lstrip()
+    lines[-1] = lines[-1].rstrip()
+    yield Block(block_type_from_lines(lines), lines, lineno + start)
+
+
+def iter_blocks(lines: Iterable[str], first_lineno: int = 1) -> Iterator[Block]:
+    """
+    Group lines (without their line endings) into typed blocks in one pass.
+
+    Blocks are separated by empty lines, as markdown_to_blocks separates them
+    on "\\n\\n". A block whose first line opens a ``` fence runs to the closing
+    fence even across empty lines, so fenced code keeps its blank lines; if the
+    fence is never closed, or text follows the closing fence, the block is
+    split at empty lines after all.
+    """
+    rest: Iterator[str] = iter(lines)
+    # lines to scan again after a fence fell through; read before rest
+    replay: Iterator[str] = iter(())
+    source = rest
+    lineno = first_lineno - 1
+    buf: List[str] = []
+    start = first_lineno
+    # buf holds nothing but whitespace-only lines so far
+    leading = True
+    in_fence = False
+    # index in buf of the first empty line kept inside a fence, -1 if none
+    fence_blank = -1
+
+    while True:
+        separator: List[str] = []
+        for line in source:
+            lineno += 1
+            if in_fence:
+                if line == "":
+                    if fence_blank == -1:
+                        fence_blank = len(buf)
+                elif line.strip().startswith("```"):
+                    in_fence = False
+                buf.append(line)
+                continue
+
+            if line == "":
+                if buf:
+                    if fence_blank != -1 and not _ends_fenced(buf):
+                        separator.append(line)
+                        break
+                    yield from _make_block(buf, start)
+                    buf = []
+                    leading = True
+                continue
+
+            if not buf:
+                start = lineno
+                fence_blank = -1
+            if leading and not line.isspace():
+                leading = False
+                in_fence = _opens_fence(line)
+            buf.append(line)
+        else:
+            if not buf:
+                return
+            if fence_blank == -1 or _ends_fenced(buf):
+                yield from _make_block(buf, start)
+                return
+
+        # the fence never closed (or text follows it): the empty lines inside
+        # separate blocks after all, so scan everything after the first one again
+        tail = buf[fence_blank:] + separator + list(replay)
+        del buf[fence_blank:]
+        yield from _make_block(buf, start)
+        buf = []
+        leading = True
+        in_fence = False
+        lineno = start + fence_blank - 1
+        replay = iter(tail)
+        source = itertools.chain(replay, rest)
+
+def scan_blocks(markdown: str) -> List[Block]:
+    """Typed blocks of a whole markdown document; see iter_blocks."""
+    if not markdown:
+        return []
+    return list(iter_blocks(markdown.splitlines()))
@@ -1,7 +1,8 @@
-import re
 from enum import Enum
 from typing import List
 
+from patterns import HEADING_RE, ORDERED_ITEM_RE
+
 
 class BlockType(Enum):
     PARAGRAPH = "paragraph"
@@ -11,18 +12,19 @@ class BlockType(Enum):
     UNORDERED_LIST = "unordered_list"
     ORDERED_LIST = "ordered_list"
 
+    # members compare by identity, so the C-level identity hash is valid and
+    # makes BlockType-keyed dispatch tables much cheaper than Enum.__hash__
+    __hash__ = object.__hash__
+
 
-def _is_heading(block: str) -> bool:
+def _is_heading(lines: List[str]) -> bool:
     # heading lines start with 1-6 '#' followed by at least one space and text
-    return re.match(r'^(#{1,6})\s+\S', block) is not None
+    return HEADING_RE.match(lines[0]) is not None
 
 
-def _is_code_block(block: str) -> bool:
+def _is_code_block(lines: List[str]) -> bool:
     # code blocks must start with ``` and end with ```
     # allow optional language after opening backticks (e.g. ```python)
-    lines = block.splitlines()
-    if not lines:
-        return False
     if not lines[0].startswith("```"):
         return False
     if len(lines) < 2:
@@ -31,11 +33,8 @@ def _is_code_block(block: str) -> bool:
     return lines[-1].strip().startswith("```")
 
 
-def _is_quote(block: str) -> bool:
+def _is_quote(lines: List[str]) -> bool:
     # every non-empty line must start with '>'
-    lines = block.splitlines()
-    if not lines:
-        return False
     for line in lines:
         if line == "":
             return False
@@ -44,11 +43,8 @@ def _is_quote(block: str) -> bool:
     return True
 
 
-def _is_unordered_list(block: str) -> bool:
+def _is_unordered_list(lines: List[str]) -> bool:
     # every line must start with "- " (dash + space)
-    lines = block.splitlines()
-    if not lines:
-        return False
     for line in lines:
         if line == "":
             return False
@@ -57,16 +53,13 @@ def _is_unordered_list(block: str) -> bool:
     return True
 
 
-def _is_ordered_list(block: str) -> bool:
+def _is_ordered_list(lines: List[str]) -> bool:
     # every line must start with "1. " then "2. " etc, starting at 1 and increment by 1
-    lines = block.splitlines()
-    if not lines:
-        return False
     expected = 1
     for line in lines:
         if line == "":
             return False
-        m = re.match(r'^(\d+)\.\s+', line)
+        m = ORDERED_ITEM_RE.match(line)
         if not m:
             return False
         num = int(m.group(1))
@@ -76,6 +69,33 @@ def _is_ordered_list(block: str) -> bool:
     return True
 
 
+def block_type_from_lines(lines: List[str]) -> BlockType:
+    """
+    Determine the BlockType of a block that is already split into lines
+    (first line without leading and last line without trailing whitespace).
+    """
+    if not lines:
+        return BlockType.PARAGRAPH
+
+    # check code block before heading, since code fences can start with backticks
+    if _is_code_block(lines):
+        return BlockType.CODE
+
+    if _is_heading(lines):
+        return BlockType.HEADING
+
+    if _is_quote(lines):
+        return BlockType.QUOTE
+
+    if _is_unordered_list(lines):
+        return BlockType.UNORDERED_LIST
+
+    if _is_ordered_list(lines):
+        return BlockType.ORDERED_LIST
+
+    return BlockType.PARAGRAPH
+
+
 def block_to_block_type(block: str) -> BlockType:
     """
     Determine the BlockType for a single block string.
@@ -95,20 +115,4 @@ def block_to_block_type(block: str) -> BlockType:
     if block.strip() == "":
         return BlockType.PARAGRAPH
 
-    # check code block before heading, since code fences can start with backticks
-    if _is_code_block(block):
-        return BlockType.CODE
-
-    if _is_heading(block):
-        return BlockType.HEADING
-
-    if _is_quote(block):
-        return BlockType.QUOTE
-
-    if _is_unordered_list(block):
-        return BlockType.UNORDERED_LIST
-
-    if _is_ordered_list(block):
-        return BlockType.ORDERED_LIST
-
-    return BlockType.PARAGRAPH
+    return block_type_from_lines(block.splitlines())
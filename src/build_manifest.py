@@ -0,0 +1,213 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+# bump whenever the on-disk layout of the manifest changes
+MANIFEST_VERSION = 1
+
+SRC_DIR = Path(__file__).resolve().parent
+# the modules that parse markdown and render pages: their code is what a
+# page's HTML (and a cached block's) depends on, so it keys both
+RENDER_MODULES = (
+    "block_scanner",
+    "block_types",
+    "extract_markdown",
+    "generate_page",
+    "htmlnode",
+    "image_size",
+    "inline_tokenizer",
+    "leafnode",
+    "markdown_blocks",
+    "markdown_to_html",
+    "page_info",
+    "parentnode",
+    "patterns",
+    "split_delimiter",
+    "split_images_links",
+    "template",
+    "text_to_html",
+    "text_to_textnodes",
+    "textnode",
+)
+
+
+def hash_file(path) -> str:
+    """Return the sha256 hex digest of a file's contents."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def generator_code_hash(src_dir: Path = SRC_DIR) -> str:
+    """
+    Hash the source code of the modules that decide a page's HTML
+    (RENDER_MODULES). Any change to the parser or renderer invalidates every
+    page and every cached block; editing the CLI, the sitemap writer or
+    other build plumbing does not.
+    """
+    h = hashlib.sha256()
+    for name in sorted(RENDER_MODULES):
+        path = src_dir / f"{name}.py"
+        if not path.is_file():
+            continue
+        h.update(path.name.encode("utf-8"))
+        h.update(b"\0")
+        h.update(path.read_bytes())
+    return h.hexdigest()
+
+
+class BuildManifest:
+    """
+    Persistent record of what the last build produced.
+
+    pages maps an output path to the source path it was rendered from and the
+    hash of that source at the time (plus its size and mtime when known, so
+    an untouched source need not be hashed again). Both paths are stored
+    relative to the directory holding the manifest (the project root, next
+    to public/).
+    template_hash and code_hash are the hashes of template.html and of the
+    generator code used for that build. static lists the files (relative to
+    public/) mirrored from static/, so files deleted there can be removed.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        pages: Optional[Dict[str, Dict[str, object]]] = None,
+        template_hash: Optional[str] = None,
+        code_hash: Optional[str] = None,
+        static: Optional[List[str]] = None,
+    ):
+        self.path = Path(path)
+        self._prefix = str(self.path.parent) + os.sep
+        self.pages = pages if pages is not None else {}
+        self.template_hash = template_hash
+        self.code_hash = code_hash
+        self.static = static if static is not None else []
+
+    @classmethod
+    def load(cls, path: Path) -> "BuildManifest":
+        """Load a manifest from disk. A missing or unreadable manifest is treated as empty."""
+        path = Path(path)
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return cls(path)
+        if not isinstance(data, dict) or data.get("version") != MANIFEST_VERSION:
+            return cls(path)
+        return cls(
+            path,
+            pages=data.get("pages", {}),
+            template_hash=data.get("template_hash"),
+            code_hash=data.get("code_hash"),
+            static=data.get("static", []),
+        )
+
+    def save(self) -> None:
+        data = {
+            "version": MANIFEST_VERSION,
+            "template_hash": self.template_hash,
+            "code_hash": self.code_hash,
+            "pages": dict(sorted(self.pages.items())),
+            "static": sorted(self.static),
+        }
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(json.dumps(data, indent=1), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+    def _key(self, path: str) -> str:
+        # paths are stored relative to the directory holding the manifest
+        path = os.fspath(path)
+        rel = path[len(self._prefix):] if path.startswith(self._prefix) else ""
+        # plain slice for paths below it with no "." / ".." / empty segments
+        if rel and (os.sep + ".") not in (os.sep + rel) and (os.sep * 2) not in rel:
+            return rel.replace(os.sep, "/")
+        return Path(os.path.relpath(path, self.path.parent)).as_posix()
+
+    def _path(self, key: str) -> str:
+        return str(self.path.parent / key)
+
+    def plan(
+        self,
+        pages: Iterable[Tuple[str, str]],
+        template_hash: str,
+        code_hash: str,
+        stats: Optional[Mapping[str, Tuple[int, int]]] = None,
+        reasons: Optional[Dict[str, str]] = None,
+    ) -> Tuple[List[Tuple[str, str, str]], List[Tuple[str, str, str]], List[str]]:
+        """
+        Decide which pages need rendering.
+
+        pages: (from_path, dest_path) pairs for every page currently in content/.
+        stats: from_path -> (size, mtime_ns) from the inventory; a source whose
+          size and mtime match its record reuses the recorded hash.
+        Returns (stale, fresh, removed):
+          stale   -> (from_path, dest_path, source_hash) pages to re-render
+          fresh   -> (from_path, dest_path, source_hash) pages already up to date
+          removed -> output paths recorded by the last build whose source is gone
+        reasons, if given, is filled with dest_path -> why, for every stale page.
+        """
+        if stats is None:
+            stats = {}
+        stale: List[Tuple[str, str, str]] = []
+        fresh: List[Tuple[str, str, str]] = []
+        seen = set()
+        for from_path, dest_path in pages:
+            out_key = self._key(dest_path)
+            seen.add(out_key)
+            entry = self.pages.get(out_key)
+            stat = stats.get(from_path)
+            if entry is not None and stat is not None and [entry.get("size"), entry.get("mtime_ns")] == list(stat):
+                src_hash = entry["hash"]
+            else:
+                src_hash = hash_file(from_path)
+            if self.template_hash is None:
+                reason = "no previous build"
+            elif template_hash != self.template_hash:
+                reason = "template changed"
+            elif code_hash != self.code_hash:
+                reason = "generator code or options changed"
+            elif entry is None:
+                reason = "new page"
+            elif entry.get("hash") != src_hash:
+                reason = "source changed"
+            elif entry.get("source") != self._key(from_path):
+                reason = "source moved"
+            elif not os.path.exists(dest_path):
+                reason = "output missing"
+            else:
+                reason = None
+            if reason is not None:
+                stale.append((from_path, dest_path, src_hash))
+                if reasons is not None:
+                    reasons[dest_path] = reason
+            else:
+                fresh.append((from_path, dest_path, src_hash))
+        removed = [self._path(key) for key in sorted(self.pages) if key not in seen]
+        return stale, fresh, removed
+
+    def begin(self, template_hash: str, code_hash: str) -> None:
+        """
+        Start recording a new build. If the template or generator code changed,
+        every previous page record is dropped so an interrupted build cannot
+        leave old pages marked as up to date.
+        """
+        if template_hash != self.template_hash or code_hash != self.code_hash:
+            self.pages.clear()
+        self.template_hash = template_hash
+        self.code_hash = code_hash
+
+    def record(
+        self, from_path: str, dest_path: str, src_hash: str, stat: Optional[Tuple[int, int]] = None
+    ) -> None:
+        entry = {"source": self._key(from_path), "hash": src_hash}
+        if stat is not None:
+            entry["size"], entry["mtime_ns"] = stat
+        self.pages[self._key(dest_path)] = entry
+
+    def forget(self, dest_path: str) -> None:
+        self.pages.pop(self._key(dest_path), None)
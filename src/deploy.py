@@ -0,0 +1,190 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set
+
+from build_manifest import hash_file
+from inventory import SourceFile
+
+# bump whenever the on-disk layout of the deploy manifest changes
+DEPLOY_VERSION = 1
+
+
+def same_content(path, data: bytes) -> bool:
+    """True if the file at path already holds exactly data (sizes first, then hashes)."""
+    try:
+        if os.path.getsize(path) != len(data):
+            return False
+        return hash_file(path) == hashlib.sha256(data).hexdigest()
+    except OSError:
+        return False
+
+
+def write_if_changed(path, data: bytes) -> bool:
+    """
+    Write data to path unless the file already holds it, so unchanged outputs
+    keep their mtime. Returns whether the file was written. The data goes to
+    a sibling temp file that then replaces path, so readers never see a
+    partial file and a failed write leaves the previous one in place.
+    """
+    if same_content(path, data):
+        return False
+    path = Path(path)
+    tmp = path.with_name(f".{path.name}.tmp")
+    try:
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    return True
+
+
+def replace_if_changed(tmp_path, path) -> bool:
+    """
+    Move the freshly written tmp_path over path unless both hold the same
+    bytes, in which case tmp_path is discarded. Returns whether path changed.
+    """
+    try:
+        same = os.path.getsize(tmp_path) == os.path.getsize(path) and hash_file(tmp_path) == hash_file(path)
+    except OSError:
+        same = False
+    if same:
+        os.unlink(tmp_path)
+        return False
+    os.replace(tmp_path, path)
+    return True
+
+
+class DeployDelta(NamedTuple):
+    added: List[str]
+    changed: List[str]
+    removed: List[str]
+
+
+class DeployManifest:
+    """
+    Content hash and size of every file in public/ after a build, keyed by
+    posix path relative to public/, for deploy tools that upload only what
+    changed. mtime_ns is kept so a file the build left alone is not hashed
+    again. delta lists what was added, changed and removed since the
+    previous build's manifest. gzip holds the settings .gz sidecars were
+    written with (None when the build wrote none).
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        files: Optional[Dict[str, Dict[str, object]]] = None,
+        gzip: Optional[Dict[str, int]] = None,
+    ):
+        self.path = Path(path)
+        self.files = files if files is not None else {}
+        self.gzip = gzip
+        self.delta = DeployDelta([], [], [])
+        # the records before the first refresh() since load or update(), and
+        # every path refreshed since: what delta is worked out from
+        self._before: Optional[Dict[str, Dict[str, object]]] = None
+        self._refreshed: Set[str] = set()
+
+    @classmethod
+    def load(cls, path: Path) -> "DeployManifest":
+        """Load a manifest from disk. A missing or unreadable manifest is treated as empty."""
+        path = Path(path)
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return cls(path)
+        if not isinstance(data, dict) or data.get("version") != DEPLOY_VERSION:
+            return cls(path)
+        return cls(path, files=data.get("files", {}), gzip=data.get("gzip"))
+
+    def save(self) -> None:
+        data = {
+            "version": DEPLOY_VERSION,
+            "gzip": self.gzip,
+            "files": self.files,
+            "added": self.delta.added,
+            "changed": self.delta.changed,
+            "removed": self.delta.removed,
+        }
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(json.dumps(data, indent=1), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+    def _entry(self, path: str, rel: str, size: int, mtime_ns: int) -> Optional[Dict[str, object]]:
+        # the record for a file, reusing the recorded hash when its stat
+        # matches; None if it was deleted since it was stat'ed
+        entry = self.files.get(rel)
+        if entry is not None and [entry.get("size"), entry.get("mtime_ns")] == [size, mtime_ns]:
+            digest = entry["hash"]
+        else:
+            try:
+                digest = hash_file(path)
+            except FileNotFoundError:
+                return None
+        return {"hash": digest, "size": size, "mtime_ns": mtime_ns}
+
+    def update(self, files: Iterable[SourceFile]) -> DeployDelta:
+        """
+        Replace the recorded files with an inventory of the output tree
+        (scan_tree(public)) and return the delta against the previous record.
+        Files whose size and mtime match their record reuse the recorded hash.
+        """
+        previous = self.files
+        current: Dict[str, Dict[str, object]] = {}
+        added: List[str] = []
+        changed: List[str] = []
+        for f in files:
+            entry = self._entry(f.path, f.rel, f.size, f.mtime_ns)
+            if entry is None:
+                continue  # deleted since the scan
+            current[f.rel] = entry
+            if f.rel not in previous:
+                added.append(f.rel)
+            elif previous[f.rel].get("hash") != entry["hash"]:
+                changed.append(f.rel)
+        removed = sorted(rel for rel in previous if rel not in current)
+        self.files = current
+        self.delta = DeployDelta(added, changed, removed)
+        self._before = None
+        self._refreshed = set()
+        return self.delta
+
+    def refresh(self, root, rels: Iterable[str]) -> DeployDelta:
+        """
+        Bring the records of the given paths (relative to root) up to date
+        from a stat of each, leaving every other record as it is: for a
+        caller that knows which files it wrote or removed, so the tree is
+        not scanned again. A path that no longer exists loses its record.
+        The delta covers every path refreshed since the last load or
+        update(), so a save after several refreshes lists them all.
+        """
+        if self._before is None:
+            self._before = dict(self.files)
+        files = self.files
+        for rel in rels:
+            path = os.path.join(os.fspath(root), *rel.split("/"))
+            try:
+                st = os.stat(path)
+                entry = self._entry(path, rel, st.st_size, st.st_mtime_ns)
+            except FileNotFoundError:
+                entry = None
+            if entry is None:
+                files.pop(rel, None)
+            else:
+                files[rel] = entry
+            self._refreshed.add(rel)
+        before = self._before
+        self.delta = DeployDelta(
+            sorted(rel for rel in self._refreshed if rel in files and rel not in before),
+            sorted(
+                rel
+                for rel in self._refreshed
+                if rel in files and rel in before and before[rel].get("hash") != files[rel]["hash"]
+            ),
+            sorted(rel for rel in self._refreshed if rel not in files and rel in before),
+        )
+        return self.delta
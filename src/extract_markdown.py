@@ -1,6 +1,8 @@
-import re
 from typing import List, Tuple
 
+from patterns import IMAGE_RE, LINK_RE
+
+
 def extract_markdown_images(text: str) -> List[Tuple[str, str]]:
     """
     Extract markdown images of the form:
@@ -8,8 +10,7 @@ def extract_markdown_images(text: str) -> List[Tuple[str, str]]:
 
     Returns list of (alt_text, url) tuples.
     """
-    pattern = r"!\[([^\[\]]*)\]\(([^\(\)]*)\)"
-    return re.findall(pattern, text)
+    return IMAGE_RE.findall(text)
 
 
 def extract_markdown_links(text: str) -> List[Tuple[str, str]]:
@@ -20,5 +21,4 @@ def extract_markdown_links(text: str) -> List[Tuple[str, str]]:
     Returns list of (anchor_text, url) tuples.
     The regex ensures it doesn't capture images (which also start with !).
     """
-    pattern = r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)"
-    return re.findall(pattern, text)
+    return LINK_RE.findall(text)
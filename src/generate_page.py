@@ -1,7 +1,43 @@
+import contextlib
+import hashlib
+import io
+import multiprocessing
 import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
+from typing import Deque, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
 
-from markdown_to_html import markdown_to_html_node
+import image_size
+import link_check
+import page_info
+import profiling
+import render_cache
+import site_index
+from block_scanner import Block, iter_blocks
+from build_manifest import generator_code_hash
+from deploy import replace_if_changed, write_if_changed
+from htmlnode import HTMLNode
+from inventory import SourceFile, scan_tree
+from markdown_to_html import markdown_to_html_node, render_blocks_to
+from template import SlotValue, Template, load_template
+
+# sources at least this large (in bytes) are parsed and written block by block
+STREAM_THRESHOLD = 16 << 20
+
+# threads reading sources and writing pages while the calling thread renders
+IO_THREADS = 4
+# most sources read ahead, and most rendered pages waiting to be written
+PIPELINE_DEPTH = 16
+# pool workers start from a clean server process instead of a fork of this
+# one: a build forks while other threads (I/O, the static sync) may hold
+# locks, such as stdout's, that a forked child would inherit held
+POOL_CONTEXT = multiprocessing.get_context(
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+
+# (from_path, template_path, dest_path, source_hash or None) of a page to render
+Task = Tuple[str, str, str, Optional[str]]
 
 
 def extract_title(markdown: str) -> str:
@@ -10,37 +46,133 @@ def extract_title(markdown: str) -> str:
     Raises ValueError if no H1 is present.
     Example: extract_title("# Hello") -> "Hello"
     """
-    for line in markdown.splitlines():
+    return _title_from_lines(markdown.splitlines())
+
+
+def _title_from_lines(lines: Iterable[str]) -> str:
+    for line in lines:
         line = line.strip()
         if line.startswith("# "):
             return line[2:].strip()
     raise ValueError("No H1 title found in markdown")
 
 
-def generate_page(from_path: str, template_path: str, dest_path: str) -> None:
+def generate_page(from_path: str, template_path: str, dest_path: str, source_hash: Optional[str] = None) -> None:
     """
     Generate a HTML page:
     - Read markdown from from_path
-    - Convert markdown to HTML using markdown_to_html_node(...).to_html()
-    - Read template_path and replace {{ Title }} and {{ Content }}
-    - Write final HTML to dest_path (creating directories if needed)
+    - Convert markdown to an HTML node tree using markdown_to_html_node(...)
+    - Stream the compiled template_path into dest_path (creating directories if
+      needed), rendering the tree directly into the {{ Content }} slot
+    Sources of STREAM_THRESHOLD bytes or more go through stream_page instead.
+    With the site index enabled, the page is recorded in it (with
+    source_hash, the sha256 of from_path, when the caller already knows it);
+    with link checking on, its internal links and images are checked.
     """
     print(f"Generating page from {from_path} to {dest_path} using {template_path}")
-    src_md = Path(from_path).read_text(encoding="utf-8")
-    template = Path(template_path).read_text(encoding="utf-8")
+    with _indexed(from_path, template_path, dest_path, source_hash):
+        if os.path.getsize(from_path) >= STREAM_THRESHOLD:
+            stream_page(from_path, template_path, dest_path)
+            return
+        src_md = read_source(from_path)
+        template = load_template(template_path)
 
-    # convert markdown to html string
-    html_content = markdown_to_html_node(src_md).to_html()
+        # convert markdown to an html node tree
+        root = markdown_to_html_node(src_md)
 
-    # extract title
-    title = extract_title(src_md)
+        # extract title
+        title = extract_title(src_md)
+        page_info.note_title(title)
+
+        write_page(dest_path, template, title, root)
+
+
+@contextlib.contextmanager
+def _indexed(
+    from_path: str, template_path: str, dest_path: str, source_hash: Optional[str] = None
+) -> Iterator[None]:
+    # summarize the page rendered inside the block, then note it in the site
+    # index and check its links, unless rendering fails
+    index = site_index.active()
+    checker = link_check.active()
+    if index is None and checker is None:
+        yield
+        return
+    summary = page_info.begin(full=index is not None, refs=checker is not None)
+    try:
+        yield
+    finally:
+        page_info.end()
+    if index is not None:
+        index.note(from_path, dest_path, summary, template_path, source_hash)
+    if checker is not None:
+        checker.check(from_path, dest_path, summary)
+
+
+def render_code_hash() -> str:
+    """
+    generator_code_hash, combined with the render options that change every
+    page (image sizes), for the build manifest.
+    """
+    code_hash = generator_code_hash()
+    if image_size.active() is not None:
+        code_hash = hashlib.sha256(f"{code_hash}\0image-sizes".encode("utf-8")).hexdigest()
+    return code_hash
+
+
+def read_source(from_path: str) -> str:
+    return Path(from_path).read_text(encoding="utf-8")
+
+
+def write_page(dest_path: str, template: Template, title: str, root: HTMLNode) -> None:
+    """
+    Write the filled template to dest_path, creating directories if needed.
+    The template and the rendered tree are streamed straight into the file, so
+    the full page never exists as one string. An existing file with the same
+    content is left untouched.
+    """
+    _write_filled(dest_path, template, title, root.render_to)
 
-    # replace placeholders
-    full_html = template.replace("{{ Title }}", title).replace("{{ Content }}", html_content)
 
+def _write_filled(dest_path: str, template: Template, title: str, content: SlotValue) -> bool:
+    # streamed into a sibling temp file, which replaces dest only if it differs
     dest = Path(dest_path)
     dest.parent.mkdir(parents=True, exist_ok=True)
-    dest.write_text(full_html, encoding="utf-8")
+    tmp = dest.with_name(f".{dest.name}.tmp")
+    try:
+        with tmp.open("w", encoding="utf-8") as f:
+            template.render_to(f.write, {"Title": title, "Content": content})
+        return replace_if_changed(tmp, dest)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+def iter_source_lines(from_path: str) -> Iterator[str]:
+    """
+    The lines of a markdown file, read incrementally and split exactly as
+    str.splitlines() splits the whole text.
+    """
+    with open(from_path, encoding="utf-8") as f:
+        for raw in f:
+            yield from raw.splitlines()
+
+
+def stream_blocks(from_path: str) -> Iterator[Block]:
+    return iter_blocks(iter_source_lines(from_path))
+
+
+def stream_page(from_path: str, template_path: str, dest_path: str) -> None:
+    """
+    generate_page for very large sources: the title is found in a first pass
+    over the file, then the {{ Content }} slot is filled by reading, parsing,
+    rendering and writing one block at a time. Peak memory depends on the
+    largest block, not on the size of the document.
+    """
+    template = load_template(template_path)
+    title = _title_from_lines(iter_source_lines(from_path))
+    page_info.note_title(title)
+    _write_filled(dest_path, template, title, lambda write: render_blocks_to(stream_blocks(from_path), write))
 
 
 def generate_pages_recursive(dir_path_content: str, template_path: str, dest_dir_path: str) -> None:
@@ -49,19 +181,233 @@ def generate_pages_recursive(dir_path_content: str, template_path: str, dest_dir
     - For each .md file, create a corresponding .html file in dest_dir_path
     - Preserve the same directory structure
     """
-    # Ensure input paths are strings (os.listdir works with strings)
-    entries = os.listdir(dir_path_content)
+    for from_path, dest_path in collect_pages(dir_path_content, dest_dir_path):
+        generate_page(from_path, template_path, dest_path)
+
 
-    for entry in entries:
-        entry_path = os.path.join(dir_path_content, entry)
-        dest_path = os.path.join(dest_dir_path, entry)
+def pages_from_inventory(sources: Iterable[SourceFile], dest_dir_path: str) -> List[Tuple[str, str]]:
+    """Pair inventoried .md sources with the .html paths they render to under dest_dir_path."""
+    return [
+        (source.path, os.path.splitext(os.path.join(dest_dir_path, *source.rel.split("/")))[0] + ".html")
+        for source in sources
+    ]
+
+
+def collect_pages(dir_path_content: str, dest_dir_path: str) -> List[Tuple[str, str]]:
+    """
+    Find every .md file under dir_path_content and pair it with the .html path
+    generate_pages_recursive would write it to.
+    Returns a sorted list of (from_path, dest_path) tuples.
+    """
+    return pages_from_inventory(scan_tree(dir_path_content, ".md"), dest_dir_path)
 
-        if os.path.isfile(entry_path) and entry_path.endswith(".md"):
-            # Replace .md with .html
-            dest_html_path = os.path.splitext(dest_path)[0] + ".html"
-            generate_page(entry_path, template_path, dest_html_path)
 
-        elif os.path.isdir(entry_path):
-            # Ensure destination directory exists, then recurse
-            os.makedirs(dest_path, exist_ok=True)
-            generate_pages_recursive(entry_path, template_path, dest_path)
+def render_page(src_md: str, template: Template) -> str:
+    """The complete HTML of a page rendered from markdown source, as one string."""
+    root = markdown_to_html_node(src_md)
+    title = extract_title(src_md)
+    page_info.note_title(title)
+    buf = io.StringIO()
+    template.render_to(buf.write, {"Title": title, "Content": root.render_to})
+    return buf.getvalue()
+
+
+def write_output(dest_path: str, html: str) -> bool:
+    """
+    Write a rendered page into an existing directory, leaving no partial file
+    behind. An existing file with the same content is left untouched;
+    returns whether the page was written.
+    """
+    return write_if_changed(dest_path, html.encode("utf-8"))
+
+
+def make_output_dirs(dest_paths: Iterable[str]) -> None:
+    """
+    Create the parent directory of every output path, each directory once.
+    A directory that cannot be created is skipped; writing into it then
+    fails that page alone.
+    """
+    for directory in sorted({os.path.dirname(path) for path in dest_paths}):
+        try:
+            os.makedirs(directory, exist_ok=True)
+        except OSError:
+            continue
+
+
+def _read_unless_streamed(from_path: str) -> Optional[str]:
+    # sources big enough to stream are left for stream_page to read
+    if os.path.getsize(from_path) >= STREAM_THRESHOLD:
+        return None
+    return read_source(from_path)
+
+
+def _error_message(e: Exception) -> str:
+    return f"{type(e).__name__}: {e}"
+
+
+def _pipeline(tasks: Sequence[Task], io_threads: int, depth: int) -> Iterator[Optional[str]]:
+    """
+    Render (from_path, template_path, dest_path, source_hash) tasks with
+    file I/O overlapped: up to `depth` sources are read ahead and up to
+    `depth` rendered pages are written behind on a pool of io_threads
+    threads, while this thread parses and renders. Yields each task's error
+    (None on success) in input order.
+    """
+    make_output_dirs(task[2] for task in tasks)
+    with ThreadPoolExecutor(max_workers=io_threads) as pool:
+        pending = iter(tasks)
+        reads: Deque[Tuple[Task, Future]] = deque()
+        # (write future, or None when the page is already done / failed, error)
+        writes: Deque[Tuple[Optional[Future], Optional[str]]] = deque()
+
+        def read_ahead() -> None:
+            while len(reads) < depth:
+                task = next(pending, None)
+                if task is None:
+                    return
+                reads.append((task, pool.submit(_read_unless_streamed, task[0])))
+
+        def finish(write: Optional[Future], error: Optional[str]) -> Optional[str]:
+            if write is not None:
+                try:
+                    write.result()
+                except Exception as e:
+                    error = _error_message(e)
+            return error
+
+        read_ahead()
+        while reads:
+            (from_path, template_path, dest_path, source_hash), read = reads.popleft()
+            read_ahead()
+            print(f"Generating page from {from_path} to {dest_path} using {template_path}")
+            try:
+                src_md = read.result()
+                with _indexed(from_path, template_path, dest_path, source_hash):
+                    if src_md is None:
+                        stream_page(from_path, template_path, dest_path)
+                        writes.append((None, None))
+                    else:
+                        html = render_page(src_md, load_template(template_path))
+                        writes.append((pool.submit(write_output, dest_path, html), None))
+            except Exception as e:
+                writes.append((None, _error_message(e)))
+            while writes and (len(writes) > depth or writes[0][0] is None or writes[0][0].done()):
+                yield finish(*writes.popleft())
+        while writes:
+            yield finish(*writes.popleft())
+
+
+def _render_pages(tasks: Sequence[Task]) -> Iterator[Optional[str]]:
+    """Each task's error (None on success), in order."""
+    if not profiling.is_enabled():
+        yield from _pipeline(tasks, IO_THREADS, PIPELINE_DEPTH)
+        return
+    # profiled builds time each page's stages one after another, so they
+    # render through generate_page without overlapping I/O
+    for task in tasks:
+        try:
+            generate_page(*task)
+            yield None
+        except Exception as e:
+            yield _error_message(e)
+
+
+def _init_worker(
+    profile: bool,
+    cache_config: Optional[tuple],
+    index_config: Optional[tuple],
+    check_config: Optional[tuple],
+    sizes_config: Optional[tuple],
+) -> None:
+    if profile:
+        profiling.enable()
+    render_cache.reset()
+    if cache_config is not None:
+        render_cache.enable(*cache_config)
+    site_index.reset()
+    if index_config is not None:
+        site_index.enable(*index_config)
+    if check_config is not None:
+        link_check.enable(*check_config)
+    if sizes_config is not None:
+        image_size.enable(*sizes_config)
+
+
+def _generate_batch_task(
+    tasks: Sequence[Task]
+) -> Tuple[
+    List[Optional[str]],
+    Optional[list],
+    Optional[Dict[str, object]],
+    Optional[Dict[str, object]],
+    Optional[list],
+    Optional[Dict[str, list]],
+]:
+    """
+    Process-pool entry point: render a batch of pages, returning an error
+    message per page instead of raising, plus the batch's profile records,
+    block cache updates, site index records, broken links and newly read
+    image sizes when those are enabled.
+    """
+    errors = list(_render_pages(tasks))
+    return (
+        errors,
+        profiling.take_pages(),
+        render_cache.take_updates(),
+        site_index.take_updates(),
+        link_check.take_updates(),
+        image_size.take_updates(),
+    )
+
+
+def generate_pages(
+    pages: Sequence[Tuple[str, str]],
+    template_path: str,
+    jobs: int = 1,
+    source_hashes: Optional[Mapping[str, str]] = None,
+) -> Iterator[Tuple[str, str, Optional[str]]]:
+    """
+    Render many (from_path, dest_path) pages, optionally across a process pool.
+    Yields (from_path, dest_path, error) in input order; error is None on success.
+    A failing page does not stop the others. source_hashes (dest_path ->
+    sha256 of the source, e.g. from the build manifest) spares the site index
+    hashing each source again.
+    """
+    hashes = source_hashes or {}
+    tasks = [(from_path, template_path, dest_path, hashes.get(dest_path)) for from_path, dest_path in pages]
+    if jobs <= 1 or len(tasks) <= 1:
+        for (from_path, _, dest_path, _), error in zip(tasks, _render_pages(tasks)):
+            # hand this process's cache writes over as a worker would, so they
+            # are flushed in batches during the build
+            render_cache.collect(render_cache.take_updates())
+            site_index.collect(site_index.take_updates())
+            yield from_path, dest_path, error
+        return
+
+    workers = min(jobs, len(tasks))
+    # a few batches per worker keeps the pool busy without per-page IPC overhead
+    batch = max(1, len(tasks) // (workers * 4))
+    batches = [tasks[i : i + batch] for i in range(0, len(tasks), batch)]
+    cache = render_cache.active()
+    index = site_index.active()
+    checker = link_check.active()
+    sizes = image_size.active()
+    initargs = (
+        profiling.is_enabled(),
+        cache.config() if cache is not None else None,
+        index.config() if index is not None else None,
+        checker.config() if checker is not None else None,
+        sizes.config() if sizes is not None else None,
+    )
+    with ProcessPoolExecutor(
+        max_workers=workers, mp_context=POOL_CONTEXT, initializer=_init_worker, initargs=initargs
+    ) as pool:
+        results = pool.map(_generate_batch_task, batches)
+        for chunk, (errors, profile, cache_updates, index_updates, broken, read_sizes) in zip(batches, results):
+            profiling.collect(profile)
+            render_cache.collect(cache_updates)
+            site_index.collect(index_updates)
+            link_check.collect(broken)
+            image_size.collect(read_sizes)
+            for (from_path, _, dest_path, _), error in zip(chunk, errors):
+                yield from_path, dest_path, error
@@ -1,7 +1,36 @@
-from typing import Optional, List, Dict, Any
+import io
+from typing import Optional, List, Dict, Any, Callable
+
+
+def chunk_writer(sink: Any) -> Callable[[str], Any]:
+    """
+    Return a write(str) callable for sink, which may be:
+      - a text stream (file opened in text mode, io.StringIO, ...)
+      - a binary stream (file opened in "wb", io.BytesIO, ...) -> chunks are UTF-8 encoded
+      - a socket -> chunks are UTF-8 encoded and sent with sendall()
+      - any callable taking a str (e.g. list.append)
+    Every chunk is written as soon as it is produced, so wrap unbuffered sinks
+    (raw sockets) in a buffer (socket.makefile("wb")) for large documents.
+    """
+    if isinstance(sink, io.TextIOBase):
+        return sink.write
+    if isinstance(sink, (io.RawIOBase, io.BufferedIOBase)) or "b" in getattr(sink, "mode", ""):
+        write_bytes = sink.write
+        return lambda chunk: write_bytes(chunk.encode("utf-8"))
+    if hasattr(sink, "sendall"):
+        send = sink.sendall
+        return lambda chunk: send(chunk.encode("utf-8"))
+    if hasattr(sink, "write"):
+        return sink.write
+    if callable(sink):
+        return sink
+    raise TypeError(f"Cannot write HTML to {type(sink).__name__}")
 
 
 class HTMLNode:
+    # pages create very many of these; slots drop the per-instance __dict__
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(
         self,
         tag: Optional[str] = None,
@@ -25,6 +54,17 @@ class HTMLNode:
         For now, indicate this should be overridden."""
         raise NotImplementedError("to_html() must be implemented by subclasses")
 
+    def render_to(self, sink: Any) -> None:
+        """
+        Stream this node's HTML into sink (see chunk_writer for accepted sinks)
+        without building the full document string.
+        """
+        self._render(chunk_writer(sink))
+
+    def _render(self, write: Callable[[str], Any]) -> None:
+        """Emit this node's HTML as a sequence of write() calls. Child classes override this."""
+        raise NotImplementedError("_render() must be implemented by subclasses")
+
     def props_to_html(self) -> str:
         """
         Convert self.props dict into a string of HTML attributes.
@@ -0,0 +1,200 @@
+import json
+import os
+import struct
+from pathlib import Path
+from typing import BinaryIO, Dict, List, Optional, Tuple
+
+from deploy import write_if_changed
+from patterns import IMAGE_RE
+from site_index import local_path
+
+# bump whenever the layout of the cache file changes
+CACHE_VERSION = 1
+
+# JPEG start-of-frame markers, which carry the image size (not DHT, JPG or DAC)
+_JPEG_SOF = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+# JPEG markers without a length field
+_JPEG_STANDALONE = frozenset(range(0xD0, 0xDA)) | {0x01}
+
+
+def _jpeg_size(f: BinaryIO) -> Optional[Tuple[int, int]]:
+    # walk the segments from after SOI, skipping each by its length, up to a SOF
+    while True:
+        byte = f.read(1)
+        while byte == b"\xff":
+            marker = f.read(1)
+            if marker != b"\xff":
+                break
+        else:
+            return None
+        if not marker:
+            return None
+        code = marker[0]
+        if code in _JPEG_STANDALONE:
+            continue
+        head = f.read(2)
+        if len(head) < 2:
+            return None
+        (length,) = struct.unpack(">H", head)
+        if code in _JPEG_SOF:
+            frame = f.read(5)
+            if len(frame) < 5:
+                return None
+            height, width = struct.unpack(">xHH", frame)
+            return width, height
+        if code == 0xDA or length < 2:
+            return None  # image data reached without a frame header
+        f.seek(length - 2, os.SEEK_CUR)
+
+
+def read_size(path) -> Optional[Tuple[int, int]]:
+    """
+    (width, height) of a PNG, GIF, JPEG or WebP file, read from its header
+    bytes alone (JPEG skips from segment to segment up to the frame header).
+    None for other or malformed files.
+    """
+    try:
+        with open(path, "rb") as f:
+            head = f.read(30)
+            if head[:8] == b"\x89PNG\r\n\x1a\n" and head[12:16] == b"IHDR":
+                return struct.unpack(">II", head[16:24])
+            if head[:6] in (b"GIF87a", b"GIF89a"):
+                return struct.unpack("<HH", head[6:10])
+            if head[:4] == b"RIFF" and head[8:12] == b"WEBP" and len(head) == 30:
+                chunk = head[12:16]
+                if chunk == b"VP8 ":
+                    width, height = struct.unpack("<HH", head[26:30])
+                    return width & 0x3FFF, height & 0x3FFF
+                if chunk == b"VP8L" and head[20] == 0x2F:
+                    (bits,) = struct.unpack("<I", head[21:25])
+                    return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+                if chunk == b"VP8X":
+                    return int.from_bytes(head[24:27], "little") + 1, int.from_bytes(head[27:30], "little") + 1
+                return None
+            if head[:2] == b"\xff\xd8":
+                f.seek(2)
+                return _jpeg_size(f)
+    except (OSError, struct.error):
+        pass
+    return None
+
+
+class ImageSizes:
+    """
+    Intrinsic sizes of the images under static_dir that pages reference by
+    site-absolute URL (/images/a.png), for the width and height of their
+    <img> tags. Sizes are cached by path, size and mtime, in memory and, when
+    path is given, in a JSON file shared by later builds, so an unchanged
+    image costs a stat() per reference and is never opened again.
+
+    Relative image URLs get no size: a cached block's HTML must not depend
+    on the page it appears on. Workers only gather the sizes they read;
+    take_updates/collect hand them to the main process, whose save() writes
+    the cache file.
+    """
+
+    def __init__(self, path: Optional[Path], static_dir: Path):
+        self.path = Path(path) if path is not None else None
+        self.static_dir = Path(static_dir)
+        # static_dir-relative path -> [size, mtime_ns, width, height]; no size is [.., .., None, None]
+        self.entries: Dict[str, List] = {}
+        self._pending: Dict[str, List] = {}
+
+    @classmethod
+    def load(cls, path: Optional[Path], static_dir: Path) -> "ImageSizes":
+        """Load a cache file. A missing or unreadable one is treated as empty."""
+        sizes = cls(path, static_dir)
+        if path is not None:
+            try:
+                data = json.loads(Path(path).read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                return sizes
+            if isinstance(data, dict) and data.get("version") == CACHE_VERSION:
+                sizes.entries = data.get("images", {})
+        return sizes
+
+    def config(self) -> Tuple[Optional[Path], Path]:
+        """Arguments that recreate this cache in a worker process (which loads the file)."""
+        return self.path, self.static_dir
+
+    def size(self, url: str) -> Optional[Tuple[int, int]]:
+        """(width, height) of the local image at a site-absolute URL, if it can be read."""
+        if url[:1] != "/" or url[:2] == "//":
+            return None
+        rel = local_path(url, "/")
+        if rel is None:
+            return None
+        try:
+            st = os.stat(self.static_dir / rel)
+        except OSError:
+            return None
+        entry = self.entries.get(rel)
+        if entry is None or entry[0] != st.st_size or entry[1] != st.st_mtime_ns:
+            size = read_size(self.static_dir / rel)
+            entry = [st.st_size, st.st_mtime_ns, *(size or (None, None))]
+            self.entries[rel] = self._pending[rel] = entry
+        return (entry[2], entry[3]) if entry[2] is not None else None
+
+    def attributes(self, url: str) -> Dict[str, str]:
+        """The <img> attributes added for an image URL: its size when known, and lazy, async loading."""
+        size = self.size(url)
+        attrs = {"width": str(size[0]), "height": str(size[1])} if size is not None else {}
+        attrs["loading"] = "lazy"
+        attrs["decoding"] = "async"
+        return attrs
+
+    def key(self, lines: List[str]) -> bytes:
+        """What the HTML of a block with these lines depends on besides them, for the block cache key."""
+        text = "\n".join(lines)
+        if "![" not in text:
+            return b""
+        sizes = [f"{url}={self.size(url)}" for _, url in IMAGE_RE.findall(text)]
+        return ("\0images\0" + "\0".join(sizes)).encode("utf-8")
+
+    def take_updates(self) -> Dict[str, List]:
+        """Hand over (and reset) the sizes read since the last call."""
+        pending, self._pending = self._pending, {}
+        return pending
+
+    def merge(self, updates: Dict[str, List]) -> None:
+        self.entries.update(updates)
+
+    def save(self) -> None:
+        """Write the cache file, dropping images that no longer exist."""
+        if self.path is None:
+            return
+        images = {rel: entry for rel, entry in sorted(self.entries.items()) if (self.static_dir / rel).is_file()}
+        data = {"version": CACHE_VERSION, "images": images}
+        write_if_changed(self.path, json.dumps(data, separators=(",", ":")).encode("utf-8"))
+
+
+_active: Optional[ImageSizes] = None
+
+
+def enable(path: Optional[Path], static_dir: Path) -> ImageSizes:
+    """Turn image sizes on in this process; <img> tags get sizes and lazy loading from then on."""
+    global _active
+    _active = ImageSizes.load(path, static_dir)
+    return _active
+
+
+def disable() -> None:
+    global _active
+    _active = None
+
+
+def active() -> Optional[ImageSizes]:
+    return _active
+
+
+def take_updates() -> Optional[Dict[str, List]]:
+    """This process's newly read sizes; None when image sizes are off."""
+    if _active is None:
+        return None
+    return _active.take_updates()
+
+
+def collect(updates: Optional[Dict[str, List]]) -> None:
+    """Merge sizes read by another (worker) process into this process's cache."""
+    if _active is not None and updates:
+        _active.merge(updates)
@@ -0,0 +1,64 @@
+from typing import List
+from textnode import TextNode, TextType
+from patterns import DELIMITER_RE, IMAGE_OR_LINK_RE
+
+_DELIMITER_TYPES = {
+    "`": TextType.CODE,
+    "**": TextType.BOLD,
+    "_": TextType.ITALIC,
+}
+
+# A delimited span may not contain the opening of a higher-priority span:
+# code is split before bold, and bold before italic.
+_OUTRANKED_BY = {
+    "`": (),
+    "**": ("`",),
+    "_": ("`", "**"),
+}
+
+
+def tokenize_inline(text: str) -> List[TextNode]:
+    """
+    Convert an inline markdown string into TextNodes in a single left-to-right pass.
+
+    Produces the same nodes as applying split_nodes_image, split_nodes_link and
+    split_nodes_delimiter for `code`, **bold** and _italic_ in that order:
+      - images and links take priority over every delimiter
+      - a delimiter closes at its next occurrence, and the span between may not
+        cross a link/image or open a higher-priority delimiter
+      - an unclosed delimiter raises ValueError
+      - empty TEXT segments are dropped; empty delimited spans are kept
+    """
+    nodes: List[TextNode] = []
+    pos = 0
+    for m in IMAGE_OR_LINK_RE.finditer(text):
+        _scan_delimited(text, pos, m.start(), nodes)
+        if m.group(2) is not None:
+            nodes.append(TextNode(m.group(1), TextType.IMAGE, m.group(2)))
+        else:
+            nodes.append(TextNode(m.group(3), TextType.LINK, m.group(4)))
+        pos = m.end()
+    _scan_delimited(text, pos, len(text), nodes)
+    return nodes
+
+
+def _scan_delimited(text: str, start: int, end: int, nodes: List[TextNode]) -> None:
+    """Append the TEXT/CODE/BOLD/ITALIC nodes for text[start:end] (which holds no links or images)."""
+    pos = start
+    while True:
+        m = DELIMITER_RE.search(text, pos, end)
+        if m is None:
+            break
+        delimiter = m.group(0)
+        open_end = m.end()
+        close = text.find(delimiter, open_end, end)
+        if close == -1 or any(text.find(d, open_end, close) != -1 for d in _OUTRANKED_BY[delimiter]):
+            raise ValueError(f"Unclosed delimiter {delimiter!r} in text: {text[start:end]!r}")
+
+        if m.start() > pos:
+            nodes.append(TextNode(text[pos:m.start()], TextType.TEXT))
+        nodes.append(TextNode(text[open_end:close], _DELIMITER_TYPES[delimiter]))
+        pos = close + len(delimiter)
+
+    if pos < end:
+        nodes.append(TextNode(text[pos:end], TextType.TEXT))
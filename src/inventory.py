@@ -0,0 +1,52 @@
+import os
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+
+class SourceFile(NamedTuple):
+    path: str
+    # posix path relative to the scanned root
+    rel: str
+    size: int
+    mtime_ns: int
+
+
+def _order(entry: SourceFile) -> List[str]:
+    # directory by directory, names sorted within each: the order a sorted
+    # recursive os.listdir walk visits files in ("a/b" comes before "a.md")
+    return entry.rel.split("/")
+
+
+def scan_tree(root, suffix: Optional[str] = None) -> List[SourceFile]:
+    """
+    Every regular file under root (optionally only names ending in suffix),
+    found in one os.scandir walk and sorted deterministically.
+
+    File types come from the cached DirEntry types, so only the files that are
+    returned are stat'ed (for size and mtime). A missing root yields [].
+    Symlinks are followed, like os.path.isfile/os.path.isdir.
+    """
+    files: List[SourceFile] = []
+    stack: List[Tuple[str, str]] = [(os.fspath(root), "")]
+    while stack:
+        path, rel = stack.pop()
+        try:
+            it = os.scandir(path)
+        except (FileNotFoundError, NotADirectoryError):
+            continue
+        with it:
+            for entry in it:
+                try:
+                    if entry.is_dir():
+                        stack.append((entry.path, f"{rel}{entry.name}/"))
+                    elif entry.is_file() and (suffix is None or entry.name.endswith(suffix)):
+                        st = entry.stat()
+                        files.append(SourceFile(entry.path, f"{rel}{entry.name}", st.st_size, st.st_mtime_ns))
+                except FileNotFoundError:
+                    continue  # deleted while we were walking
+    files.sort(key=_order)
+    return files
+
+
+def stat_index(files: List[SourceFile]) -> Dict[str, Tuple[int, int]]:
+    """path -> (size, mtime_ns) for a list of inventory entries."""
+    return {f.path: (f.size, f.mtime_ns) for f in files}
@@ -2,6 +2,8 @@ from htmlnode import HTMLNode
 
 
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag: str, value: str, props=None):
         """
         A leaf node cannot have children.
@@ -21,3 +23,6 @@ class LeafNode(HTMLNode):
 
         # Normal HTML element
         return f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>"
+
+    def _render(self, write) -> None:
+        write(self.to_html())
@@ -0,0 +1,150 @@
+from pathlib import Path
+from typing import AbstractSet, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from inventory import scan_tree
+from page_info import PageSummary
+from site_index import PageRecord, local_path, page_url
+
+
+class BrokenRef(NamedTuple):
+    source: str
+    line: int
+    url: str
+    # "link" or "image"
+    kind: str
+
+
+def find_lines(source: str, refs: List[Tuple[int, str]]) -> List[int]:
+    """
+    For each (start, url), the first line from start (1-based) of source that
+    mentions url, or start if none does. The file is read once.
+    """
+    try:
+        with open(source, encoding="utf-8") as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return [start for start, _ in refs]
+    found = []
+    for start, url in refs:
+        lineno = next((i for i in range(max(start, 1), len(lines) + 1) if url in lines[i - 1]), start)
+        found.append(lineno)
+    return found
+
+
+class LinkChecker:
+    """
+    Checks the internal links and images of rendered pages against the files
+    the site will have: targets holds their paths relative to public/ (every
+    page's output plus every file synced from static/). Each reference costs
+    one local_path() and one set lookup; public/ is never read.
+
+    References come from the LINK and IMAGE TextNodes the parser produces
+    anyway (the PageRefs of a page_info summary) and are checked as each
+    page renders. Workers only gather what they find; take_updates/collect
+    hand it to the main process.
+    """
+
+    def __init__(self, targets: AbstractSet[str], public: Path):
+        self.targets = targets
+        self.public = Path(public)
+        self.broken: List[BrokenRef] = []
+        # site-absolute URLs resolve the same on every page, and sites
+        # reuse them a lot: their local_path() is only worked out once
+        self._absolute: Dict[str, Optional[str]] = {}
+
+    def config(self) -> Tuple[AbstractSet[str], Path]:
+        """Arguments that recreate this checker (minus its findings) in a worker process."""
+        return self.targets, self.public
+
+    def _missing(self, refs: List[Tuple[int, str]], dest_path: str, base: List[str]) -> List[Tuple[int, str]]:
+        # the (line, URL) refs that resolve to no target; base caches the
+        # page's URL, which relative URLs alone need
+        absolute, targets = self._absolute, self.targets
+        missing = []
+        for ref in refs:
+            url = ref[1]
+            if url[:1] == "/":
+                target = absolute.get(url, "")
+                if target == "":
+                    target = absolute[url] = local_path(url, "/")
+            else:
+                if not base:
+                    base.append(page_url(Path(dest_path), self.public))
+                target = local_path(url, base[0])
+            if target is not None and target not in targets:
+                missing.append(ref)
+        return missing
+
+    def _check(
+        self, from_path: str, dest_path: str, links: List[Tuple[int, str]], images: List[Tuple[int, str]]
+    ) -> List[BrokenRef]:
+        # links and images: (line, URL) pairs
+        base: List[str] = []
+        broken = [(line, "link", url) for line, url in self._missing(links, dest_path, base)]
+        broken += [(line, "image", url) for line, url in self._missing(images, dest_path, base)]
+        if not broken:
+            return []
+        # the line of a rendered reference is its block's first line; the
+        # exact line is looked up for broken references alone
+        lines = find_lines(from_path, [(line, url) for line, _, url in broken])
+        found = [BrokenRef(from_path, line, url, kind) for line, (_, kind, url) in zip(lines, broken)]
+        self.broken.extend(found)
+        return found
+
+    def check(self, from_path: str, dest_path: str, summary: PageSummary) -> List[BrokenRef]:
+        """Check the references of a page that was just rendered, summarized with refs."""
+        return self._check(from_path, dest_path, summary.refs.links, summary.refs.images)
+
+    def check_record(self, from_path: str, dest_path: str, record: PageRecord) -> List[BrokenRef]:
+        """Check the references the site index recorded for a page that was not rendered again."""
+        return self._check(
+            from_path, dest_path, [(1, url) for url in record.links], [(1, url) for url in record.images]
+        )
+
+    def take_updates(self) -> List[BrokenRef]:
+        """Hand over (and reset) what was found so far."""
+        broken, self.broken = self.broken, []
+        return broken
+
+
+def site_targets(page_outputs: Iterable[str], static_dir: Path, extra: Iterable[str] = ()) -> AbstractSet[str]:
+    """
+    The paths (relative to public/) a build will produce: page outputs (also
+    relative to public/), the files in static_dir and any extra generated files.
+    """
+    targets = set(page_outputs)
+    targets.update(extra)
+    targets.update(source.rel for source in scan_tree(static_dir))
+    return frozenset(targets)
+
+
+_active: Optional[LinkChecker] = None
+
+
+def enable(targets: AbstractSet[str], public: Path) -> LinkChecker:
+    """Turn link checking on in this process; rendered pages are checked from then on."""
+    global _active
+    _active = LinkChecker(targets, public)
+    return _active
+
+
+def disable() -> None:
+    global _active
+    _active = None
+
+
+def active() -> Optional[LinkChecker]:
+    return _active
+
+
+def take_updates() -> Optional[List[BrokenRef]]:
+    """This process's findings not collected yet; None when checking is off."""
+    if _active is None:
+        return None
+    return _active.take_updates()
+
+
+def collect(broken: Optional[List[BrokenRef]]) -> None:
+    """Merge findings from another (worker) process into this process's checker."""
+    if _active is not None and broken:
+        _active.broken.extend(broken)
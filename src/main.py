@@ -1,14 +1,42 @@
 #!/usr/bin/env python3
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import os
 from pathlib import Path
 import shutil
+import sys
+from typing import Callable, Dict, List, Mapping, Optional, Set, Tuple
+from urllib.parse import urlsplit
 
-from generate_page import generate_pages_recursive
+from build_manifest import BuildManifest, hash_file
+from deploy import DeployManifest
+from precompress import DEFAULT_LEVEL, DEFAULT_MIN_SIZE, Precompressor, format_bytes, remove_sidecars
+import image_size
+import link_check
+import profiling
+import render_cache
+import site_index
+from search_index import write_search_index
+from site_index import local_path, page_url
+from sitemap import FeedEntry, absolute_url, url_element, write_feed, write_sitemap_elements, write_sitemaps
+from generate_page import generate_pages, pages_from_inventory, render_code_hash
+from inventory import SourceFile, scan_tree, stat_index
+from sync_static import LINK_MODES, SyncResult, sync_tree
+from watch import watch
 
 PROJECT_ROOT = Path(__file__).resolve().parent.parent
 STATIC_DIR = PROJECT_ROOT / "static"
 CONTENT_DIR = PROJECT_ROOT / "content"
 PUBLIC_DIR = PROJECT_ROOT / "public"
 TEMPLATE_PATH = PROJECT_ROOT / "template.html"
+MANIFEST_PATH = PROJECT_ROOT / ".build-manifest.json"
+PROFILE_PATH = PROJECT_ROOT / "build-profile.json"
+BLOCK_CACHE_PATH = PROJECT_ROOT / ".block-cache.sqlite"
+DEPLOY_MANIFEST_PATH = PROJECT_ROOT / "deploy-manifest.json"
+SITE_INDEX_PATH = PROJECT_ROOT / ".site-index.sqlite"
+IMAGE_SIZES_PATH = PROJECT_ROOT / ".image-sizes.json"
+# the content/ section --feed publishes an Atom feed for
+FEED_SECTION = "blog"
 
 
 def remove_public(dest: Path) -> None:
@@ -19,28 +47,686 @@ def remove_public(dest: Path) -> None:
         print(f"No existing {dest} to remove")
 
 
-def copy_static(src: Path, dest: Path) -> None:
-    print(f"Copying from {src} --> {dest}")
-    shutil.copytree(src, dest)
-    print("Copy complete.")
+def sync_static(
+    src: Path, dest: Path, previous: List[str], verify_hash: bool, link: str, exclude: Set[str]
+) -> SyncResult:
+    print(f"Syncing {src} --> {dest}")
+    result = sync_tree(src, dest, previous, verify_hash=verify_hash, link=link, exclude=exclude)
+    print(
+        f"Static sync complete: copied {len(result.copied)}, "
+        f"unchanged {len(result.unchanged)}, removed {len(result.removed)}."
+    )
+    return result
 
 
-def main():
-    # 1) Remove and recreate public (clean build)
-    remove_public(PUBLIC_DIR)
+def remove_output(path: str) -> None:
+    print(f"Removing {path} (source deleted)")
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
 
-    # 2) Copy static into public
-    if STATIC_DIR.exists():
-        copy_static(STATIC_DIR, PUBLIC_DIR)
-    else:
-        PUBLIC_DIR.mkdir(parents=True, exist_ok=True)
 
-    # 3) Generate pages for every .md under content/ recursively
+def prune_empty_dirs(paths: List[str], root: Path) -> None:
+    """Remove the directories the given deleted files leave empty, up to (not including) root."""
+    for path in paths:
+        parent = Path(path).parent
+        while parent != root and root in parent.parents:
+            try:
+                parent.rmdir()
+            except OSError:
+                break
+            parent = parent.parent
+
+
+def build_pages(
+    pages: List[Tuple[str, str]],
+    template_path: Path,
+    manifest: BuildManifest,
+    jobs: int = 1,
+    stats: Optional[Mapping[str, Tuple[int, int]]] = None,
+    on_rendered: Optional[Callable[[str], None]] = None,
+) -> Tuple[List[Tuple[str, str]], List[str]]:
+    """
+    Render (from_path, dest_path) pages and record them in the build
+    manifest. Only pages whose source, template or generator code changed
+    since the manifest was written are rendered (an empty manifest renders
+    everything), and outputs whose source was deleted are removed.
+    jobs > 1 renders pages on a process pool. stats (from_path -> (size,
+    mtime_ns), from the content inventory) spares hashing unchanged sources.
+    on_rendered is called with the output path of each page as it is written.
+    With the site index enabled, up-to-date pages it has no current record
+    of are rendered too, so it always covers the whole site, and so are the
+    pages whose local assets changed since they were rendered; the index
+    remembers why each page was rendered, and forgets every page that is no
+    longer among pages. With link checking on, up-to-date pages are checked
+    from the links the index recorded for them.
+    Returns (errors, removed): (from_path, error) for pages that failed to
+    render, and the output paths that were deleted.
+    """
+    if stats is None:
+        stats = {}
+    template_hash = hash_file(template_path)
+    code_hash = render_code_hash()
+
+    reasons: Dict[str, str] = {}
+    stale, fresh, removed = manifest.plan(pages, template_hash, code_hash, stats, reasons)
+    manifest.begin(template_hash, code_hash)
+    index = site_index.active()
+    if index is not None:
+        indexed = index.hashes()
+        outdated = index.outdated()
+        for _, dest_path, src_hash in fresh:
+            if indexed.get(dest_path) != src_hash:
+                reasons[dest_path] = "not in the site index"
+            elif dest_path in outdated:
+                reasons[dest_path] = outdated[dest_path]
+        if len(reasons) > len(stale):
+            stale += [page for page in fresh if page[1] in reasons]
+            fresh = [page for page in fresh if page[1] not in reasons]
+
+    errors: List[Tuple[str, str]] = []
+    try:
+        for dest_path in removed:
+            remove_output(dest_path)
+            manifest.forget(dest_path)
+            site_index.forget(dest_path)
+
+        hashes = {dest_path: src_hash for _, dest_path, src_hash in stale}
+        work = [(from_path, dest_path) for from_path, dest_path, _ in stale]
+        for from_path, dest_path, error in generate_pages(work, str(template_path), jobs, hashes):
+            if error is None:
+                manifest.record(from_path, dest_path, hashes[dest_path], stats.get(from_path))
+                site_index.rebuilt(dest_path, reasons[dest_path])
+                if on_rendered is not None:
+                    on_rendered(dest_path)
+            else:
+                errors.append((from_path, error))
+                site_index.forget(dest_path)
+        if index is not None:
+            index.retain(dest_path for _, dest_path in pages)
+    finally:
+        manifest.save()
+        site_index.flush()
+
+    checker = link_check.active()
+    if checker is not None and fresh:
+        if index is not None:
+            records = {str(index.root / record.output): record for record in index.pages()}
+            for from_path, dest_path, _ in fresh:
+                if dest_path in records:
+                    checker.check_record(from_path, dest_path, records[dest_path])
+        else:
+            print(f"Links of the {len(fresh)} unchanged pages not checked; add --site-index to check them too.")
+
+    rebuilt = len(stale) - len(errors)
+    print(f"Rebuilt {rebuilt} pages, skipped {len(fresh)} unchanged, removed {len(removed)}.")
+    return errors, removed
+
+
+def precompress_outputs(
+    compressor: Precompressor, public: Path, static_files: Set[str], files: Optional[List[SourceFile]] = None
+) -> None:
+    """
+    Write the .gz sidecars not handed over during rendering and report the
+    savings. files limits the sweep to part of public/ (default: all of it).
+    """
+    compressor.sweep(scan_tree(public) if files is None else files, exclude=static_files)
+    result = compressor.finish()
+    print(
+        f"Precompressed {len(result.compressed)} files, {len(result.unchanged)} unchanged; "
+        f"gzip sidecars save {format_bytes(result.saved)} of {format_bytes(result.bytes_in)}."
+    )
+    for path, error in result.errors:
+        print(f"  could not compress {path}: {error}", file=sys.stderr)
+
+
+def write_sitemap(
+    pages: List[Tuple[str, str]], public: Path, base_url: str, stats: Mapping[str, Tuple[int, int]]
+) -> None:
+    """sitemap.xml listing every page, with its source's mtime as lastmod."""
+    urls = (
+        (absolute_url(base_url, page_url(Path(dest_path), public)), stats.get(from_path, (None, None))[1])
+        for from_path, dest_path in pages
+    )
+    files = write_sitemaps(urls, public, base_url)
+    print(f"Sitemap written: {len(pages)} URLs in {len(files)} file(s).")
+
+
+def write_section_feed(
+    index: site_index.SiteIndex,
+    public: Path,
+    section: str,
+    base_url: str,
+    stats: Mapping[str, Tuple[int, int]],
+    author: Optional[str] = None,
+) -> None:
+    """
+    Atom feed of the newest pages under public/<section>/, from the site
+    index, dated by source mtime. The author defaults to the site's name:
+    the title of its home page, or else the host of base_url.
+    """
+    section_dir = public / section
+    section_page = index.page(str(section_dir / "index.html"))
+    entries = (
+        FeedEntry(
+            absolute_url(base_url, page_url(index.root / record.output, public)),
+            record.title,
+            stats.get(str(index.root / record.source), (0, 0))[1],
+        )
+        for record in index.pages(Path(os.path.relpath(section_dir, index.root)).as_posix() + "/")
+        if record != section_page
+    )
+    feed = section_dir / "feed.xml"
+    title = section_page.title if section_page is not None else section
+    if author is None:
+        home = index.page(str(public / "index.html"))
+        author = home.title if home is not None else urlsplit(base_url).netloc
+    count = write_feed(entries, feed, absolute_url(base_url, page_url(feed, public)), title, author)
+    print(f"Feed written to {feed} with {count} entries.")
+
+
+def report_broken_links(broken: List[link_check.BrokenRef], total: Optional[int] = None) -> None:
+    # with total, broken holds the refs of the pages just rechecked and
+    # total counts those of the whole site
+    scope = "" if total is None else f" in the rechecked pages ({total} on the site)"
+    if not broken:
+        print(f"Link check: no broken internal links or images{scope}.")
+        return
+    print(f"{len(broken)} broken internal link(s) or image(s){scope}:", file=sys.stderr)
+    for ref in sorted(broken):
+        print(f"  {os.path.relpath(ref.source, PROJECT_ROOT)}:{ref.line}: {ref.kind} {ref.url}", file=sys.stderr)
+
+
+def why_rebuilt(index: site_index.SiteIndex, page: str) -> bool:
+    """Explain from the site index why a page (source, output path or URL) was last rendered."""
+    path = page
+    if page.startswith("/") and not os.path.exists(page):
+        path = str(PUBLIC_DIR / local_path(page, "/"))
+    info = index.why_rebuilt(os.path.abspath(path)) if index.path.exists() else None
+    if info is None:
+        print(f"{page} is not in the site index; build with --site-index first.", file=sys.stderr)
+        return False
+    deps = info["deps"]
+    print(f"{info['output']} (from {info['source']})")
+    print(f"  last rebuilt: {info['reason'] or 'unknown'}")
+    for label, targets in (
+        ("template", deps.get("template", [])),
+        ("assets", deps.get("asset", [])),
+        ("links to", deps.get("page", [])),
+        ("linked from", info["linked_from"]),
+    ):
+        print(f"  {label}: {', '.join(targets) if targets else '-'}")
+    return True
+
+
+def write_deploy_manifest(deploy: DeployManifest, public: Path) -> None:
+    """Record the hash and size of every file in public/ and what changed since the last build."""
+    delta = deploy.update(scan_tree(public))
+    deploy.save()
+    print(
+        f"Deploy manifest written to {deploy.path}: {len(delta.added)} added, "
+        f"{len(delta.changed)} changed, {len(delta.removed)} removed."
+    )
+
+
+def generated_files(args: argparse.Namespace) -> List[str]:
+    """The files (relative to public/) args have the build write besides pages and static files."""
+    return (["sitemap.xml"] if args.sitemap else []) + ([f"{FEED_SECTION}/feed.xml"] if args.feed else [])
+
+
+def publish_outputs(
+    args: argparse.Namespace,
+    deploy: DeployManifest,
+    pages: List[Tuple[str, str]],
+    stats: Mapping[str, Tuple[int, int]],
+    static_files: Set[str],
+    removed: List[str],
+    compressor: Optional[Precompressor] = None,
+) -> None:
+    """
+    Bring what is derived from the rendered pages up to date, as args ask:
+    the sidecars and empty directories of removed outputs, the search index,
+    sitemap, feed, .gz sidecars (compressor holds those queued during
+    rendering), deploy manifest and image size cache.
+    """
+    remove_sidecars(PUBLIC_DIR, [Path(os.path.relpath(path, PUBLIC_DIR)).as_posix() for path in removed], static_files)
+    prune_empty_dirs(removed, PUBLIC_DIR)
+
+    base_url = (args.base_url or "").rstrip("/")
+    if args.search:
+        searched = write_search_index(site_index.active(), PUBLIC_DIR)
+        print(
+            f"Search index: wrote {searched.written} shards, {searched.unchanged} unchanged, "
+            f"removed {searched.removed}."
+        )
+    if args.sitemap:
+        write_sitemap(pages, PUBLIC_DIR, base_url, stats)
+    if args.feed:
+        write_section_feed(site_index.active(), PUBLIC_DIR, FEED_SECTION, base_url, stats, args.feed_author)
+
+    if args.gzip:
+        if compressor is None:
+            compressor = Precompressor(
+                PUBLIC_DIR, deploy.files, args.gzip_level, args.gzip_min_size, previous_settings=deploy.gzip
+            )
+        precompress_outputs(compressor, PUBLIC_DIR, static_files)
+        deploy.gzip = compressor.settings()
+    elif deploy.gzip is not None:
+        # sidecars from an earlier --gzip build would go stale
+        remove_sidecars(PUBLIC_DIR, [rel for rel in deploy.files if rel + ".gz" in deploy.files], static_files)
+        deploy.gzip = None
+    write_deploy_manifest(deploy, PUBLIC_DIR)
+
+    if args.image_sizes:
+        image_size.active().save()
+
+
+def _inventory(paths: List[str]) -> List[SourceFile]:
+    """scan_tree(PUBLIC_DIR) entries for just these files and the .gz sidecars they have."""
+    files = []
+    for path in paths:
+        for name in (path, path + ".gz"):
+            try:
+                st = os.stat(name)
+            except FileNotFoundError:
+                continue
+            rel = Path(os.path.relpath(name, PUBLIC_DIR)).as_posix()
+            files.append(SourceFile(name, rel, st.st_size, st.st_mtime_ns))
+    return files
+
+
+class WatchRefresher:
+    """
+    --watch's follow-up to every rebuild (watch()'s on_rebuilt): brings what
+    publish_outputs() derives from the site up to date for the outputs the
+    rebuild wrote or removed, without scanning content/ or public/ again.
+
+    Source stats come from the watcher's snapshot. The sitemap's <url>
+    elements and the broken links of every page are kept between rebuilds,
+    so only those of the touched pages (and, for links, of the pages linking
+    to an output that came or went) are worked out again. The deploy
+    manifest is updated in memory, for the touched files alone; build()
+    saves it when watch mode stops.
+    """
+
+    def __init__(
+        self,
+        args: argparse.Namespace,
+        deploy: DeployManifest,
+        pages: List[Tuple[str, str]],
+        stats: Mapping[str, Tuple[int, int]],
+        broken: List[link_check.BrokenRef],
+    ):
+        self.args = args
+        self.deploy = deploy
+        self.base_url = (args.base_url or "").rstrip("/")
+        # page output -> its sitemap <url> element, in page order
+        self._sitemap: Dict[str, str] = {}
+        if args.sitemap:
+            for from_path, dest_path in pages:
+                self._sitemap[dest_path] = self._url_element(dest_path, stats.get(from_path))
+        # what links may point to (paths relative to public/), and the
+        # broken links of each page output
+        self._targets: Set[str] = set()
+        self._broken: Dict[str, List[link_check.BrokenRef]] = {}
+        if args.check_links:
+            outputs = {Path(os.path.relpath(dest, PUBLIC_DIR)).as_posix() for _, dest in pages}
+            self._targets = set(link_check.site_targets(outputs, STATIC_DIR, generated_files(args)))
+            dests = dict(pages)
+            for ref in broken:
+                self._broken.setdefault(dests[ref.source], []).append(ref)
+
+    def _url_element(self, dest_path: str, stat: Optional[Tuple[int, int]]) -> str:
+        loc = absolute_url(self.base_url, page_url(Path(dest_path), PUBLIC_DIR))
+        return url_element(loc, stat[1] if stat is not None else None)
+
+    def __call__(self, touched: List[str], static_files: Set[str], files: Mapping[str, Tuple[int, int]]) -> None:
+        args, deploy = self.args, self.deploy
+        rels = {path: Path(os.path.relpath(path, PUBLIC_DIR)).as_posix() for path in touched}
+        present = [path for path in touched if os.path.exists(path)]
+        removed = sorted(set(touched).difference(present))
+        # the touched page outputs, with their sources
+        pages: Dict[str, str] = {}
+        for path in present:
+            rel = Path(rels[path])
+            source = str(CONTENT_DIR / rel.with_suffix(".md"))
+            if rel.suffix == ".html" and source in files:
+                pages[path] = source
+
+        remove_sidecars(PUBLIC_DIR, [rels[path] for path in removed], static_files)
+        prune_empty_dirs(removed, PUBLIC_DIR)
+        # the files under public/ written below, and the recorded ones that
+        # may have been deleted
+        written = list(present)
+        stale = [rels[path] for path in removed]
+        stale += [rel + ".gz" for rel in stale]
+        if args.search:
+            searched = write_search_index(site_index.active(), PUBLIC_DIR)
+            print(
+                f"Search index: wrote {searched.written} shards, {searched.unchanged} unchanged, "
+                f"removed {searched.removed}."
+            )
+            written += [f.path for f in scan_tree(PUBLIC_DIR / "search") if not f.rel.endswith(".gz")]
+            stale += [rel for rel in deploy.files if rel.startswith("search/")]
+        if args.sitemap:
+            self._update_sitemap(pages, removed, files)
+            sitemaps = write_sitemap_elements(self._sitemap.values(), PUBLIC_DIR, self.base_url)
+            print(f"Sitemap written: {len(self._sitemap)} URLs in {len(sitemaps)} file(s).")
+            written += [str(path) for path in sitemaps]
+            # parts a smaller sitemap no longer needs were deleted
+            stale += [rel for rel in deploy.files if rel.startswith("sitemap-")]
+        if args.feed:
+            write_section_feed(site_index.active(), PUBLIC_DIR, FEED_SECTION, self.base_url, files, args.feed_author)
+            written.append(str(PUBLIC_DIR / FEED_SECTION / "feed.xml"))
+
+        inventory = _inventory(written)
+        if args.gzip:
+            compressor = Precompressor(
+                PUBLIC_DIR, deploy.files, args.gzip_level, args.gzip_min_size, previous_settings=deploy.gzip
+            )
+            precompress_outputs(compressor, PUBLIC_DIR, static_files, inventory)
+            deploy.gzip = compressor.settings()
+            inventory = _inventory(written)
+        delta = deploy.refresh(PUBLIC_DIR, [f.rel for f in inventory] + stale)
+        print(
+            f"Deploy manifest updated: {len(delta.added)} added, {len(delta.changed)} changed, "
+            f"{len(delta.removed)} removed since the last build."
+        )
+
+        if args.image_sizes:
+            image_size.active().save()
+        if args.check_links:
+            self._check_links(pages, {path: rels[path] for path in present}, {path: rels[path] for path in removed})
+
+    def _update_sitemap(
+        self, pages: Mapping[str, str], removed: List[str], files: Mapping[str, Tuple[int, int]]
+    ) -> None:
+        sitemap = self._sitemap
+        for path in removed:
+            sitemap.pop(path, None)
+        added = [path for path in pages if path not in sitemap]
+        for path, source in pages.items():
+            sitemap[path] = self._url_element(path, files.get(source))
+        if added:
+            # page order, as scan_tree sorts the sources: directory by directory
+            prefix = os.path.join(str(PUBLIC_DIR), "")
+            self._sitemap = dict(sorted(sitemap.items(), key=lambda item: item[0][len(prefix) :].split(os.sep)))
+
+    def _check_links(self, pages: Mapping[str, str], present: Mapping[str, str], removed: Mapping[str, str]) -> None:
+        # recheck the touched pages and the pages using an output that came or went
+        index = site_index.active()
+        moved = [rel for rel in present.values() if rel not in self._targets]
+        moved += [rel for rel in removed.values() if rel in self._targets]
+        self._targets.update(present.values())
+        self._targets.difference_update(removed.values())
+        for path in removed:
+            self._broken.pop(path, None)
+        recheck = dict(pages)
+        if moved:
+            used = [str(root / rel) for rel in moved for root in (PUBLIC_DIR, STATIC_DIR)]
+            recheck.update((dest, source) for source, dest in index.dependents(used) if os.path.exists(dest))
+        checker = link_check.LinkChecker(self._targets, PUBLIC_DIR)
+        rechecked: List[link_check.BrokenRef] = []
+        for dest_path, from_path in recheck.items():
+            record = index.page(dest_path)
+            found = checker.check_record(from_path, dest_path, record) if record is not None else []
+            if found:
+                self._broken[dest_path] = found
+            else:
+                self._broken.pop(dest_path, None)
+            rechecked += found
+        report_broken_links(rechecked, sum(map(len, self._broken.values())))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the static site into public/.")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="keep public/ and only re-render pages whose inputs changed since the last build",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="number of worker processes used to render pages (default: CPU count; 1 = serial)",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="after an incremental build, serve public/ with live reload and rebuild on every change",
+    )
+    parser.add_argument(
+        "--verify-hash",
+        action="store_true",
+        help="compare static files with the same size but a different mtime by content hash before copying",
+    )
+    parser.add_argument(
+        "--link",
+        choices=LINK_MODES,
+        default="copy",
+        help="how changed static files are placed in public/: copy (default), reflink or hardlink "
+        "(falls back to copy where unsupported)",
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const=str(PROFILE_PATH),
+        metavar="REPORT",
+        help=f"record per-stage timings for every page and write a JSON report (default: {PROFILE_PATH.name})",
+    )
+    parser.add_argument(
+        "--block-cache",
+        action="store_true",
+        help=f"reuse the rendered HTML of identical markdown blocks, within and across builds ({BLOCK_CACHE_PATH.name})",
+    )
+    parser.add_argument(
+        "--block-cache-size",
+        type=int,
+        default=render_cache.DEFAULT_DISK_BYTES >> 20,
+        metavar="MB",
+        help="evict the least recently used cached blocks beyond this size (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--site-index",
+        action="store_true",
+        help=(
+            f"keep every page's title, headings, word count, links and dependencies in an SQLite index "
+            f"({SITE_INDEX_PATH.name}); pages are then also rebuilt when a local asset they use changes"
+        ),
+    )
+    parser.add_argument(
+        "--search",
+        action="store_true",
+        help="publish a sharded full-text search index under public/search/ (implies --site-index)",
+    )
+    parser.add_argument(
+        "--image-sizes",
+        action="store_true",
+        help=(
+            "give <img> tags of local images width and height (read from the PNG, JPEG, GIF or WebP header, "
+            f"cached in {IMAGE_SIZES_PATH.name}) plus lazy, async loading (implies --site-index)"
+        ),
+    )
+    parser.add_argument(
+        "--check-links",
+        action="store_true",
+        help=(
+            "report internal links and images that point to no page or static file (exit status 1 if any); "
+            "with --incremental, unchanged pages are only checked with --site-index, "
+            "which --watch turns on to recheck the whole site after every rebuild"
+        ),
+    )
+    parser.add_argument(
+        "--why-rebuilt",
+        metavar="PAGE",
+        help="explain from the site index why PAGE (source, output or URL) was last rendered, then exit",
+    )
+    parser.add_argument(
+        "--base-url",
+        metavar="URL",
+        help="absolute URL the site is served from, e.g. https://example.com (needed by --sitemap and --feed)",
+    )
+    parser.add_argument(
+        "--sitemap",
+        action="store_true",
+        help="write sitemap.xml (split into parts of 50,000 URLs with an index when larger)",
+    )
+    parser.add_argument(
+        "--feed",
+        action="store_true",
+        help=f"write an Atom feed of the newest pages in {FEED_SECTION}/ (implies --site-index)",
+    )
+    parser.add_argument(
+        "--feed-author",
+        metavar="NAME",
+        help="author named in the --feed feed (default: the home page's title)",
+    )
+    parser.add_argument(
+        "--gzip",
+        action="store_true",
+        help="write a precompressed .gz sidecar next to every HTML, CSS and other text output",
+    )
+    parser.add_argument(
+        "--gzip-level",
+        type=int,
+        choices=range(1, 10),
+        default=DEFAULT_LEVEL,
+        metavar="1-9",
+        help="gzip compression level for --gzip (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--gzip-min-size",
+        type=int,
+        default=DEFAULT_MIN_SIZE,
+        metavar="BYTES",
+        help="only precompress files at least this large (default: %(default)s)",
+    )
+    parser.add_argument("--port", type=int, default=8888, help="port for --watch's dev server (default: 8888)")
+    args = parser.parse_args(argv)
+    if (args.sitemap or args.feed) and not args.base_url:
+        parser.error("--sitemap and --feed need --base-url")
+    try:
+        return build(args)
+    finally:
+        # write the pending blocks and index records and close both databases
+        render_cache.disable()
+        site_index.disable()
+
+
+def build(args: argparse.Namespace) -> int:
+    """Run a build (and --watch) with main()'s parsed arguments; returns the exit status."""
+    if args.watch:
+        args.incremental = True
+    if args.profile:
+        profiling.enable()
+    if args.block_cache:
+        render_cache.enable(BLOCK_CACHE_PATH, disk_bytes=args.block_cache_size << 20)
+    if args.why_rebuilt:
+        index = site_index.enable(SITE_INDEX_PATH, PROJECT_ROOT, public=PUBLIC_DIR, static=STATIC_DIR)
+        found = why_rebuilt(index, args.why_rebuilt)
+        site_index.disable()
+        return 0 if found else 1
+    if args.image_sizes:
+        image_size.enable(IMAGE_SIZES_PATH, STATIC_DIR)
+    if args.site_index or args.search or args.feed or args.image_sizes or (args.watch and args.check_links):
+        site_index.enable(SITE_INDEX_PATH, PROJECT_ROOT, search=args.search, public=PUBLIC_DIR, static=STATIC_DIR)
+
+    manifest = BuildManifest.load(MANIFEST_PATH) if args.incremental else BuildManifest(MANIFEST_PATH)
+    deploy = DeployManifest.load(DEPLOY_MANIFEST_PATH)
+    compressor = None
+    if args.gzip:
+        # compresses pages on its own process pool while the rest still render
+        compressor = Precompressor(
+            PUBLIC_DIR, deploy.files, args.gzip_level, args.gzip_min_size, args.jobs, deploy.gzip
+        )
+
+    # 1) Remove and recreate public (clean build); incremental builds keep it
+    if not args.incremental:
+        remove_public(PUBLIC_DIR)
+    PUBLIC_DIR.mkdir(parents=True, exist_ok=True)
+
     if CONTENT_DIR.exists():
-        generate_pages_recursive(str(CONTENT_DIR), str(TEMPLATE_PATH), str(PUBLIC_DIR))
+        sources = scan_tree(CONTENT_DIR, ".md")
     else:
         print(f"No content directory found at {CONTENT_DIR}. Nothing to generate.")
+        sources = []
+    pages = pages_from_inventory(sources, str(PUBLIC_DIR))
+    # generated pages win over static files with the same path
+    page_outputs = {Path(os.path.relpath(dest, PUBLIC_DIR)).as_posix() for _, dest in pages}
+    if args.check_links:
+        link_check.enable(link_check.site_targets(page_outputs, STATIC_DIR, generated_files(args)), PUBLIC_DIR)
+
+    with ThreadPoolExecutor(max_workers=1) as background:
+        # 2) Sync static into public in the background, overlapping with rendering
+        static_job = None
+        if STATIC_DIR.exists():
+            static_job = background.submit(
+                sync_static,
+                STATIC_DIR,
+                PUBLIC_DIR,
+                list(manifest.static),
+                args.verify_hash,
+                args.link,
+                page_outputs,
+            )
+
+        # 3) Generate pages for every .md under content/ recursively
+        stats = stat_index(sources)
+        errors, removed = build_pages(
+            pages,
+            TEMPLATE_PATH,
+            manifest,
+            args.jobs,
+            stats,
+            on_rendered=compressor.submit if compressor is not None else None,
+        )
+
+        if static_job is not None:
+            synced = static_job.result()
+            manifest.static = synced.files
+            removed = removed + [str(PUBLIC_DIR / rel) for rel in synced.removed]
+        manifest.save()
+    publish_outputs(args, deploy, pages, stats, set(manifest.static), removed, compressor)
+
+    if args.block_cache:
+        cache = render_cache.active()
+        evicted = cache.prune()
+        print(f"{render_cache.format_stats(cache.stats)}; evicted {evicted} entries.")
+
+    if args.profile:
+        report = profiling.write_report(Path(args.profile), profiling.take_pages() or [])
+        print(profiling.format_report(report))
+        print(f"Profile written to {args.profile}")
+
+    if errors:
+        print(f"{len(errors)} page(s) failed:", file=sys.stderr)
+        for from_path, error in errors:
+            print(f"  {from_path}: {error}", file=sys.stderr)
+    broken: List[link_check.BrokenRef] = []
+    if args.check_links:
+        broken = link_check.take_updates()
+        report_broken_links(broken)
+        link_check.disable()
+
+    # 4) Optionally keep serving and rebuilding, with the outputs above kept up to date
+    if args.watch:
+        watch(
+            CONTENT_DIR,
+            STATIC_DIR,
+            TEMPLATE_PATH,
+            PUBLIC_DIR,
+            MANIFEST_PATH,
+            port=args.port,
+            on_rebuilt=WatchRefresher(args, deploy, pages, stats, broken),
+        )
+        deploy.save()
+        print(f"Deploy manifest written to {deploy.path} with what changed while watching.")
+
+    return 1 if errors or broken else 0
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -1,13 +1,21 @@
-from typing import List
+from typing import Callable, Iterable, List, Optional, Tuple
 from textnode import TextNode, TextType
 from htmlnode import HTMLNode
 from leafnode import LeafNode
 from parentnode import ParentNode
-from markdown_blocks import markdown_to_blocks
-from block_types import block_to_block_type, BlockType
+import page_info
+import render_cache
+from block_scanner import Block, scan_blocks
+from block_types import BlockType
 from text_to_textnodes import text_to_textnodes
 from text_to_html import text_node_to_html_node
-import re
+from page_info import BlockInfo, PageRefs
+from patterns import NEWLINE_RUN_RE
+
+# set while build_with_info builds a block; text_to_children reports to it
+_info: Optional[BlockInfo] = None
+# set while a page is built for its links and images alone
+_refs: Optional[PageRefs] = None
 
 
 def text_to_children(text: str) -> List[HTMLNode]:
@@ -17,19 +25,30 @@ def text_to_children(text: str) -> List[HTMLNode]:
     are treated as single flow text for inline parsing.
     """
     # collapse internal newlines to single space and normalize whitespace around them
-    normalized = re.sub(r'\s*\n\s*', ' ', text).strip()
+    normalized = NEWLINE_RUN_RE.sub(' ', text).strip()
     nodes: List[HTMLNode] = []
     if normalized == "":
         return nodes
     text_nodes = text_to_textnodes(normalized)
+    if _info is not None:
+        _info.add(text_nodes)
+    if _refs is None or "](" not in normalized:
+        for tn in text_nodes:
+            nodes.append(text_node_to_html_node(tn))
+        return nodes
+    # every link and image has a "](": only text with one is walked for them,
+    # as its nodes are converted
     for tn in text_nodes:
+        if tn.url is not None:
+            refs = _refs.images if tn.text_type is TextType.IMAGE else _refs.links
+            refs.append((_refs.lineno, tn.url))
         nodes.append(text_node_to_html_node(tn))
     return nodes
 
 
-def _heading_node(block: str) -> HTMLNode:
+def _heading_node(lines: List[str]) -> HTMLNode:
     # count leading '#' characters on first line
-    line = block.splitlines()[0]
+    line = lines[0]
     i = 0
     while i < len(line) and line[i] == '#':
         i += 1
@@ -39,9 +58,8 @@ def _heading_node(block: str) -> HTMLNode:
     return ParentNode(f"h{level}", children)
 
 
-def _code_node(block: str) -> HTMLNode:
-    # preserve raw inner lines exactly (including their newlines)
-    lines = block.splitlines()
+def _code_node(lines: List[str]) -> HTMLNode:
+    # preserve raw inner lines exactly (including blank ones)
     if len(lines) >= 3:
         inner_lines = lines[1:-1]
     else:
@@ -53,8 +71,7 @@ def _code_node(block: str) -> HTMLNode:
     return ParentNode("pre", [code_leaf])
 
 
-def _quote_node(block: str) -> HTMLNode:
-    lines = block.splitlines()
+def _quote_node(lines: List[str]) -> HTMLNode:
     # remove leading '>' and optional space, then join lines with newline preserved
     stripped_lines = [line[1:].lstrip() if line.startswith(">") else line for line in lines]
     combined = "\n".join(stripped_lines)
@@ -72,8 +89,7 @@ def _quote_node(block: str) -> HTMLNode:
     return ParentNode("blockquote", children)
 
 
-def _unordered_list_node(block: str) -> HTMLNode:
-    lines = block.splitlines()
+def _unordered_list_node(lines: List[str]) -> HTMLNode:
     items: List[HTMLNode] = []
     for line in lines:
         item_text = line[2:] if line.startswith("- ") else line
@@ -83,8 +99,7 @@ def _unordered_list_node(block: str) -> HTMLNode:
     return ParentNode("ul", items)
 
 
-def _ordered_list_node(block: str) -> HTMLNode:
-    lines = block.splitlines()
+def _ordered_list_node(lines: List[str]) -> HTMLNode:
     items: List[HTMLNode] = []
     for line in lines:
         idx = line.find(". ")
@@ -98,41 +113,112 @@ def _ordered_list_node(block: str) -> HTMLNode:
     return ParentNode("ol", items)
 
 
-def _paragraph_node(block: str) -> HTMLNode:
+def _paragraph_node(lines: List[str]) -> HTMLNode:
     # paragraphs may include internal newlines; collapse them to spaces via text_to_children
-    children = text_to_children(block)
+    children = text_to_children("\n".join(lines))
     return ParentNode("p", children)
 
 
+_BUILDERS = {
+    BlockType.HEADING: _heading_node,
+    BlockType.CODE: _code_node,
+    BlockType.QUOTE: _quote_node,
+    BlockType.UNORDERED_LIST: _unordered_list_node,
+    BlockType.ORDERED_LIST: _ordered_list_node,
+    BlockType.PARAGRAPH: _paragraph_node,
+}
+
+
+def block_to_html_node(block: Block) -> HTMLNode:
+    """Build the HTMLNode for one scanned block."""
+    return _BUILDERS[block.type](block.lines)
+
+
+def build_with_info(block: Block) -> Tuple[HTMLNode, BlockInfo]:
+    """block_to_html_node, plus the BlockInfo gathered from the block's TextNodes."""
+    global _info
+    info = BlockInfo()
+    if block.type is BlockType.HEADING:
+        line = block.lines[0]
+        info.level = max(1, min(6, len(line) - len(line.lstrip("#"))))
+    _info = info
+    try:
+        node = block_to_html_node(block)
+    finally:
+        _info = None
+    return node, info
+
+
+def _build_for_cache(block: Block) -> Tuple[HTMLNode, str]:
+    node, info = build_with_info(block)
+    return node, info.to_json()
+
+
+def _refs_nodes(blocks: List[Block], refs: PageRefs) -> List[HTMLNode]:
+    # build blocks with only the page's links and images reported
+    global _refs
+    nodes = []
+    _refs = refs
+    try:
+        for block in blocks:
+            refs.lineno = block.lineno
+            nodes.append(_BUILDERS[block.type](block.lines))
+    finally:
+        _refs = None
+    return nodes
+
+
+def _block_nodes(blocks: List[Block]) -> List[HTMLNode]:
+    # cached blocks always carry their info, so a summarized page can use them
+    cache = render_cache.active()
+    summary = page_info.current()
+    if summary is None:
+        if cache is not None:
+            return [node for node, _ in cache.block_nodes(blocks, _build_for_cache)]
+        return [block_to_html_node(block) for block in blocks]
+    refs = summary.refs
+    if refs is not None and not summary.full and cache is None:
+        return _refs_nodes(blocks, refs)
+    if cache is not None:
+        entries = cache.block_nodes(blocks, _build_for_cache)
+        nodes = [node for node, _ in entries]
+        infos = [BlockInfo.from_json(info) for _, info in entries]
+    else:
+        nodes, infos = [], []
+        for block in blocks:
+            node, info = build_with_info(block)
+            nodes.append(node)
+            infos.append(info)
+    if summary.full:
+        summary.blocks.extend(infos)
+    if refs is not None:
+        for block, info in zip(blocks, infos):
+            refs.add_info(block.lineno, info)
+    return nodes
+
+
 def markdown_to_html_node(markdown: str) -> ParentNode:
     """
     Convert a full markdown document into a single parent HTMLNode (a div)
     containing child HTMLNodes for each block.
+    With the block cache enabled, each block is a raw leaf of its rendered HTML.
+    While a page is being summarized (page_info.begin), each block's
+    BlockInfo (or just its links and images) is added to it.
     """
-    root_children: List[HTMLNode] = []
-
-    blocks = markdown_to_blocks(markdown)
-    for block in blocks:
-        btype = block_to_block_type(block)
-
-        if btype == BlockType.HEADING:
-            node = _heading_node(block)
-
-        elif btype == BlockType.CODE:
-            node = _code_node(block)
-
-        elif btype == BlockType.QUOTE:
-            node = _quote_node(block)
-
-        elif btype == BlockType.UNORDERED_LIST:
-            node = _unordered_list_node(block)
+    return ParentNode("div", _block_nodes(scan_blocks(markdown)))
 
-        elif btype == BlockType.ORDERED_LIST:
-            node = _ordered_list_node(block)
 
-        else:  # paragraph or default
-            node = _paragraph_node(block)
-
-        root_children.append(node)
-
-    return ParentNode("div", root_children)
+def render_blocks_to(blocks: Iterable[Block], write: Callable[[str], object]) -> None:
+    """
+    Stream what markdown_to_html_node(...).to_html() would produce for these
+    blocks, building and writing one block at a time so only the current
+    block's nodes are ever held in memory.
+    """
+    write("<div>")
+    empty = True
+    for block in blocks:
+        _block_nodes([block])[0].render_to(write)
+        empty = False
+    if empty:
+        raise ValueError("ParentNode must have children")
+    write("</div>")
@@ -0,0 +1,171 @@
+import json
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from patterns import TERM_RE
+from textnode import TextNode, TextType
+
+# terms too common (or too short, or too long) to be worth a search posting
+STOP_WORDS = frozenset(
+    "a an and are as at be but by for from has have in is it its of on or that the this to was were with".split()
+)
+MIN_TERM = 2
+MAX_TERM = 32
+# heading words weigh this much more than body words in the search index
+HEADING_WEIGHT = 3
+
+
+# search index shards hold the terms sharing their first TERM_PREFIX characters
+TERM_PREFIX = 2
+
+
+def term_shard(term: str) -> str:
+    """Name of the search index shard holding term: its prefix as UTF-8 hex, so any script is a safe file name."""
+    return term[:TERM_PREFIX].encode("utf-8").hex()
+
+
+def search_terms(text: str) -> List[str]:
+    """The lowercased search terms in text, in order."""
+    return [
+        term
+        for term in TERM_RE.findall(text.lower())
+        if MIN_TERM <= len(term) <= MAX_TERM and term not in STOP_WORDS
+    ]
+
+
+class BlockInfo:
+    """
+    What the site and search indexes need to know about one block, gathered
+    from the TextNodes text_to_children produces while the block is built. It is
+    cached with the block's HTML (as JSON), so a cache hit still has it.
+    """
+
+    __slots__ = ("level", "text", "words", "links", "images", "terms")
+
+    def __init__(
+        self,
+        level: int = 0,
+        text: str = "",
+        words: int = 0,
+        links: Optional[List[str]] = None,
+        images: Optional[List[str]] = None,
+        terms: Optional[Dict[str, int]] = None,
+    ):
+        # heading level (0 for other blocks) and, for headings, their plain text
+        self.level = level
+        self.text = text
+        self.words = words
+        self.links = links if links is not None else []
+        self.images = images if images is not None else []
+        # search term -> weight
+        self.terms = terms if terms is not None else {}
+
+    def add(self, nodes: Iterable[TextNode]) -> None:
+        weight = HEADING_WEIGHT if self.level else 1
+        terms = self.terms
+        for node in nodes:
+            if node.text_type is TextType.IMAGE:
+                self.images.append(node.url)
+                continue
+            self.words += len(node.text.split())
+            for term in search_terms(node.text):
+                terms[term] = terms.get(term, 0) + weight
+            if node.text_type is TextType.LINK:
+                self.links.append(node.url)
+            if self.level:
+                self.text += node.text
+
+    def to_json(self) -> str:
+        return json.dumps(
+            [self.level, self.text, self.words, self.links, self.images, self.terms], separators=(",", ":")
+        )
+
+    @classmethod
+    def from_json(cls, data: str) -> "BlockInfo":
+        return cls(*json.loads(data))
+
+    def __eq__(self, other):
+        return isinstance(other, BlockInfo) and all(getattr(self, s) == getattr(other, s) for s in self.__slots__)
+
+    def __repr__(self):
+        return f"BlockInfo({', '.join(f'{s}={getattr(self, s)!r}' for s in self.__slots__)})"
+
+
+class PageRefs:
+    """
+    The links and images of a page as (first line of their block, URL) pairs:
+    all a link check needs. markdown_to_html notes them as it converts the
+    TextNodes, without the cost of a BlockInfo per block.
+    """
+
+    __slots__ = ("lineno", "links", "images")
+
+    def __init__(self):
+        # first line of the block being built
+        self.lineno = 0
+        self.links: List[Tuple[int, str]] = []
+        self.images: List[Tuple[int, str]] = []
+
+    def add_info(self, lineno: int, info: BlockInfo) -> None:
+        """Take the links and images of a block built (or cached) with its BlockInfo."""
+        self.links += [(lineno, url) for url in info.links]
+        self.images += [(lineno, url) for url in info.images]
+
+
+class PageSummary:
+    """
+    The title and block infos of the page being rendered. Unless full, the
+    block infos are skipped; with refs, the page's links and images are also
+    kept with their line numbers.
+    """
+
+    __slots__ = ("title", "blocks", "full", "refs")
+
+    def __init__(self, full: bool = True, refs: bool = False):
+        self.title = ""
+        self.blocks: List[BlockInfo] = []
+        self.full = full
+        self.refs: Optional[PageRefs] = PageRefs() if refs else None
+
+    def headings(self) -> List[Tuple[int, str]]:
+        return [(block.level, block.text) for block in self.blocks if block.level]
+
+    def words(self) -> int:
+        return sum(block.words for block in self.blocks)
+
+    def links(self) -> List[str]:
+        return [url for block in self.blocks for url in block.links]
+
+    def images(self) -> List[str]:
+        return [url for block in self.blocks for url in block.images]
+
+    def terms(self) -> Dict[str, int]:
+        total: Counter = Counter()
+        for block in self.blocks:
+            total.update(block.terms)
+        return dict(total)
+
+
+# the page markdown_to_html_node and the page writers report to, if any
+_current: Optional[PageSummary] = None
+
+
+def begin(full: bool = True, refs: bool = False) -> PageSummary:
+    """Start summarizing the page about to be rendered in this process."""
+    global _current
+    _current = PageSummary(full, refs)
+    return _current
+
+
+def end() -> None:
+    global _current
+    _current = None
+
+
+def current() -> Optional[PageSummary]:
+    return _current
+
+
+def note_title(title: str) -> None:
+    if _current is not None:
+        _current.title = title
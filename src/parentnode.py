@@ -1,7 +1,10 @@
+import io
 from htmlnode import HTMLNode
 
 
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag: str, children: list, props=None):
         """
         A parent node must have:
@@ -12,11 +15,20 @@ class ParentNode(HTMLNode):
         super().__init__(tag=tag, value=None, children=children, props=props)
 
     def to_html(self) -> str:
+        # Stream every chunk of the tree into one buffer instead of building
+        # (and copying) a string per nesting level.
+        buf = io.StringIO()
+        self._render(buf.write)
+        return buf.getvalue()
+
+    def _render(self, write) -> None:
         if self.tag is None:
             raise ValueError("ParentNode must have a tag")
         if not self.children:
             raise ValueError("ParentNode must have children")
 
+        write(f"<{self.tag}{self.props_to_html()}>")
         # Recursively render children
-        inner_html = "".join(child.to_html() for child in self.children)
-        return f"<{self.tag}{self.props_to_html()}>{inner_html}</{self.tag}>"
+        for child in self.children:
+            child._render(write)
+        write(f"</{self.tag}>")
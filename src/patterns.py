@@ -0,0 +1,36 @@
+# Precompiled regular expressions shared by every parser stage.
+# Hot loops call these pattern objects directly instead of re.match/re.sub,
+# which look the pattern up in the re module's bounded cache on every call
+# (and recompile it once other patterns have evicted it).
+import re
+
+# --- block level -----------------------------------------------------------
+
+# heading: 1-6 '#' followed by at least one space and text
+HEADING_RE = re.compile(r"^(#{1,6})\s+\S")
+
+# ordered list item: "<number>. " at the start of a line
+ORDERED_ITEM_RE = re.compile(r"^(\d+)\.\s+")
+
+# a newline together with the whitespace around it (collapsed to one space)
+NEWLINE_RUN_RE = re.compile(r"\s*\n\s*")
+
+# --- inline level ----------------------------------------------------------
+
+# ![alt text](url)
+IMAGE_RE = re.compile(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)")
+
+# [anchor text](url), but not the tail of an image (which starts with !)
+LINK_RE = re.compile(r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)")
+
+# ![alt](url) or [anchor](url). The image alternative is tried first at every
+# position, so a link is never matched where an image starts.
+IMAGE_OR_LINK_RE = re.compile(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)|\[([^\[\]]*)\]\(([^\(\)]*)\)")
+
+# inline emphasis delimiters: `code`, **bold**, _italic_
+DELIMITER_RE = re.compile(r"`|\*\*|_")
+
+# --- search ----------------------------------------------------------------
+
+# a search term: a run of letters and digits (underscores split terms)
+TERM_RE = re.compile(r"[^\W_]+")
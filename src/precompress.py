@@ -0,0 +1,228 @@
+import gzip
+import multiprocessing
+import os
+import shutil
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import AbstractSet, Dict, Iterable, List, Mapping, Optional, Tuple, Union
+
+from build_manifest import hash_file
+from inventory import SourceFile
+
+# text formats a static server can send precompressed
+COMPRESSIBLE = frozenset(
+    {".html", ".htm", ".css", ".js", ".mjs", ".json", ".map", ".xml", ".svg", ".txt", ".md", ".webmanifest"}
+)
+DEFAULT_LEVEL = 9
+# smaller files gain too little to be worth a second request path
+DEFAULT_MIN_SIZE = 1024
+
+# the pool runs while rendering and the static sync use threads, so its
+# workers come from a server process rather than a fork of this one
+POOL_CONTEXT = multiprocessing.get_context(
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+
+# outcomes of _compress_task
+COMPRESSED, UNCHANGED, SKIPPED = "compressed", "unchanged", "skipped"
+
+
+def is_compressible(path: str, size: int, min_size: int) -> bool:
+    return size >= min_size and os.path.splitext(path)[1].lower() in COMPRESSIBLE
+
+
+def gzip_file(path: str, level: int = DEFAULT_LEVEL) -> Tuple[int, int]:
+    """
+    Write path + ".gz" next to path and return (original bytes, sidecar bytes).
+    The gzip header carries no name or timestamp, so equal inputs give equal
+    sidecars. When compression does not make the file smaller no sidecar is
+    kept, and the sidecar size reported is the original size.
+    """
+    sidecar = path + ".gz"
+    directory, name = os.path.split(path)
+    tmp = os.path.join(directory, f".{name}.gz.tmp")
+    try:
+        with open(path, "rb") as src, open(tmp, "wb") as raw:
+            with gzip.GzipFile(filename="", mode="wb", compresslevel=level, fileobj=raw, mtime=0) as out:
+                shutil.copyfileobj(src, out, 1 << 16)
+            size = src.tell()
+            compressed = raw.tell()
+        if compressed >= size:
+            os.unlink(tmp)
+            _unlink(sidecar)
+            return size, size
+        os.replace(tmp, sidecar)
+        return size, compressed
+    except BaseException:
+        _unlink(tmp)
+        raise
+
+
+def _unlink(path: str) -> None:
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+def _compress_task(path: str, level: int, recorded_hash: Optional[str]) -> Tuple[str, int, int]:
+    # runs on the pool: a file rewritten with the bytes it was compressed
+    # from last time keeps its sidecar
+    if recorded_hash is not None and os.path.exists(path + ".gz") and hash_file(path) == recorded_hash:
+        return UNCHANGED, os.path.getsize(path), os.path.getsize(path + ".gz")
+    size, compressed = gzip_file(path, level)
+    return (COMPRESSED if compressed < size else SKIPPED), size, compressed
+
+
+class PrecompressResult:
+    def __init__(self):
+        self.compressed: List[str] = []
+        self.unchanged: List[str] = []
+        # original and sidecar bytes of every file that has a sidecar
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.errors: List[Tuple[str, str]] = []
+
+    @property
+    def saved(self) -> int:
+        return self.bytes_in - self.bytes_out
+
+    def __repr__(self):
+        return (
+            f"PrecompressResult(compressed={len(self.compressed)}, unchanged={len(self.unchanged)}, "
+            f"saved={self.saved})"
+        )
+
+
+class Precompressor:
+    """
+    Writes .gz sidecars for the compressible files of an output tree on a
+    process pool of `jobs` workers (inline for jobs <= 1), so pages can be
+    handed over as soon as they are rendered.
+
+    previous is the deploy manifest of the last build (rel -> hash, size,
+    mtime_ns). A file whose size and mtime match its record and whose
+    sidecar exists is skipped without being read; one whose stat changed is
+    hashed on the pool and only recompressed if its content did. Changing
+    level or min_size (previous_settings) recompresses everything.
+    """
+
+    def __init__(
+        self,
+        root,
+        previous: Mapping[str, Mapping[str, object]],
+        level: int = DEFAULT_LEVEL,
+        min_size: int = DEFAULT_MIN_SIZE,
+        jobs: int = 1,
+        previous_settings: Optional[Mapping[str, int]] = None,
+    ):
+        self.root = os.fspath(root)
+        self.level = level
+        self.min_size = min_size
+        self._previous = previous if previous_settings == self.settings() else {}
+        self._pool = ProcessPoolExecutor(max_workers=jobs, mp_context=POOL_CONTEXT) if jobs > 1 else None
+        self._tasks: Dict[str, Union[Future, Tuple[str, int, int], BaseException]] = {}
+        self.result = PrecompressResult()
+
+    def settings(self) -> Dict[str, int]:
+        return {"level": self.level, "min_size": self.min_size}
+
+    def _rel(self, path: str) -> str:
+        return os.path.relpath(path, self.root).replace(os.sep, "/")
+
+    def _fresh(self, rel: str, size: int, mtime_ns: int, sidecar_exists: bool) -> bool:
+        entry = self._previous.get(rel)
+        return sidecar_exists and entry is not None and [entry.get("size"), entry.get("mtime_ns")] == [size, mtime_ns]
+
+    def submit(self, path: str) -> None:
+        """Queue one output file, e.g. a page that was just written."""
+        if path in self._tasks:
+            return
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return
+        if not is_compressible(path, st.st_size, self.min_size):
+            return
+        rel = self._rel(path)
+        if self._fresh(rel, st.st_size, st.st_mtime_ns, os.path.exists(path + ".gz")):
+            self._tasks[path] = (UNCHANGED, st.st_size, os.path.getsize(path + ".gz"))
+            return
+        self._start(path, rel)
+
+    def sweep(self, files: Iterable[SourceFile], exclude: AbstractSet[str] = frozenset()) -> None:
+        """
+        Queue every compressible file of an inventory of the output tree that
+        was not submitted yet. exclude lists paths (relative to root) owned by
+        someone else, such as a .gz mirrored from static/, which are never
+        overwritten by a sidecar.
+        """
+        files = list(files)
+        present = {f.rel for f in files}
+        for f in files:
+            sidecar = f.rel + ".gz"
+            if f.path in self._tasks or sidecar in exclude or not is_compressible(f.rel, f.size, self.min_size):
+                continue
+            if self._fresh(f.rel, f.size, f.mtime_ns, sidecar in present):
+                sidecar_size = os.path.getsize(f.path + ".gz")
+                self._tasks[f.path] = (UNCHANGED, f.size, sidecar_size)
+            else:
+                self._start(f.path, f.rel)
+
+    def _start(self, path: str, rel: str) -> None:
+        entry = self._previous.get(rel)
+        recorded = entry.get("hash") if entry is not None else None
+        if self._pool is not None:
+            self._tasks[path] = self._pool.submit(_compress_task, path, self.level, recorded)
+            return
+        try:
+            self._tasks[path] = _compress_task(path, self.level, recorded)
+        except Exception as e:
+            self._tasks[path] = e
+
+    def finish(self) -> PrecompressResult:
+        """Wait for every queued file and shut the pool down."""
+        result = self.result
+        try:
+            for path, task in sorted(self._tasks.items()):
+                try:
+                    if isinstance(task, BaseException):
+                        raise task
+                    outcome, size, compressed = task.result() if isinstance(task, Future) else task
+                except Exception as e:
+                    result.errors.append((path, f"{type(e).__name__}: {e}"))
+                    continue
+                if outcome == SKIPPED:
+                    continue
+                (result.compressed if outcome == COMPRESSED else result.unchanged).append(self._rel(path))
+                result.bytes_in += size
+                result.bytes_out += compressed
+        finally:
+            if self._pool is not None:
+                self._pool.shutdown()
+        self._tasks.clear()
+        return result
+
+
+def remove_sidecars(root, rels: Iterable[str], exclude: AbstractSet[str] = frozenset()) -> List[str]:
+    """
+    Delete the .gz sidecar of each given path (relative to root), except
+    sidecars listed in exclude. Returns the sidecars that were removed.
+    """
+    removed = []
+    for rel in rels:
+        sidecar = rel + ".gz"
+        if sidecar in exclude:
+            continue
+        path = os.path.join(os.fspath(root), *sidecar.split("/"))
+        if os.path.exists(path):
+            _unlink(path)
+            removed.append(sidecar)
+    return removed
+
+
+def format_bytes(n: int) -> str:
+    for unit in ("B", "KB", "MB"):
+        if abs(n) < 1024:
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+    return f"{n:.1f} GB"
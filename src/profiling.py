@@ -0,0 +1,201 @@
+import functools
+import importlib
+import json
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from deploy import write_if_changed
+from htmlnode import HTMLNode
+from template import Template
+
+# Build stages in pipeline order, with the (module, function name) that is
+# timed for each. Instrumentation is installed by replacing those module
+# attributes with timing wrappers, so a build without --profile runs the
+# original functions with no hooks at all.
+STAGES: List[Tuple[str, str, str]] = [
+    ("read", "generate_page", "read_source"),
+    ("block_split", "markdown_to_html", "scan_blocks"),
+    ("block_classify", "block_scanner", "block_type_from_lines"),
+    ("inline_parse", "markdown_to_html", "text_to_textnodes"),
+    ("tree_build", "generate_page", "markdown_to_html_node"),
+]
+# rendering, template substitution and the write are streamed together in
+# generate_page.write_page; profiled builds run them as separate steps
+WRITE_STAGES = ["render", "template", "write"]
+STAGE_NAMES = [name for name, _, _ in STAGES] + WRITE_STAGES
+
+PageRecord = Dict[str, Any]
+
+
+class Profiler:
+    """
+    Collects per-page stage timings. Every stage records *self* time: time spent
+    in nested stages (e.g. inline parsing inside tree building) is attributed
+    only to the innermost one, so the stages of a page add up to its total.
+    """
+
+    def __init__(self):
+        self.pages: List[PageRecord] = []
+        self._page: Optional[Dict[str, List[float]]] = None
+        # accumulated child time for each open stage
+        self._children: List[float] = []
+
+    def timed(self, name: str, fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            stages = self._page
+            if stages is None:
+                return fn(*args, **kwargs)
+            self._children.append(0.0)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                child = self._children.pop()
+                stat = stages.setdefault(name, [0.0, 0])
+                stat[0] += elapsed - child
+                stat[1] += 1
+                if self._children:
+                    self._children[-1] += elapsed
+
+        return wrapper
+
+    def page(self, fn: Callable) -> Callable:
+        """Wrap generate_page so each call opens a new page record."""
+
+        @functools.wraps(fn)
+        def wrapper(from_path, template_path, dest_path):
+            self._page = {}
+            start = time.perf_counter()
+            try:
+                return fn(from_path, template_path, dest_path)
+            finally:
+                total = time.perf_counter() - start
+                stages, self._page = self._page, None
+                self._children.clear()
+                self.pages.append(
+                    {
+                        "page": str(from_path),
+                        "total": total,
+                        "stages": {name: {"seconds": s, "calls": int(c)} for name, (s, c) in stages.items()},
+                    }
+                )
+
+        return wrapper
+
+    def write_page(self, dest_path: str, template: Template, title: str, root: HTMLNode) -> None:
+        """Profiled generate_page.write_page: render, fill the template, then write."""
+        html = self.timed("render", root.to_html)()
+        page = self.timed("template", template.render)({"Title": title, "Content": html})
+
+        def write():
+            Path(dest_path).parent.mkdir(parents=True, exist_ok=True)
+            write_if_changed(dest_path, page.encode("utf-8"))
+
+        self.timed("write", write)()
+
+
+_active: Optional[Profiler] = None
+_originals: List[Tuple[Any, str, Any]] = []
+
+
+def enable() -> Profiler:
+    """Install the timing wrappers in this process (idempotent) and return the profiler."""
+    global _active
+    if _active is not None:
+        return _active
+    profiler = Profiler()
+    # imported here: generate_page itself imports this module
+    generate_page = importlib.import_module("generate_page")
+    for name, module_name, attr in STAGES:
+        module = importlib.import_module(module_name)
+        original = getattr(module, attr)
+        _originals.append((module, attr, original))
+        setattr(module, attr, profiler.timed(name, original))
+    for module, attr, replacement in (
+        (generate_page, "write_page", profiler.write_page),
+        (generate_page, "generate_page", profiler.page(generate_page.generate_page)),
+    ):
+        _originals.append((module, attr, getattr(module, attr)))
+        setattr(module, attr, replacement)
+    _active = profiler
+    return profiler
+
+
+def disable() -> None:
+    """Remove the timing wrappers."""
+    global _active
+    while _originals:
+        module, attr, original = _originals.pop()
+        setattr(module, attr, original)
+    _active = None
+
+
+def is_enabled() -> bool:
+    return _active is not None
+
+
+def take_pages() -> Optional[List[PageRecord]]:
+    """Hand over (and forget) the page records collected in this process; None when profiling is off."""
+    if _active is None:
+        return None
+    pages, _active.pages = _active.pages, []
+    return pages
+
+
+def collect(pages: Optional[List[PageRecord]]) -> None:
+    """Merge page records produced in another (worker) process into this process's profiler."""
+    if _active is not None and pages:
+        _active.pages.extend(pages)
+
+
+def build_report(pages: List[PageRecord]) -> Dict[str, Any]:
+    aggregate: Dict[str, Dict[str, float]] = {
+        name: {"seconds": 0.0, "calls": 0} for name in STAGE_NAMES
+    }
+    other = 0.0
+    for record in pages:
+        accounted = 0.0
+        for name, stat in record["stages"].items():
+            agg = aggregate.setdefault(name, {"seconds": 0.0, "calls": 0})
+            agg["seconds"] += stat["seconds"]
+            agg["calls"] += stat["calls"]
+            accounted += stat["seconds"]
+        other += max(0.0, record["total"] - accounted)
+    aggregate["other"] = {"seconds": other, "calls": len(pages)}
+    return {
+        "pages_profiled": len(pages),
+        "total_seconds": sum(record["total"] for record in pages),
+        "aggregate": aggregate,
+        "pages": sorted(pages, key=lambda record: record["total"], reverse=True),
+    }
+
+
+def format_report(report: Dict[str, Any], slowest: int = 20) -> str:
+    """Human-readable summary: aggregate stage times and the slowest pages."""
+    lines = [f"Profiled {report['pages_profiled']} pages in {report['total_seconds']:.3f} s of page time"]
+    total = report["total_seconds"] or 1.0
+    lines.append(f"  {'stage':<16} {'seconds':>9} {'share':>7} {'calls':>9}")
+    for name, stat in report["aggregate"].items():
+        lines.append(
+            f"  {name:<16} {stat['seconds']:>9.4f} {stat['seconds'] / total:>7.1%} {int(stat['calls']):>9}"
+        )
+
+    lines.append("")
+    lines.append(f"Slowest {min(slowest, len(report['pages']))} pages (ms):")
+    header = f"  {'total':>8} " + " ".join(f"{name[:8]:>8}" for name in STAGE_NAMES) + "  page"
+    lines.append(header)
+    for record in report["pages"][:slowest]:
+        cells = " ".join(
+            f"{record['stages'].get(name, {}).get('seconds', 0.0) * 1000:>8.2f}" for name in STAGE_NAMES
+        )
+        lines.append(f"  {record['total'] * 1000:>8.2f} {cells}  {record['page']}")
+    return "\n".join(lines)
+
+
+def write_report(path: Path, pages: List[PageRecord]) -> Dict[str, Any]:
+    report = build_report(pages)
+    Path(path).write_text(json.dumps(report, indent=1), encoding="utf-8")
+    return report
@@ -0,0 +1,309 @@
+import hashlib
+import os
+import sqlite3
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import image_size
+from block_scanner import Block
+from build_manifest import generator_code_hash
+from htmlnode import HTMLNode
+from leafnode import LeafNode
+
+DEFAULT_MEMORY_BYTES = 32 << 20
+DEFAULT_DISK_BYTES = 256 << 20
+
+STAT_KEYS = ("memory_hits", "disk_hits", "misses")
+
+# bump whenever the blocks table changes; older databases are recreated
+SCHEMA_VERSION = 2
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS blocks (
+    key BLOB PRIMARY KEY,
+    html TEXT NOT NULL,
+    info TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    used INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS blocks_used ON blocks (used);
+"""
+
+# (rendered HTML, BlockInfo JSON) of one block
+Entry = Tuple[str, str]
+
+# SQLite caps the number of bound parameters per statement
+_LOOKUP_BATCH = 500
+# pending disk writes that trigger a flush when collected
+FLUSH_BATCH = 2000
+
+
+class RenderCache:
+    """
+    Rendered HTML of single markdown blocks, with the BlockInfo gathered while
+    they were built, keyed by a hash of the block's lines and the generator
+    version (its code hash), so a parser change never serves stale fragments.
+
+    Fragments are kept in an in-memory LRU of about memory_bytes characters
+    and, when path is given, in an SQLite database shared by later builds and
+    by worker processes. Disk lookups are batched per page. New entries and
+    the recency of disk hits are only written by flush(): workers hand them
+    to the main process with their results (take_updates/collect), which
+    writes them in large transactions. prune() trims the database to
+    disk_bytes of HTML by deleting the least recently used entries.
+    """
+
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        memory_bytes: int = DEFAULT_MEMORY_BYTES,
+        disk_bytes: int = DEFAULT_DISK_BYTES,
+        version: Optional[str] = None,
+    ):
+        self.path = Path(path) if path is not None else None
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self.version = version if version is not None else generator_code_hash()
+        self._prefix = hashlib.sha256(self.version.encode("utf-8") + b"\0")
+        self._memory: "OrderedDict[bytes, Entry]" = OrderedDict()
+        self._memory_size = 0
+        # disk writes not flushed yet: new entries and keys read from disk
+        self._pending: Dict[bytes, Entry] = {}
+        self._touched: List[bytes] = []
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_pid = 0
+        self.stats: Dict[str, int] = dict.fromkeys(STAT_KEYS, 0)
+
+    def config(self) -> Tuple[Optional[Path], int, int, str]:
+        """Arguments that recreate this cache (minus its contents) in a worker process."""
+        return self.path, self.memory_bytes, self.disk_bytes, self.version
+
+    def key(self, lines: List[str], extra: bytes = b"") -> bytes:
+        h = self._prefix.copy()
+        h.update("\n".join(lines).encode("utf-8"))
+        h.update(extra)
+        return h.digest()
+
+    def _connect(self) -> sqlite3.Connection:
+        # a connection must not be shared with a forked worker
+        if self._db is None or self._db_pid != os.getpid():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(self.path, timeout=60)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            if db.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+                with db:
+                    db.execute("DROP TABLE IF EXISTS blocks")
+                    db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            db.executescript(_SCHEMA)
+            self._db, self._db_pid = db, os.getpid()
+        return self._db
+
+    def get(self, key: bytes) -> Optional[str]:
+        entry = self.get_many([key])[0]
+        return entry[0] if entry is not None else None
+
+    def get_many(self, keys: Sequence[bytes]) -> List[Optional[Entry]]:
+        """Look several keys up at once: memory first, then one disk query for the rest."""
+        found: List[Optional[Entry]] = [None] * len(keys)
+        missing: Dict[bytes, List[int]] = {}
+        for i, key in enumerate(keys):
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                found[i] = entry
+            elif key in self._pending:
+                self.stats["memory_hits"] += 1
+                found[i] = self._pending[key]
+            else:
+                missing.setdefault(key, []).append(i)
+        if missing and self.path is not None:
+            db = self._connect()
+            wanted = list(missing)
+            for start in range(0, len(wanted), _LOOKUP_BATCH):
+                batch = wanted[start : start + _LOOKUP_BATCH]
+                marks = ",".join("?" * len(batch))
+                for key, html, info in db.execute(
+                    f"SELECT key, html, info FROM blocks WHERE key IN ({marks})", batch
+                ):
+                    entry = (html, info)
+                    self._remember(key, entry)
+                    self._touched.append(key)
+                    for n, i in enumerate(missing.pop(key)):
+                        self.stats["disk_hits" if n == 0 else "memory_hits"] += 1
+                        found[i] = entry
+        # repeats of a missing key are served by whatever fills in the first one
+        self.stats["misses"] += len(missing)
+        self.stats["memory_hits"] += sum(len(indexes) - 1 for indexes in missing.values())
+        return found
+
+    def put(self, key: bytes, html: str, info: str = "") -> None:
+        entry = (html, info)
+        self._remember(key, entry)
+        if self.path is not None:
+            self._pending[key] = entry
+
+    def _remember(self, key: bytes, entry: Entry) -> None:
+        size = len(entry[0]) + len(entry[1])
+        if size > self.memory_bytes:
+            return
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._memory_size -= len(old[0]) + len(old[1])
+        self._memory[key] = entry
+        self._memory_size += size
+        while self._memory_size > self.memory_bytes:
+            _, (html, info) = self._memory.popitem(last=False)
+            self._memory_size -= len(html) + len(info)
+
+    def block_nodes(
+        self, blocks: Sequence[Block], build: Callable[[Block], Tuple[HTMLNode, str]]
+    ) -> List[Tuple[HTMLNode, str]]:
+        """
+        A (node, info) pair per block: its cached HTML as a raw leaf, or
+        build() the (node, info JSON) and cache the node's HTML with the info.
+        """
+        sizes = image_size.active()
+        if sizes is None:
+            keys = [self.key(block.lines) for block in blocks]
+        else:
+            # the HTML of a block with images also depends on their sizes
+            keys = [self.key(block.lines, sizes.key(block.lines)) for block in blocks]
+        nodes: List[Tuple[HTMLNode, str]] = []
+        for block, key, entry in zip(blocks, keys, self.get_many(keys)):
+            if entry is None:
+                entry = self._memory.get(key, self._pending.get(key))
+            if entry is None:
+                node, info = build(block)
+                entry = (node.to_html(), info)
+                self.put(key, *entry)
+            nodes.append((LeafNode(None, entry[0]), entry[1]))
+        return nodes
+
+    def take_updates(self) -> Dict[str, object]:
+        """Hand over (and reset) hit/miss counts and the disk writes not flushed yet."""
+        updates = {"stats": self.stats, "entries": self._pending, "touched": self._touched}
+        self.stats = dict.fromkeys(STAT_KEYS, 0)
+        self._pending, self._touched = {}, []
+        return updates
+
+    def merge(self, updates: Dict[str, object]) -> None:
+        """Take over updates from take_updates (e.g. from a worker); flushes once enough piled up."""
+        for name, count in updates["stats"].items():
+            self.stats[name] = self.stats.get(name, 0) + count
+        if self.path is None:
+            return
+        self._pending.update(updates["entries"])
+        self._touched.extend(updates["touched"])
+        if len(self._pending) + len(self._touched) >= FLUSH_BATCH:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write new entries and the recency of disk hits in one transaction."""
+        if self.path is None or not (self._pending or self._touched):
+            return
+        now = time.time_ns()
+        db = self._connect()
+        with db:
+            db.executemany(
+                "INSERT OR REPLACE INTO blocks (key, html, info, size, used) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (key, html, info, len(html.encode("utf-8")) + len(info.encode("utf-8")), now)
+                    for key, (html, info) in self._pending.items()
+                ],
+            )
+            db.executemany("UPDATE blocks SET used = ? WHERE key = ?", [(now, key) for key in self._touched])
+        self._pending.clear()
+        self._touched.clear()
+
+    def prune(self) -> int:
+        """Delete least recently used disk entries until they fit disk_bytes; returns how many."""
+        if self.path is None or not self.path.exists():
+            return 0
+        self.flush()
+        db = self._connect()
+        with db:
+            cursor = db.execute(
+                """
+                DELETE FROM blocks WHERE key IN (
+                    SELECT key FROM (
+                        SELECT key, SUM(size) OVER (ORDER BY used DESC, key) AS running FROM blocks
+                    ) WHERE running > ?
+                )
+                """,
+                (self.disk_bytes,),
+            )
+        return cursor.rowcount
+
+    def close(self) -> None:
+        self.flush()
+        if self._db is not None and self._db_pid == os.getpid():
+            self._db.close()
+        self._db = None
+
+
+_active: Optional[RenderCache] = None
+
+
+def enable(
+    path: Optional[Path] = None,
+    memory_bytes: int = DEFAULT_MEMORY_BYTES,
+    disk_bytes: int = DEFAULT_DISK_BYTES,
+    version: Optional[str] = None,
+) -> RenderCache:
+    """Turn the block cache on in this process; markdown_to_html_node uses it from then on."""
+    global _active
+    disable()
+    _active = RenderCache(path, memory_bytes, disk_bytes, version)
+    return _active
+
+
+def disable() -> None:
+    global _active
+    if _active is not None:
+        _active.close()
+    _active = None
+
+
+def reset() -> None:
+    """
+    Drop this process's cache without flushing it: a forked worker's copy of
+    the parent's holds blocks the parent writes itself.
+    """
+    global _active
+    _active = None
+
+
+def active() -> Optional[RenderCache]:
+    return _active
+
+
+def take_updates() -> Optional[Dict[str, object]]:
+    """This process's cache counts and pending writes (see RenderCache.take_updates); None when the cache is off."""
+    if _active is None:
+        return None
+    return _active.take_updates()
+
+
+def collect(updates: Optional[Dict[str, object]]) -> None:
+    """Merge updates from another (worker) process into this process's cache."""
+    if _active is not None and updates:
+        _active.merge(updates)
+
+
+def flush() -> None:
+    if _active is not None:
+        _active.flush()
+
+
+def format_stats(stats: Dict[str, int]) -> str:
+    hits = stats["memory_hits"] + stats["disk_hits"]
+    lookups = hits + stats["misses"]
+    rate = hits / lookups if lookups else 0.0
+    return (
+        f"Block cache: {hits} hits ({stats['disk_hits']} from disk), "
+        f"{stats['misses']} misses, {rate:.1%} hit rate"
+    )
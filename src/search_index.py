@@ -0,0 +1,69 @@
+import json
+import os
+from pathlib import Path
+from typing import Dict, NamedTuple, Optional, Set
+
+from deploy import write_if_changed
+from page_info import TERM_PREFIX
+from site_index import DOCS_PER_SHARD, SiteIndex, page_url
+
+# bump whenever the layout of the published search index changes
+SEARCH_VERSION = 1
+
+
+class SearchWriteResult(NamedTuple):
+    written: int
+    removed: int
+    unchanged: int
+
+
+def _dump(data) -> bytes:
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def write_search_index(index: SiteIndex, public: Path, dest: Optional[Path] = None) -> SearchWriteResult:
+    """
+    Publish the search postings of a site index as static JSON under dest
+    (default public/search/), for a client that loads only what a query needs:
+
+      index.json          {"version", "term_prefix", "docs_per_shard", "pages"}
+      terms/<hex>.json    {term: [[page id, weight], ...]} for the terms whose
+                          first term_prefix characters, UTF-8 encoded, are <hex>
+      docs/<n>.json       {page id: [url, title]} for ids n*docs_per_shard and up
+
+    Only shards the index marked dirty, or that are missing on disk, are
+    rewritten, and files whose content did not change are left alone;
+    shards with no postings left are deleted.
+    """
+    public = Path(public)
+    dest = Path(dest) if dest is not None else public / "search"
+    written = removed = unchanged = 0
+    for kind in ("terms", "docs"):
+        directory = dest / kind
+        directory.mkdir(parents=True, exist_ok=True)
+        present: Set[str] = {name[: -len(".json")] for name in os.listdir(directory) if name.endswith(".json")}
+        shards, dirty = index.search_shards(kind)
+        for shard in sorted((dirty | (shards - present)) & shards):
+            if kind == "terms":
+                data: Dict = index.term_postings(shard)
+            else:
+                data = {
+                    str(page_id): [page_url(index.root / output, public), title]
+                    for page_id, output, title in index.search_docs(shard)
+                }
+            if write_if_changed(directory / f"{shard}.json", _dump(data)):
+                written += 1
+            else:
+                unchanged += 1
+        for shard in sorted(present - shards):
+            (directory / f"{shard}.json").unlink()
+            removed += 1
+    meta = {
+        "version": SEARCH_VERSION,
+        "term_prefix": TERM_PREFIX,
+        "docs_per_shard": DOCS_PER_SHARD,
+        "pages": index.search_page_count(),
+    }
+    write_if_changed(dest / "index.json", _dump(meta))
+    index.clear_search_dirty()
+    return SearchWriteResult(written, removed, unchanged)
@@ -0,0 +1,561 @@
+import json
+import os
+import posixpath
+import sqlite3
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Set, Tuple
+from urllib.parse import unquote, urlsplit
+
+from build_manifest import hash_file
+from page_info import PageSummary, term_shard
+
+# bump whenever a table changes; older databases are recreated (and every
+# page is rendered again to fill them)
+SCHEMA_VERSION = 1
+
+_TABLES = ("pages", "search_ids", "search_terms", "search_dirty", "deps", "rebuilds")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    output TEXT PRIMARY KEY,
+    source TEXT NOT NULL,
+    title TEXT NOT NULL,
+    headings TEXT NOT NULL,
+    words INTEGER NOT NULL,
+    links TEXT NOT NULL,
+    images TEXT NOT NULL,
+    hash TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS pages_source ON pages (source);
+CREATE TABLE IF NOT EXISTS search_ids (
+    id INTEGER PRIMARY KEY,
+    output TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS search_terms (
+    shard TEXT NOT NULL,
+    term TEXT NOT NULL,
+    id INTEGER NOT NULL,
+    weight INTEGER NOT NULL,
+    PRIMARY KEY (shard, term, id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS search_terms_id ON search_terms (id);
+CREATE TABLE IF NOT EXISTS search_dirty (
+    kind TEXT NOT NULL,
+    shard TEXT NOT NULL,
+    PRIMARY KEY (kind, shard)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS deps (
+    output TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    target TEXT NOT NULL,
+    stamp TEXT NOT NULL,
+    PRIMARY KEY (output, kind, target)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS deps_target ON deps (target);
+CREATE TABLE IF NOT EXISTS rebuilds (
+    output TEXT PRIMARY KEY,
+    reason TEXT NOT NULL
+) WITHOUT ROWID;
+"""
+
+# search index documents (page id -> url, title) are sharded by id
+DOCS_PER_SHARD = 1000
+
+# pending records that trigger a flush when collected
+FLUSH_BATCH = 2000
+
+
+class PageRecord(NamedTuple):
+    # output and source are posix paths relative to the index's root
+    output: str
+    source: str
+    title: str
+    # (level, plain text) of every heading, in order
+    headings: List[Tuple[int, str]]
+    words: int
+    links: List[str]
+    images: List[str]
+    # sha256 of the source file, as in the build manifest
+    hash: str
+    # search term -> weight; only kept (in search_terms) by a search index
+    terms: Optional[Dict[str, int]] = None
+    # (kind, target, stamp) edges of the dependency graph, see SiteIndex
+    deps: Sequence[Tuple[str, str, str]] = ()
+
+
+def _row(record: PageRecord) -> tuple:
+    return (
+        record.output,
+        record.source,
+        record.title,
+        json.dumps(record.headings),
+        record.words,
+        json.dumps(record.links),
+        json.dumps(record.images),
+        record.hash,
+    )
+
+
+def page_url(output: Path, public: Path) -> str:
+    """The site URL of an output file: /blog/post/ for public/blog/post/index.html."""
+    url = "/" + Path(os.path.relpath(output, public)).as_posix()
+    return url[: -len("index.html")] if url.endswith("/index.html") else url
+
+
+def local_path(url: str, base: str) -> Optional[str]:
+    """
+    The site path (relative to public/) a link or image URL on the page at
+    URL base points to: "img/a.png", or "blog/post/index.html" for "../post/"
+    (and "../post", as a path without an extension names a directory).
+    None for external URLs and links within the page.
+    """
+    parts = urlsplit(url)
+    if parts.scheme or parts.netloc or not parts.path:
+        return None
+    path = posixpath.normpath(posixpath.join(posixpath.dirname(base), unquote(parts.path)))
+    if parts.path.endswith("/") or not posixpath.splitext(path)[1]:
+        path = posixpath.join(path, "index.html")
+    return path.lstrip("/")
+
+
+def _stamp(path: Path) -> str:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return ""
+    return f"{st.st_size}:{st.st_mtime_ns}"
+
+
+def _docs_shard(page_id: int) -> str:
+    return str(page_id // DOCS_PER_SHARD)
+
+
+def _record(row: tuple) -> PageRecord:
+    output, source, title, headings, words, links, images, digest = row
+    return PageRecord(
+        output,
+        source,
+        title,
+        [tuple(h) for h in json.loads(headings)],
+        words,
+        json.loads(links),
+        json.loads(images),
+        digest,
+    )
+
+
+class SiteIndex:
+    """
+    Metadata of every rendered page (title, headings, word count, outgoing
+    links and images, source hash), kept in an SQLite database so later
+    builds and tools can query the site without re-reading content/.
+
+    Records come from the normal parse: page_info summaries noted while a
+    page renders. Workers only gather them; take_updates/collect hand them
+    to the main process, whose flush() writes them in one transaction.
+    Paths are stored relative to root (default: the database's directory).
+
+    With search, each page also gets a numeric id and its search terms are
+    kept as postings (shard, term, id, weight). Shards whose postings or
+    documents changed are remembered in search_dirty until
+    search_index.write_search_index has rewritten them.
+
+    Every page also keeps the edges of a dependency graph (deps): the
+    template it was rendered with, the local assets its links and images
+    point to (the files under static/, with their size and mtime when the
+    page was rendered) and the pages it links to. outdated() finds the pages
+    whose assets changed since, and rebuilds remembers why each page was
+    last rendered, for why_rebuilt().
+    """
+
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        root: Optional[Path] = None,
+        search: bool = False,
+        public: Optional[Path] = None,
+        static: Optional[Path] = None,
+    ):
+        self.path = Path(path) if path is not None else None
+        if root is None:
+            root = self.path.parent if self.path is not None else Path.cwd()
+        self.root = Path(root)
+        self.search = search
+        self.public = Path(public) if public is not None else self.root / "public"
+        self.static = Path(static) if static is not None else self.root / "static"
+        self._pending: Dict[str, PageRecord] = {}
+        self._forgotten: List[str] = []
+        self._reasons: Dict[str, str] = {}
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_pid = 0
+
+    def config(self) -> Tuple[Optional[Path], Path, bool, Path, Path]:
+        """Arguments that recreate this index (minus pending records) in a worker process."""
+        return self.path, self.root, self.search, self.public, self.static
+
+    def _key(self, path) -> str:
+        return Path(os.path.relpath(path, self.root)).as_posix()
+
+    def _connect(self) -> sqlite3.Connection:
+        # a connection must not be shared with a forked worker
+        if self._db is None or self._db_pid != os.getpid():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(self.path, timeout=60)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            if db.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+                with db:
+                    for table in _TABLES:
+                        db.execute(f"DROP TABLE IF EXISTS {table}")
+                    db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            db.executescript(_SCHEMA)
+            self._db, self._db_pid = db, os.getpid()
+        return self._db
+
+    def note(
+        self,
+        from_path: str,
+        dest_path: str,
+        summary: PageSummary,
+        template_path: Optional[str] = None,
+        source_hash: Optional[str] = None,
+    ) -> PageRecord:
+        """
+        Record the summary (and dependencies) of a page that was just
+        rendered. source_hash is the sha256 of from_path if already known.
+        """
+        record = PageRecord(
+            self._key(dest_path),
+            self._key(from_path),
+            summary.title,
+            summary.headings(),
+            summary.words(),
+            summary.links(),
+            summary.images(),
+            source_hash if source_hash is not None else hash_file(from_path),
+            summary.terms() if self.search else {},
+            self._deps(dest_path, summary, template_path),
+        )
+        self._pending[record.output] = record
+        return record
+
+    def _deps(self, dest_path: str, summary: PageSummary, template_path: Optional[str]) -> List[Tuple[str, str, str]]:
+        # links to .html files are page links; anything else local is an
+        # asset, stamped so a later change to it can be noticed
+        deps: Dict[Tuple[str, str], str] = {}
+        if template_path is not None:
+            deps["template", self._key(template_path)] = ""
+        base = page_url(Path(dest_path), self.public)
+        for url in summary.links() + summary.images():
+            target = local_path(url, base)
+            if target is None:
+                continue
+            if target.endswith(".html"):
+                deps["page", self._key(self.public / target)] = ""
+            elif ("asset", self._key(self.static / target)) not in deps:
+                deps["asset", self._key(self.static / target)] = _stamp(self.static / target)
+        return sorted((kind, target, stamp) for (kind, target), stamp in deps.items())
+
+    def rebuilt(self, dest_path: str, reason: str) -> None:
+        """Remember why a page was just rendered."""
+        self._reasons[self._key(dest_path)] = reason
+
+    def forget(self, dest_path: str) -> None:
+        """Drop the record of a page whose output was removed (or failed to render)."""
+        key = self._key(dest_path)
+        self._pending.pop(key, None)
+        self._reasons.pop(key, None)
+        self._forgotten.append(key)
+
+    def retain(self, dest_paths: Iterable[str]) -> int:
+        """
+        Forget every indexed page whose output is not among dest_paths (the
+        pages the site has now), whatever removed it: a clean build or one
+        run without the index knows nothing about deleted sources. Returns
+        how many were forgotten.
+        """
+        if self.path is None:
+            return 0
+        keep = {self._key(path) for path in dest_paths}
+        self.flush()
+        rows = self._connect().execute("SELECT output FROM pages UNION SELECT output FROM search_ids")
+        gone = [output for (output,) in rows if output not in keep]
+        self._forgotten.extend(gone)
+        return len(gone)
+
+    def take_updates(self) -> Dict[str, object]:
+        """Hand over (and reset) the records and removals not flushed yet."""
+        updates = {"pages": list(self._pending.values()), "forgotten": self._forgotten}
+        self._pending, self._forgotten = {}, []
+        return updates
+
+    def merge(self, updates: Dict[str, object]) -> None:
+        """Take over updates from take_updates (e.g. from a worker); flushes once enough piled up."""
+        for key in updates["forgotten"]:
+            self._pending.pop(key, None)
+            self._forgotten.append(key)
+        for record in updates["pages"]:
+            self._pending[record.output] = record
+        if len(self._pending) + len(self._forgotten) >= FLUSH_BATCH:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write pending removals and records in one transaction."""
+        if self.path is None or not (self._pending or self._forgotten or self._reasons):
+            return
+        db = self._connect()
+        with db:
+            dirty: Set[Tuple[str, str]] = set()
+            for key in [*self._forgotten, *self._pending]:
+                self._drop_postings(db, key, dirty, keep_id=self.search and key in self._pending)
+            db.executemany("DELETE FROM pages WHERE output = ?", [(key,) for key in self._forgotten])
+            db.executemany("DELETE FROM rebuilds WHERE output = ?", [(key,) for key in self._forgotten])
+            db.executemany(
+                "DELETE FROM deps WHERE output = ?", [(key,) for key in [*self._forgotten, *self._pending]]
+            )
+            db.executemany(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [_row(record) for record in self._pending.values()],
+            )
+            db.executemany(
+                "INSERT INTO deps VALUES (?, ?, ?, ?)",
+                [(record.output, *dep) for record in self._pending.values() for dep in record.deps],
+            )
+            db.executemany("INSERT OR REPLACE INTO rebuilds VALUES (?, ?)", self._reasons.items())
+            if self.search:
+                for record in self._pending.values():
+                    self._add_postings(db, record, dirty)
+            db.executemany("INSERT OR IGNORE INTO search_dirty VALUES (?, ?)", sorted(dirty))
+        self._pending.clear()
+        self._forgotten.clear()
+        self._reasons.clear()
+
+    def _drop_postings(self, db: sqlite3.Connection, key: str, dirty: Set[Tuple[str, str]], keep_id: bool) -> None:
+        row = db.execute("SELECT id FROM search_ids WHERE output = ?", (key,)).fetchone()
+        if row is None:
+            return
+        page_id = row[0]
+        shards = db.execute("SELECT DISTINCT shard FROM search_terms WHERE id = ?", (page_id,))
+        dirty.update(("terms", shard) for (shard,) in shards)
+        dirty.add(("docs", _docs_shard(page_id)))
+        db.execute("DELETE FROM search_terms WHERE id = ?", (page_id,))
+        if not keep_id:
+            # a page indexed without search gets a fresh id (and terms) once search is back on
+            db.execute("DELETE FROM search_ids WHERE id = ?", (page_id,))
+
+    def _add_postings(self, db: sqlite3.Connection, record: PageRecord, dirty: Set[Tuple[str, str]]) -> None:
+        db.execute("INSERT OR IGNORE INTO search_ids (output) VALUES (?)", (record.output,))
+        (page_id,) = db.execute("SELECT id FROM search_ids WHERE output = ?", (record.output,)).fetchone()
+        postings = [(term_shard(term), term, page_id, weight) for term, weight in (record.terms or {}).items()]
+        db.executemany("INSERT INTO search_terms VALUES (?, ?, ?, ?)", postings)
+        dirty.update(("terms", shard) for shard, _, _, _ in postings)
+        dirty.add(("docs", _docs_shard(page_id)))
+
+    def hashes(self) -> Dict[str, str]:
+        """
+        output path -> source hash of every indexed page (absolute output
+        paths). With search, only pages whose search terms are indexed count.
+        """
+        if self.path is None:
+            return {}
+        self.flush()
+        if self.search:
+            query = "SELECT output, hash FROM pages JOIN search_ids USING (output)"
+        else:
+            query = "SELECT output, hash FROM pages"
+        return {str(self.root / output): digest for output, digest in self._connect().execute(query)}
+
+    def outdated(self) -> Dict[str, str]:
+        """
+        output path -> reason for every indexed page with an asset whose size
+        or mtime changed (or that appeared or disappeared) since the page was
+        rendered. Each asset is stat()ed once, however many pages use it.
+        """
+        if self.path is None:
+            return {}
+        self.flush()
+        stamps: Dict[str, str] = {}
+        outdated: Dict[str, str] = {}
+        rows = self._connect().execute("SELECT output, target, stamp FROM deps WHERE kind = 'asset'")
+        for output, target, stamp in rows:
+            if target not in stamps:
+                stamps[target] = _stamp(self.root / target)
+            if stamps[target] != stamp and output not in outdated:
+                change = "removed" if not stamps[target] else "added" if not stamp else "changed"
+                outdated[str(self.root / output)] = f"{target} {change}"
+        return outdated
+
+    def dependents(self, paths: Iterable[str]) -> List[Tuple[str, str]]:
+        """(from_path, dest_path) of the indexed pages depending on any of the given files or pages."""
+        if self.path is None:
+            return []
+        self.flush()
+        db = self._connect()
+        found: Set[Tuple[str, str]] = set()
+        for path in paths:
+            rows = db.execute(
+                "SELECT source, output FROM deps JOIN pages USING (output) WHERE target = ?", (self._key(path),)
+            )
+            found.update(rows)
+        return [(str(self.root / source), str(self.root / output)) for source, output in sorted(found)]
+
+    def why_rebuilt(self, path: str) -> Optional[Dict[str, object]]:
+        """
+        What the graph knows about a page, given its output or source path:
+        its source, why it was last rendered, what it depends on by kind,
+        and which pages link to it. None if the page is not indexed.
+        """
+        if self.path is None:
+            return None
+        self.flush()
+        db = self._connect()
+        key = self._key(path)
+        row = db.execute("SELECT output, source FROM pages WHERE output = ? OR source = ?", (key, key)).fetchone()
+        if row is None:
+            return None
+        output, source = row
+        reason = db.execute("SELECT reason FROM rebuilds WHERE output = ?", (output,)).fetchone()
+        deps: Dict[str, List[str]] = {}
+        for kind, target in db.execute(
+            "SELECT kind, target FROM deps WHERE output = ? ORDER BY kind, target", (output,)
+        ):
+            deps.setdefault(kind, []).append(target)
+        linked_from = db.execute(
+            "SELECT output FROM deps WHERE kind = 'page' AND target = ? ORDER BY output", (output,)
+        )
+        return {
+            "output": output,
+            "source": source,
+            "reason": reason[0] if reason is not None else None,
+            "deps": deps,
+            "linked_from": [output for (output,) in linked_from],
+        }
+
+    def search_shards(self, kind: str) -> Tuple[Set[str], Set[str]]:
+        """(every shard, shards changed since the last clear_search_dirty) of kind "terms" or "docs"."""
+        if self.path is None:
+            return set(), set()
+        self.flush()
+        db = self._connect()
+        if kind == "terms":
+            shards = {shard for (shard,) in db.execute("SELECT DISTINCT shard FROM search_terms")}
+        else:
+            shards = {_docs_shard(page_id) for (page_id,) in db.execute("SELECT id FROM search_ids")}
+        dirty = {shard for (shard,) in db.execute("SELECT shard FROM search_dirty WHERE kind = ?", (kind,))}
+        return shards, dirty
+
+    def term_postings(self, shard: str) -> Dict[str, List[List[int]]]:
+        """term -> [[page id, weight], ...] (by id) for every term in a shard."""
+        postings: Dict[str, List[List[int]]] = {}
+        rows = self._connect().execute(
+            "SELECT term, id, weight FROM search_terms WHERE shard = ? ORDER BY term, id", (shard,)
+        )
+        for term, page_id, weight in rows:
+            postings.setdefault(term, []).append([page_id, weight])
+        return postings
+
+    def search_docs(self, shard: str) -> List[Tuple[int, str, str]]:
+        """(page id, output, title) of the pages in a documents shard, by id."""
+        first = int(shard) * DOCS_PER_SHARD
+        return list(
+            self._connect().execute(
+                "SELECT id, output, title FROM search_ids JOIN pages USING (output) "
+                "WHERE id >= ? AND id < ? ORDER BY id",
+                (first, first + DOCS_PER_SHARD),
+            )
+        )
+
+    def search_page_count(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM search_ids").fetchone()[0]
+
+    def clear_search_dirty(self) -> None:
+        with self._connect() as db:
+            db.execute("DELETE FROM search_dirty")
+
+    def pages(self, prefix: str = "") -> Iterator[PageRecord]:
+        """Every indexed page whose output path (relative to root) starts with prefix, in path order."""
+        if self.path is None:
+            return iter(())
+        self.flush()
+        rows = self._connect().execute(
+            "SELECT * FROM pages WHERE substr(output, 1, ?) = ? ORDER BY output", (len(prefix), prefix)
+        )
+        return (_record(row) for row in rows)
+
+    def page(self, dest_path: str) -> Optional[PageRecord]:
+        if self.path is None:
+            return None
+        self.flush()
+        row = self._connect().execute("SELECT * FROM pages WHERE output = ?", (self._key(dest_path),)).fetchone()
+        return _record(row) if row is not None else None
+
+    def close(self) -> None:
+        self.flush()
+        if self._db is not None and self._db_pid == os.getpid():
+            self._db.close()
+        self._db = None
+
+
+_active: Optional[SiteIndex] = None
+
+
+def enable(
+    path: Optional[Path] = None,
+    root: Optional[Path] = None,
+    search: bool = False,
+    public: Optional[Path] = None,
+    static: Optional[Path] = None,
+) -> SiteIndex:
+    """Turn the site index on in this process; rendered pages are noted in it from then on."""
+    global _active
+    disable()
+    _active = SiteIndex(path, root, search, public, static)
+    return _active
+
+
+def disable() -> None:
+    global _active
+    if _active is not None:
+        _active.close()
+    _active = None
+
+
+def reset() -> None:
+    """
+    Drop this process's index without flushing it: a forked worker's copy of
+    the parent's holds records the parent writes itself.
+    """
+    global _active
+    _active = None
+
+
+def active() -> Optional[SiteIndex]:
+    return _active
+
+
+def take_updates() -> Optional[Dict[str, object]]:
+    """This process's records not flushed yet (see SiteIndex.take_updates); None when the index is off."""
+    if _active is None:
+        return None
+    return _active.take_updates()
+
+
+def collect(updates: Optional[Dict[str, object]]) -> None:
+    """Merge updates from another (worker) process into this process's index."""
+    if _active is not None and updates:
+        _active.merge(updates)
+
+
+def flush() -> None:
+    if _active is not None:
+        _active.flush()
+
+
+def forget(dest_path: str) -> None:
+    if _active is not None:
+        _active.forget(dest_path)
+
+
+def rebuilt(dest_path: str, reason: str) -> None:
+    if _active is not None:
+        _active.rebuilt(dest_path, reason)
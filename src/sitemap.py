@@ -0,0 +1,188 @@
+import heapq
+import itertools
+import os
+import re
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+from urllib.parse import quote
+from xml.sax.saxutils import escape, quoteattr
+
+from deploy import replace_if_changed
+
+# most URLs one sitemap file may list (sitemaps.org protocol)
+SITEMAP_LIMIT = 50_000
+# newest entries listed in a feed
+FEED_ENTRIES = 20
+
+SITEMAP_NS = "http://www.sitemaps.org/schemas/sitemap/0.9"
+ATOM_NS = "http://www.w3.org/2005/Atom"
+
+_PART_RE = re.compile(r"sitemap-(\d+)\.xml")
+
+
+class XmlWriter:
+    """
+    Writes an XML document element by element through write(), so a document
+    of any size is never held in memory. Text and attribute values are escaped.
+    """
+
+    def __init__(self, write: Callable[[str], object]):
+        self._write = write
+        self._open: List[str] = []
+        write('<?xml version="1.0" encoding="UTF-8"?>\n')
+
+    def _tag(self, tag: str, attrs: Optional[Dict[str, str]]) -> str:
+        if not attrs:
+            return tag
+        return tag + "".join(f" {name}={quoteattr(value)}" for name, value in attrs.items())
+
+    def start(self, tag: str, attrs: Optional[Dict[str, str]] = None) -> None:
+        self._write(f"{'  ' * len(self._open)}<{self._tag(tag, attrs)}>\n")
+        self._open.append(tag)
+
+    def element(self, tag: str, text: Optional[str] = None, attrs: Optional[Dict[str, str]] = None) -> None:
+        indent = "  " * len(self._open)
+        if text is None:
+            self._write(f"{indent}<{self._tag(tag, attrs)}/>\n")
+        else:
+            self._write(f"{indent}<{self._tag(tag, attrs)}>{escape(text)}</{tag}>\n")
+
+    def end(self) -> None:
+        tag = self._open.pop()
+        self._write(f"{'  ' * len(self._open)}</{tag}>\n")
+
+    def close(self) -> None:
+        while self._open:
+            self.end()
+
+
+def absolute_url(base_url: str, path: str) -> str:
+    """base_url (no trailing slash) joined with a site path, percent-encoded."""
+    return base_url + quote(path)
+
+
+def w3c_datetime(mtime_ns: int) -> str:
+    return datetime.fromtimestamp(mtime_ns / 1e9, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _tmp_for(path: Path) -> Path:
+    return path.with_name(f".{path.name}.tmp")
+
+
+def url_element(loc: str, mtime_ns: Optional[int]) -> str:
+    """
+    The <url> element of one sitemap entry, indented as XmlWriter would
+    write it, for callers that keep entries between sitemap writes.
+    """
+    lastmod = "" if mtime_ns is None else f"    <lastmod>{w3c_datetime(mtime_ns)}</lastmod>\n"
+    return f"  <url>\n    <loc>{escape(loc)}</loc>\n{lastmod}  </url>\n"
+
+
+def _write_urlset(tmp: Path, elements: Iterable[str]) -> None:
+    with open(tmp, "w", encoding="utf-8") as f:
+        xml = XmlWriter(f.write)
+        xml.start("urlset", {"xmlns": SITEMAP_NS})
+        f.writelines(elements)
+        xml.close()
+
+
+def write_sitemaps(
+    urls: Iterable[Tuple[str, Optional[int]]], public: Path, base_url: str, limit: int = SITEMAP_LIMIT
+) -> List[Path]:
+    """
+    Write sitemap.xml for (absolute URL, mtime_ns or None) pairs, streamed
+    from any iterable. Past `limit` URLs the sitemap is split into
+    sitemap-1.xml, sitemap-2.xml, ... and sitemap.xml becomes their index.
+    Parts left over from a larger earlier sitemap are removed, and files
+    whose content did not change keep their mtime. Returns the sitemap
+    files, index first.
+    """
+    return write_sitemap_elements((url_element(loc, mtime_ns) for loc, mtime_ns in urls), public, base_url, limit)
+
+
+def write_sitemap_elements(
+    elements: Iterable[str], public: Path, base_url: str, limit: int = SITEMAP_LIMIT
+) -> List[Path]:
+    """write_sitemaps for <url> elements already formatted by url_element()."""
+    public = Path(public)
+    it = iter(elements)
+    parts: List[Path] = []
+    while True:
+        first = next(it, None)
+        if first is None and parts:
+            break
+        part = public / f".sitemap-{len(parts) + 1}.xml.tmp"
+        head = [] if first is None else [first]
+        _write_urlset(part, itertools.chain(head, itertools.islice(it, limit - 1)))
+        parts.append(part)
+        if first is None:
+            break  # an empty site still gets an (empty) sitemap
+
+    index = public / "sitemap.xml"
+    if len(parts) == 1:
+        replace_if_changed(parts[0], index)
+        written = [index]
+    else:
+        written = []
+        for n, tmp in enumerate(parts, 1):
+            path = public / f"sitemap-{n}.xml"
+            replace_if_changed(tmp, path)
+            written.append(path)
+        tmp = _tmp_for(index)
+        with open(tmp, "w", encoding="utf-8") as f:
+            xml = XmlWriter(f.write)
+            xml.start("sitemapindex", {"xmlns": SITEMAP_NS})
+            for path in written:
+                xml.start("sitemap")
+                xml.element("loc", f"{base_url}/{path.name}")
+                xml.end()
+            xml.close()
+        replace_if_changed(tmp, index)
+        written.insert(0, index)
+    for name in os.listdir(public):
+        match = _PART_RE.fullmatch(name)
+        if match and (len(parts) == 1 or int(match.group(1)) > len(parts)):
+            os.unlink(public / name)
+    return written
+
+
+class FeedEntry(NamedTuple):
+    url: str
+    title: str
+    updated_ns: int
+
+
+def write_feed(
+    entries: Iterable[FeedEntry], path: Path, feed_url: str, title: str, author: str, limit: int = FEED_ENTRIES
+) -> int:
+    """
+    Write an Atom feed of the `limit` most recently updated entries, picked
+    from a stream of any length with a bounded heap. Returns how many entries
+    the feed lists. author names the feed's author, which its entries
+    inherit (RFC 4287 requires one).
+    """
+    newest = heapq.nlargest(limit, entries, key=lambda entry: (entry.updated_ns, entry.url))
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = _tmp_for(path)
+    with open(tmp, "w", encoding="utf-8") as f:
+        xml = XmlWriter(f.write)
+        xml.start("feed", {"xmlns": ATOM_NS})
+        xml.element("title", title)
+        xml.element("id", feed_url)
+        xml.element("link", attrs={"rel": "self", "href": feed_url})
+        xml.element("updated", w3c_datetime(newest[0].updated_ns if newest else 0))
+        xml.start("author")
+        xml.element("name", author)
+        xml.end()
+        for entry in newest:
+            xml.start("entry")
+            xml.element("title", entry.title)
+            xml.element("id", entry.url)
+            xml.element("link", attrs={"href": entry.url})
+            xml.element("updated", w3c_datetime(entry.updated_ns))
+            xml.end()
+        xml.close()
+    replace_if_changed(tmp, path)
+    return len(newest)
@@ -1,6 +1,6 @@
 from typing import List
 from textnode import TextNode, TextType
-from extract_markdown import extract_markdown_images, extract_markdown_links
+from patterns import IMAGE_RE, LINK_RE
 
 def split_nodes_image(old_nodes: List[TextNode]) -> List[TextNode]:
     """
@@ -19,27 +19,20 @@ def split_nodes_image(old_nodes: List[TextNode]) -> List[TextNode]:
             continue
 
         s = node.text
-        # Find all images first (alt, url) in left-to-right order
-        images = extract_markdown_images(s)
-        if not images:
-            new_nodes.append(node)
-            continue
+        # Cut the text at the match offsets of a single left-to-right scan
+        pos = 0
+        for m in IMAGE_RE.finditer(s):
+            if m.start() > pos:
+                new_nodes.append(TextNode(s[pos:m.start()], TextType.TEXT))
+            new_nodes.append(TextNode(m.group(1), TextType.IMAGE, m.group(2)))
+            pos = m.end()
 
-        remaining = s
-        for alt, url in images:
-            token = f"![{alt}]({url})"
-            # split once at the first occurrence of this specific image markdown
-            before, sep, after = remaining.partition(token)
-            # partition returns before, sep, after; sep empty if token not found
-            # but since images came from findall on s, token should be present in order
-            if before:
-                new_nodes.append(TextNode(before, TextType.TEXT))
-            new_nodes.append(TextNode(alt, TextType.IMAGE, url))
-            remaining = after  # continue on the remainder
-
-        # any trailing text after the last image
-        if remaining:
-            new_nodes.append(TextNode(remaining, TextType.TEXT))
+        if pos == 0:
+            # no images: keep the original node
+            new_nodes.append(node)
+        elif pos < len(s):
+            # any trailing text after the last image
+            new_nodes.append(TextNode(s[pos:], TextType.TEXT))
 
     return new_nodes
 
@@ -51,7 +44,7 @@ def split_nodes_link(old_nodes: List[TextNode]) -> List[TextNode]:
 
     Returns a new list of TextNode with Link TextNodes (TextType.LINK)
     and TEXT nodes for the surrounding text. Non-TEXT nodes are preserved.
-    Images (which are ![alt](url)) are not treated as links because we use the extract_markdown_links helper.
+    Images (which are ![alt](url)) are not treated as links because LINK_RE rejects a leading !.
     """
     new_nodes: List[TextNode] = []
 
@@ -61,21 +54,16 @@ def split_nodes_link(old_nodes: List[TextNode]) -> List[TextNode]:
             continue
 
         s = node.text
-        links = extract_markdown_links(s)
-        if not links:
-            new_nodes.append(node)
-            continue
+        pos = 0
+        for m in LINK_RE.finditer(s):
+            if m.start() > pos:
+                new_nodes.append(TextNode(s[pos:m.start()], TextType.TEXT))
+            new_nodes.append(TextNode(m.group(1), TextType.LINK, m.group(2)))
+            pos = m.end()
 
-        remaining = s
-        for anchor, url in links:
-            token = f"[{anchor}]({url})"
-            before, sep, after = remaining.partition(token)
-            if before:
-                new_nodes.append(TextNode(before, TextType.TEXT))
-            new_nodes.append(TextNode(anchor, TextType.LINK, url))
-            remaining = after
-
-        if remaining:
-            new_nodes.append(TextNode(remaining, TextType.TEXT))
+        if pos == 0:
+            new_nodes.append(node)
+        elif pos < len(s):
+            new_nodes.append(TextNode(s[pos:], TextType.TEXT))
 
     return new_nodes
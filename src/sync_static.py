@@ -0,0 +1,129 @@
+import errno
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import AbstractSet, Iterable, List, Optional
+
+from build_manifest import hash_file
+from inventory import SourceFile, scan_tree
+
+# how new or changed files are placed in the destination
+LINK_MODES = ("copy", "reflink", "hardlink")
+
+# Linux FICLONE ioctl: share the source's blocks copy-on-write (btrfs, xfs, ...)
+_FICLONE = 0x40049409
+
+
+class SyncResult:
+    def __init__(self):
+        self.copied: List[str] = []
+        self.unchanged: List[str] = []
+        self.removed: List[str] = []
+        # every file now mirrored from the source, relative to the destination
+        self.files: List[str] = []
+
+    def __repr__(self):
+        return (
+            f"SyncResult(copied={len(self.copied)}, unchanged={len(self.unchanged)}, "
+            f"removed={len(self.removed)})"
+        )
+
+
+def _is_unchanged(source: SourceFile, dest: str, verify_hash: bool) -> bool:
+    try:
+        dest_st = os.stat(dest)
+    except FileNotFoundError:
+        return False
+    if dest_st.st_size != source.size:
+        return False
+    if dest_st.st_mtime_ns == source.mtime_ns:
+        return True  # also the case for a file hardlinked by an earlier sync
+    if verify_hash and hash_file(source.path) == hash_file(dest):
+        # same bytes, only the timestamp differs: fix it up instead of copying
+        shutil.copystat(source.path, dest)
+        return True
+    return False
+
+
+def _reflink(src: str, dest: str) -> bool:
+    try:
+        import fcntl
+    except ImportError:
+        return False
+    with open(src, "rb") as fsrc, open(dest, "wb") as fdest:
+        try:
+            fcntl.ioctl(fdest.fileno(), _FICLONE, fsrc.fileno())
+        except OSError:
+            return False
+    shutil.copystat(src, dest)
+    return True
+
+
+def _place(src: str, dest: str, link: str) -> None:
+    os.makedirs(os.path.dirname(dest), exist_ok=True)
+    if os.path.lexists(dest):
+        os.remove(dest)  # never write through an old hardlink into static/
+    if link == "hardlink":
+        try:
+            os.link(src, dest)
+            return
+        except OSError as e:
+            if e.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK, errno.ENOTSUP):
+                raise
+    elif link == "reflink" and _reflink(src, dest):
+        return
+    shutil.copy2(src, dest)
+
+
+def sync_tree(
+    src_dir: Path,
+    dest_dir: Path,
+    previous: Iterable[str] = (),
+    verify_hash: bool = False,
+    link: str = "copy",
+    workers: Optional[int] = None,
+    exclude: AbstractSet[str] = frozenset(),
+) -> SyncResult:
+    """
+    Mirror src_dir into dest_dir, touching only what changed.
+
+    - A file is unchanged when the destination has the same size and mtime
+      (copies keep the source mtime). With verify_hash, same-size files whose
+      mtime differs are compared by content hash before being copied.
+    - New or changed files are placed with link ("copy", "reflink" to share
+      blocks copy-on-write, or "hardlink"), falling back to a copy where the
+      filesystem does not support it.
+    - previous lists the files (relative to dest_dir) mirrored by the last sync;
+      those no longer in src_dir are deleted. Other files in dest_dir, such as
+      generated pages, are never touched.
+    - exclude lists destination paths (relative to dest_dir) owned by someone
+      else, e.g. generated pages that take precedence over a static file of the
+      same name; they are neither written nor removed.
+    File I/O runs on a thread pool of `workers` threads.
+    """
+    if link not in LINK_MODES:
+        raise ValueError(f"link must be one of {LINK_MODES}, got {link!r}")
+    result = SyncResult()
+    files = [source for source in scan_tree(src_dir) if source.rel not in exclude]
+
+    def sync_one(source: SourceFile) -> bool:
+        dest = os.path.join(dest_dir, source.rel)
+        if _is_unchanged(source, dest, verify_hash):
+            return False
+        _place(source.path, dest, link)
+        return True
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for source, copied in zip(files, pool.map(sync_one, files)):
+            (result.copied if copied else result.unchanged).append(source.rel)
+            result.files.append(source.rel)
+
+    current = set(result.files)
+    for rel in sorted(set(previous) - current - set(exclude)):
+        try:
+            os.remove(os.path.join(dest_dir, rel))
+        except FileNotFoundError:
+            continue
+        result.removed.append(rel)
+    return result
@@ -0,0 +1,97 @@
+import hashlib
+import os
+import re
+from typing import Callable, Dict, List, Tuple, Union
+
+# placeholders look like "{{ Title }}" / "{{ Content }}"
+_SLOT_RE = re.compile(r"\{\{ (\w+) \}\}")
+
+# a slot is filled with a string, or by a callable that streams into write()
+SlotValue = Union[str, Callable[[Callable[[str], object]], object]]
+
+
+class Template:
+    """
+    A page template compiled into alternating literal segments and named slots:
+        segments[0] slots[0] segments[1] slots[1] ... segments[-1]
+    Rendering is a single join over those pieces, so the page body is copied once
+    instead of once per placeholder.
+    """
+
+    def __init__(self, segments: List[str], slots: List[str]):
+        if len(segments) != len(slots) + 1:
+            raise ValueError("Template needs exactly one more segment than slots")
+        self.segments = segments
+        self.slots = slots
+
+    @classmethod
+    def compile(cls, text: str) -> "Template":
+        segments: List[str] = []
+        slots: List[str] = []
+        pos = 0
+        for m in _SLOT_RE.finditer(text):
+            segments.append(text[pos:m.start()])
+            slots.append(m.group(1))
+            pos = m.end()
+        segments.append(text[pos:])
+        return cls(segments, slots)
+
+    def render(self, values: Dict[str, str]) -> str:
+        """Fill every slot from values. Slots without a value are left as written."""
+        parts = [self.segments[0]]
+        for slot, segment in zip(self.slots, self.segments[1:]):
+            parts.append(values.get(slot, "{{ %s }}" % slot))
+            parts.append(segment)
+        return "".join(parts)
+
+    def render_to(self, write: Callable[[str], object], values: Dict[str, SlotValue]) -> None:
+        """
+        Stream the filled template into write() piece by piece.
+        A value may be a string, or a callable that is handed write() and streams
+        the slot's content itself (e.g. HTMLNode.render_to).
+        """
+        write(self.segments[0])
+        for slot, segment in zip(self.slots, self.segments[1:]):
+            value = values.get(slot, "{{ %s }}" % slot)
+            if callable(value):
+                value(write)
+            else:
+                write(value)
+            write(segment)
+
+    def __eq__(self, other):
+        if not isinstance(other, Template):
+            return False
+        return self.segments == other.segments and self.slots == other.slots
+
+    def __repr__(self):
+        return f"Template(segments={self.segments!r}, slots={self.slots!r})"
+
+
+# compiled templates keyed on the sha256 of the template file's bytes
+_compiled: Dict[str, Template] = {}
+# (path, mtime_ns, size) -> content hash, so an unchanged file is not re-read
+_stat_index: Dict[Tuple[str, int, int], str] = {}
+
+
+def load_template(template_path: str) -> Template:
+    """
+    Load and compile template_path, reusing the compiled form for as long as the
+    file's contents are unchanged. Each process compiles a given template once,
+    no matter how many pages it renders.
+    """
+    st = os.stat(template_path)
+    stat_key = (str(template_path), st.st_mtime_ns, st.st_size)
+    digest = _stat_index.get(stat_key)
+    if digest is not None:
+        return _compiled[digest]
+
+    with open(template_path, "rb") as f:
+        data = f.read()
+    digest = hashlib.sha256(data).hexdigest()
+    template = _compiled.get(digest)
+    if template is None:
+        template = Template.compile(data.decode("utf-8"))
+        _compiled[digest] = template
+    _stat_index[stat_key] = digest
+    return template
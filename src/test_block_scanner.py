@@ -0,0 +1,81 @@
+import unittest
+from block_scanner import Block, iter_blocks, scan_blocks
+from block_types import BlockType, block_to_block_type
+from markdown_blocks import markdown_to_blocks
+from markdown_to_html import markdown_to_html_node
+
+
+class TestBlockScanner(unittest.TestCase):
+    def test_matches_split_and_classify(self):
+        md = """
+# Title
+
+This is **bolded** paragraph
+on two lines
+
+- a list
+- with items
+
+1. one
+2. two
+
+> quote
+> more
+
+
+```
+code
+```
+"""
+        expected = [(block_to_block_type(b), b.splitlines()) for b in markdown_to_blocks(md)]
+        self.assertEqual([(b.type, b.lines) for b in scan_blocks(md)], expected)
+
+    def test_line_numbers(self):
+        md = "# Title\n\n\npara\ntext\n\n  \n- item"
+        self.assertEqual([b.lineno for b in scan_blocks(md)], [1, 4, 8])
+        self.assertEqual(scan_blocks(md)[2].lines, ["- item"])
+
+    def test_whitespace_only_lines_do_not_separate(self):
+        blocks = scan_blocks("first\n   \nsecond")
+        self.assertEqual(blocks, [Block(BlockType.PARAGRAPH, ["first", "   ", "second"], 1)])
+
+    def test_fenced_code_keeps_blank_lines(self):
+        md = "intro\n\n```python\ndef f():\n\n\n    return 1\n```\n\nafter"
+        blocks = scan_blocks(md)
+        self.assertEqual([b.type for b in blocks], [BlockType.PARAGRAPH, BlockType.CODE, BlockType.PARAGRAPH])
+        self.assertEqual(blocks[1].lines, ["```python", "def f():", "", "", "    return 1", "```"])
+        self.assertEqual(blocks[2].lineno, 10)
+        html = markdown_to_html_node(md).to_html()
+        self.assertIn("<pre><code>def f():\n\n\n    return 1\n</code></pre>", html)
+
+    def test_unclosed_fence_splits_at_blank_lines(self):
+        md = "```\ncode\n\nmore text\n\n- item"
+        self.assertEqual(
+            [(b.type, b.lines, b.lineno) for b in scan_blocks(md)],
+            [
+                (BlockType.PARAGRAPH, ["```", "code"], 1),
+                (BlockType.PARAGRAPH, ["more text"], 4),
+                (BlockType.UNORDERED_LIST, ["- item"], 6),
+            ],
+        )
+
+    def test_text_after_closing_fence_splits_at_blank_lines(self):
+        md = "```\na\n\nb\n```\ntrailing"
+        self.assertEqual(
+            [b.lines for b in scan_blocks(md)],
+            [["```", "a"], ["b", "```", "trailing"]],
+        )
+
+    def test_iter_blocks_consumes_lines_lazily(self):
+        lines = iter(["# One", "", "two", "", "three"])
+        blocks = iter_blocks(lines)
+        self.assertEqual(next(blocks).lines, ["# One"])
+        self.assertEqual(next(lines), "two")
+
+    def test_empty(self):
+        self.assertEqual(scan_blocks(""), [])
+        self.assertEqual(scan_blocks("  \n\n\t"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
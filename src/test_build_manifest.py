@@ -0,0 +1,124 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from unittest import mock
+
+import build_manifest
+from build_manifest import BuildManifest, hash_file
+from inventory import scan_tree, stat_index
+
+
+class TestBuildManifest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        (self.root / "content").mkdir()
+        (self.root / "public").mkdir()
+        self.src = str(self.root / "content" / "index.md")
+        self.dest = str(self.root / "public" / "index.html")
+        Path(self.src).write_text("# Hello\n", encoding="utf-8")
+        Path(self.dest).write_text("<html></html>", encoding="utf-8")
+        self.path = self.root / ".build-manifest.json"
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _recorded(self):
+        manifest = BuildManifest(self.path)
+        manifest.begin("t", "c")
+        manifest.record(self.src, self.dest, hash_file(self.src))
+        manifest.save()
+        return BuildManifest.load(self.path)
+
+    def test_missing_manifest_marks_everything_stale(self):
+        manifest = BuildManifest.load(self.path)
+        stale, fresh, removed = manifest.plan([(self.src, self.dest)], "t", "c")
+        self.assertEqual([p[:2] for p in stale], [(self.src, self.dest)])
+        self.assertEqual(fresh, [])
+        self.assertEqual(removed, [])
+
+    def test_unchanged_page_is_fresh(self):
+        stale, fresh, removed = self._recorded().plan([(self.src, self.dest)], "t", "c")
+        self.assertEqual(stale, [])
+        self.assertEqual([p[:2] for p in fresh], [(self.src, self.dest)])
+
+    def test_matching_stat_skips_hashing(self):
+        stats = stat_index(scan_tree(self.root / "content"))
+        manifest = BuildManifest(self.path)
+        manifest.begin("t", "c")
+        manifest.record(self.src, self.dest, hash_file(self.src), stats[self.src])
+        with mock.patch.object(build_manifest, "hash_file", side_effect=AssertionError("hashed")):
+            stale, fresh, _ = manifest.plan([(self.src, self.dest)], "t", "c", stats)
+        self.assertEqual((len(stale), len(fresh)), (0, 1))
+        # a different mtime falls back to hashing, which still finds the page fresh
+        touched = {self.src: (stats[self.src][0], stats[self.src][1] + 1)}
+        stale, fresh, _ = manifest.plan([(self.src, self.dest)], "t", "c", touched)
+        self.assertEqual((len(stale), len(fresh)), (0, 1))
+
+    def test_edited_source_is_stale(self):
+        manifest = self._recorded()
+        Path(self.src).write_text("# Hello again\n", encoding="utf-8")
+        stale, fresh, _ = manifest.plan([(self.src, self.dest)], "t", "c")
+        self.assertEqual(len(stale), 1)
+        self.assertEqual(fresh, [])
+
+    def test_template_or_code_change_invalidates(self):
+        manifest = self._recorded()
+        self.assertEqual(len(manifest.plan([(self.src, self.dest)], "t2", "c")[0]), 1)
+        self.assertEqual(len(manifest.plan([(self.src, self.dest)], "t", "c2")[0]), 1)
+
+    def test_deleted_source_is_removed(self):
+        manifest = self._recorded()
+        stale, fresh, removed = manifest.plan([], "t", "c")
+        self.assertEqual(removed, [self.dest])
+
+    def test_missing_output_is_stale(self):
+        manifest = self._recorded()
+        os.remove(self.dest)
+        stale, _, _ = manifest.plan([(self.src, self.dest)], "t", "c")
+        self.assertEqual(len(stale), 1)
+
+    def test_stale_pages_have_a_reason(self):
+        page = [(self.src, self.dest)]
+        reasons = {}
+        BuildManifest.load(self.path).plan(page, "t", "c", reasons=reasons)
+        self.assertEqual(reasons, {self.dest: "no previous build"})
+        manifest = self._recorded()
+        for template_hash, code_hash, reason in (
+            ("t2", "c", "template changed"),
+            ("t", "c2", "generator code or options changed"),
+        ):
+            reasons = {}
+            manifest.plan(page, template_hash, code_hash, reasons=reasons)
+            self.assertEqual(reasons, {self.dest: reason})
+        Path(self.src).write_text("# Hello again\n", encoding="utf-8")
+        reasons = {}
+        manifest.plan(page, "t", "c", reasons=reasons)
+        self.assertEqual(reasons, {self.dest: "source changed"})
+
+    def test_begin_drops_records_when_inputs_change(self):
+        manifest = self._recorded()
+        manifest.begin("t2", "c")
+        self.assertEqual(manifest.pages, {})
+
+    def test_code_hash_covers_only_render_modules(self):
+        src = self.root / "src"
+        src.mkdir()
+        for name in ("markdown_to_html", "main", "sitemap"):
+            (src / f"{name}.py").write_text("x = 1\n", encoding="utf-8")
+        before = build_manifest.generator_code_hash(src)
+        (src / "main.py").write_text("x = 2\n", encoding="utf-8")
+        (src / "sitemap.py").write_text("x = 2\n", encoding="utf-8")
+        self.assertEqual(build_manifest.generator_code_hash(src), before)
+        (src / "markdown_to_html.py").write_text("x = 2\n", encoding="utf-8")
+        self.assertNotEqual(build_manifest.generator_code_hash(src), before)
+
+    def test_render_modules_exist(self):
+        for name in build_manifest.RENDER_MODULES:
+            self.assertTrue((build_manifest.SRC_DIR / f"{name}.py").is_file(), name)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,136 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import deploy
+from deploy import DeployManifest, replace_if_changed, same_content, write_if_changed
+from generate_page import stream_page, write_output
+from inventory import scan_tree
+
+
+class TestDeploy(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        self.public = self.root / "public"
+        self.public.mkdir()
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _age(self, path: Path) -> int:
+        # push the mtime into the past so a rewrite would be visible
+        os.utime(path, ns=(1_000_000_000, 1_000_000_000))
+        return path.stat().st_mtime_ns
+
+    def test_identical_output_is_not_rewritten(self):
+        page = self.public / "index.html"
+        self.assertTrue(write_output(str(page), "<p>hi</p>"))
+        mtime = self._age(page)
+        self.assertFalse(write_output(str(page), "<p>hi</p>"))
+        self.assertEqual(page.stat().st_mtime_ns, mtime)
+        # same size, different bytes
+        self.assertTrue(write_output(str(page), "<p>ho</p>"))
+        self.assertEqual(page.read_text(encoding="utf-8"), "<p>ho</p>")
+
+    def test_same_content(self):
+        page = self.public / "a.txt"
+        self.assertFalse(same_content(page, b"abc"))
+        write_if_changed(page, b"abc")
+        self.assertTrue(same_content(page, b"abc"))
+        self.assertFalse(same_content(page, b"abd"))
+        self.assertFalse(same_content(page, b"abcd"))
+
+    def test_failed_write_keeps_the_previous_file(self):
+        page = self.public / "a.txt"
+        write_if_changed(page, b"old")
+        with mock.patch.object(deploy.os, "replace", side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                write_if_changed(page, b"new")
+        self.assertEqual(page.read_bytes(), b"old")
+        self.assertEqual(sorted(p.name for p in self.public.iterdir()), ["a.txt"])
+
+    def test_replace_if_changed(self):
+        tmp, dest = self.public / ".a.tmp", self.public / "a"
+        tmp.write_bytes(b"one")
+        self.assertTrue(replace_if_changed(tmp, dest))
+        mtime = self._age(dest)
+        tmp.write_bytes(b"one")
+        self.assertFalse(replace_if_changed(tmp, dest))
+        self.assertFalse(tmp.exists())
+        self.assertEqual(dest.stat().st_mtime_ns, mtime)
+
+    def test_streamed_page_is_not_rewritten(self):
+        src = self.root / "big.md"
+        src.write_text("# Big\n\ntext\n", encoding="utf-8")
+        template = self.root / "template.html"
+        template.write_text("{{ Title }}{{ Content }}", encoding="utf-8")
+        dest = self.public / "big.html"
+        stream_page(str(src), str(template), str(dest))
+        mtime = self._age(dest)
+        stream_page(str(src), str(template), str(dest))
+        self.assertEqual(dest.stat().st_mtime_ns, mtime)
+        self.assertEqual(os.listdir(self.public), ["big.html"])
+        self.assertEqual(dest.read_text(encoding="utf-8"), "Big<div><h1>Big</h1><p>text</p></div>")
+
+    def test_delta_between_builds(self):
+        path = self.root / "deploy-manifest.json"
+        (self.public / "keep.html").write_text("keep", encoding="utf-8")
+        (self.public / "edit.html").write_text("old", encoding="utf-8")
+        (self.public / "gone.css").write_text("gone", encoding="utf-8")
+        first = DeployManifest.load(path)
+        self.assertEqual(first.update(scan_tree(self.public)).added, ["edit.html", "gone.css", "keep.html"])
+        first.save()
+
+        (self.public / "edit.html").write_text("new", encoding="utf-8")
+        (self.public / "gone.css").unlink()
+        (self.public / "img").mkdir()
+        (self.public / "img" / "a.png").write_bytes(b"png")
+        # rewritten with identical bytes: a new mtime, but not a change
+        (self.public / "keep.html").write_text("keep", encoding="utf-8")
+        second = DeployManifest.load(path)
+        delta = second.update(scan_tree(self.public))
+        self.assertEqual((delta.added, delta.changed, delta.removed), (["img/a.png"], ["edit.html"], ["gone.css"]))
+        self.assertEqual(second.files["img/a.png"]["size"], 3)
+        second.save()
+        self.assertEqual(DeployManifest.load(path).files, second.files)
+
+    def test_unchanged_stat_reuses_recorded_hash(self):
+        path = self.root / "deploy-manifest.json"
+        page = self.public / "a.html"
+        page.write_text("aaa", encoding="utf-8")
+        mtime = self._age(page)
+        first = DeployManifest(path)
+        first.update(scan_tree(self.public))
+        recorded = first.files["a.html"]["hash"]
+        # same size and mtime: trusted without reading the file
+        page.write_text("bbb", encoding="utf-8")
+        os.utime(page, ns=(mtime, mtime))
+        self.assertEqual(first.update(scan_tree(self.public)).changed, [])
+        self.assertEqual(first.files["a.html"]["hash"], recorded)
+
+    def test_refresh_updates_only_the_given_paths(self):
+        for name in ("a.html", "b.html", "c.html"):
+            (self.public / name).write_text(name, encoding="utf-8")
+        manifest = DeployManifest(self.root / "deploy-manifest.json")
+        manifest.update(scan_tree(self.public))
+        (self.public / "a.html").write_text("edited", encoding="utf-8")
+        (self.public / "b.html").write_text("edited", encoding="utf-8")
+        (self.public / "c.html").unlink()
+        (self.public / "d.html").write_text("new", encoding="utf-8")
+        self.assertEqual(manifest.refresh(self.public, ["a.html", "d.html"]), (["d.html"], ["a.html"], []))
+        # b.html was not refreshed, so its record is left alone
+        self.assertEqual(manifest.files["b.html"]["size"], len("b.html"))
+        # the delta accumulates until the next update()
+        delta = manifest.refresh(self.public, ["c.html", "d.html"])
+        self.assertEqual(delta, (["d.html"], ["a.html"], ["c.html"]))
+        self.assertEqual(sorted(manifest.files), ["a.html", "b.html", "d.html"])
+        (self.public / "d.html").unlink()
+        self.assertEqual(manifest.refresh(self.public, ["d.html"]), ([], ["a.html"], ["c.html"]))
+        self.assertEqual(manifest.update(scan_tree(self.public)), ([], ["b.html"], []))
+
+
+if __name__ == "__main__":
+    unittest.main()
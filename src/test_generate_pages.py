@@ -0,0 +1,89 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import generate_page
+from generate_page import collect_pages, generate_pages
+
+TEMPLATE = "<title>{{ Title }}</title><body>{{ Content }}</body>"
+
+
+class TestGeneratePages(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        self.content = self.root / "content"
+        (self.content / "blog" / "post").mkdir(parents=True)
+        (self.content / "index.md").write_text("# Home\n\nWelcome **in**", encoding="utf-8")
+        (self.content / "blog" / "post" / "index.md").write_text("# Post\n\n- a\n- b", encoding="utf-8")
+        (self.content / "blog" / "broken.md").write_text("no title here", encoding="utf-8")
+        self.template = self.root / "template.html"
+        self.template.write_text(TEMPLATE, encoding="utf-8")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _build(self, out_name, jobs):
+        out = self.root / out_name
+        pages = collect_pages(str(self.content), str(out))
+        results = list(generate_pages(pages, str(self.template), jobs))
+        return out, pages, results
+
+    def test_collect_pages_maps_md_to_html(self):
+        pages = collect_pages(str(self.content), "/out")
+        self.assertEqual(
+            [dest for _, dest in pages],
+            ["/out/blog/broken.html", "/out/blog/post/index.html", "/out/index.html"],
+        )
+
+    def test_parallel_output_matches_serial(self):
+        serial, pages, _ = self._build("serial", 1)
+        parallel, _, _ = self._build("parallel", 4)
+        for _, dest in pages:
+            rel = Path(dest).relative_to(serial)
+            if (serial / rel).exists():
+                self.assertEqual((serial / rel).read_bytes(), (parallel / rel).read_bytes())
+
+    def test_errors_are_collected_not_raised(self):
+        for jobs in (1, 4):
+            out, _, results = self._build(f"out{jobs}", jobs)
+            errors = [(Path(src).name, err) for src, _, err in results if err is not None]
+            self.assertEqual(len(errors), 1)
+            self.assertEqual(errors[0][0], "broken.md")
+            self.assertIn("ValueError", errors[0][1])
+            self.assertTrue((out / "index.html").exists())
+            self.assertTrue((out / "blog" / "post" / "index.html").exists())
+
+    def test_pipeline_keeps_order_and_reports_write_errors(self):
+        for i in range(40):
+            (self.content / f"p{i:02d}.md").write_text(f"# Page {i}\n\ntext {i}", encoding="utf-8")
+        out = self.root / "piped"
+        pages = collect_pages(str(self.content), str(out))
+        # a file where an output directory should be: that page alone fails
+        out.mkdir()
+        (out / "blog").write_text("not a directory", encoding="utf-8")
+        made = []
+        real_makedirs = os.makedirs
+
+        def makedirs(path, *args, **kwargs):
+            made.append(path)
+            return real_makedirs(path, *args, **kwargs)
+
+        with mock.patch.object(generate_page, "PIPELINE_DEPTH", 3), mock.patch.object(
+            os, "makedirs", makedirs
+        ), contextlib.redirect_stdout(io.StringIO()):
+            results = list(generate_pages(pages, str(self.template)))
+        self.assertEqual([(src, dest) for src, dest, _ in results], pages)
+        failed = sorted(Path(src).name for src, _, err in results if err is not None)
+        self.assertEqual(failed, ["broken.md", "index.md"])
+        self.assertEqual(len(made), len(set(made)))
+        for i in range(40):
+            self.assertIn(f"text {i}", (out / f"p{i:02d}.html").read_text(encoding="utf-8"))
+
+
+if __name__ == "__main__":
+    unittest.main()
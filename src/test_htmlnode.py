@@ -28,6 +28,13 @@ class TestHTMLNode(unittest.TestCase):
         self.assertIn("children=", r)
         self.assertTrue(("props={'class': 'lead'}" in r) or ('props={"class": "lead"}' in r))
 
+    def test_slotted_nodes_have_no_instance_dict(self):
+        from leafnode import LeafNode
+        from parentnode import ParentNode
+        leaf = LeafNode("b", "x")
+        for node in (HTMLNode("p"), leaf, ParentNode("p", [leaf])):
+            self.assertFalse(hasattr(node, "__dict__"))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,129 @@
+import os
+import struct
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import image_size
+import render_cache
+from image_size import ImageSizes, read_size
+from markdown_to_html import markdown_to_html_node
+from text_to_html import text_node_to_html_node
+from textnode import TextNode, TextType
+
+
+def png(width: int, height: int) -> bytes:
+    ihdr = struct.pack(">II", width, height) + b"\x08\x06\x00\x00\x00"
+    return b"\x89PNG\r\n\x1a\n" + struct.pack(">I", 13) + b"IHDR" + ihdr + b"\0\0\0\0"
+
+
+def gif(width: int, height: int) -> bytes:
+    return b"GIF89a" + struct.pack("<HH", width, height) + b"\0\0\0"
+
+
+def jpeg(width: int, height: int) -> bytes:
+    exif = b"\xff\xe1" + struct.pack(">H", 2 + 300) + b"x" * 300
+    frame = b"\xff\xc0" + struct.pack(">HBHHB", 11, 8, height, width, 1) + b"\x01\x11\x00"
+    return b"\xff\xd8" + exif + b"\xff\xff" + frame + b"\xff\xda\x00\x02"
+
+
+def webp(chunk: bytes, payload: bytes) -> bytes:
+    data = b"WEBP" + chunk + struct.pack("<I", len(payload)) + payload
+    return b"RIFF" + struct.pack("<I", len(data)) + data
+
+
+class TestReadSize(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self._tmp.name)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _size(self, data: bytes):
+        path = self.dir / "image"
+        path.write_bytes(data)
+        return read_size(path)
+
+    def test_formats(self):
+        self.assertEqual(self._size(png(640, 480)), (640, 480))
+        self.assertEqual(self._size(gif(16, 9)), (16, 9))
+        self.assertEqual(self._size(jpeg(1024, 768)), (1024, 768))
+        vp8 = b"\x00\x00\x00\x9d\x01\x2a" + struct.pack("<HH", 300, 200) + b"\0" * 4
+        self.assertEqual(self._size(webp(b"VP8 ", vp8)), (300, 200))
+        vp8l = b"\x2f" + struct.pack("<I", (300 - 1) | ((200 - 1) << 14)) + b"\0" * 8
+        self.assertEqual(self._size(webp(b"VP8L", vp8l)), (300, 200))
+        vp8x = b"\0" * 4 + (5000 - 1).to_bytes(3, "little") + (4000 - 1).to_bytes(3, "little")
+        self.assertEqual(self._size(webp(b"VP8X", vp8x)), (5000, 4000))
+
+    def test_other_or_broken_files(self):
+        self.assertIsNone(self._size(b"<svg></svg>"))
+        self.assertIsNone(self._size(b""))
+        self.assertIsNone(self._size(jpeg(10, 10)[:200]))
+        self.assertIsNone(read_size(self.dir / "missing.png"))
+
+
+class TestImageSizes(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        self.static = self.root / "static"
+        (self.static / "images").mkdir(parents=True)
+        self.image = self.static / "images" / "a b.png"
+        self.image.write_bytes(png(640, 480))
+        self.cache = self.root / "sizes.json"
+
+    def tearDown(self):
+        image_size.disable()
+        render_cache.disable()
+        self._tmp.cleanup()
+
+    def test_sizes_are_cached_by_path_size_and_mtime(self):
+        sizes = ImageSizes(self.cache, self.static)
+        with mock.patch.object(image_size, "read_size", wraps=read_size) as read:
+            self.assertEqual(sizes.size("/images/a%20b.png"), (640, 480))
+            self.assertEqual(sizes.size("/images/a%20b.png?v=1"), (640, 480))
+            self.assertEqual(read.call_count, 1)
+            sizes.save()
+            loaded = ImageSizes.load(self.cache, self.static)
+            self.assertEqual(loaded.size("/images/a%20b.png"), (640, 480))
+            self.assertEqual(read.call_count, 1)
+
+            self.image.write_bytes(png(32, 32))
+            os.utime(self.image, ns=(1, 1))
+            self.assertEqual(loaded.size("/images/a%20b.png"), (32, 32))
+            self.assertEqual(read.call_count, 2)
+
+    def test_only_local_absolute_urls_are_sized(self):
+        sizes = ImageSizes(None, self.static)
+        for url in ("images/a b.png", "//cdn.example.com/a.png", "https://example.com/a.png", "/images/missing.png"):
+            self.assertIsNone(sizes.size(url))
+        self.assertEqual(sizes.attributes("a.png"), {"loading": "lazy", "decoding": "async"})
+
+    def test_img_tags(self):
+        node = TextNode("A", TextType.IMAGE, "/images/a%20b.png")
+        self.assertEqual(text_node_to_html_node(node).to_html(), '<img src="/images/a%20b.png" alt="A"></img>')
+        image_size.enable(None, self.static)
+        self.assertEqual(
+            text_node_to_html_node(node).to_html(),
+            '<img src="/images/a%20b.png" alt="A" width="640" height="480" loading="lazy" decoding="async"></img>',
+        )
+
+    def test_cached_blocks_follow_image_changes(self):
+        render_cache.enable()
+        md = "![A](/images/a%20b.png)\n\nNo image here"
+        plain = markdown_to_html_node(md).to_html()
+        image_size.enable(None, self.static)
+        self.assertIn('width="640"', markdown_to_html_node(md).to_html())
+        self.image.write_bytes(png(32, 32))
+        os.utime(self.image, ns=(1, 1))
+        self.assertIn('width="32"', markdown_to_html_node(md).to_html())
+        image_size.disable()
+        self.assertEqual(markdown_to_html_node(md).to_html(), plain)
+        # the block without images was cached once, whatever the option
+        self.assertEqual(render_cache.active().stats["misses"], 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
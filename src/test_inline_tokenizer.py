@@ -0,0 +1,68 @@
+import unittest
+from inline_tokenizer import tokenize_inline
+from split_delimiter import split_nodes_delimiter
+from split_images_links import split_nodes_image, split_nodes_link
+from textnode import TextNode, TextType
+
+
+def split_pipeline(text):
+    nodes = [TextNode(text, TextType.TEXT)]
+    nodes = split_nodes_image(nodes)
+    nodes = split_nodes_link(nodes)
+    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
+    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
+    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
+    return nodes
+
+
+class TestInlineTokenizer(unittest.TestCase):
+    def test_mixed_inline(self):
+        nodes = tokenize_inline("a **b** _c_ `d` ![e](f.png) [g](h)")
+        self.assertEqual(
+            nodes,
+            [
+                TextNode("a ", TextType.TEXT),
+                TextNode("b", TextType.BOLD),
+                TextNode(" ", TextType.TEXT),
+                TextNode("c", TextType.ITALIC),
+                TextNode(" ", TextType.TEXT),
+                TextNode("d", TextType.CODE),
+                TextNode(" ", TextType.TEXT),
+                TextNode("e", TextType.IMAGE, "f.png"),
+                TextNode(" ", TextType.TEXT),
+                TextNode("g", TextType.LINK, "h"),
+            ],
+        )
+
+    def test_link_url_underscores_are_not_italic(self):
+        nodes = tokenize_inline("see [docs](/a_b_c) now")
+        self.assertEqual(nodes[1], TextNode("docs", TextType.LINK, "/a_b_c"))
+
+    def test_matches_split_pipeline(self):
+        cases = [
+            "plain text",
+            "a `**not bold**` b",
+            "**bold with _underscores_ inside**",
+            "***a***",
+            "``",
+            "x ![i](a.png)[l](b) y",
+            "![lead](a.png) middle ![tail](b.png)",
+            "[same](1) and [same](1) again",
+            "!![img](x) ![no]",
+            "_a_ **b** `c` _d_",
+        ]
+        for text in cases:
+            with self.subTest(text=text):
+                self.assertEqual(tokenize_inline(text), split_pipeline(text))
+
+    def test_unclosed_delimiters_raise(self):
+        for text in ["a `b", "a **b", "a _b", "**a `b` c**", "_a **b** c_", "`[x](y)`"]:
+            with self.subTest(text=text):
+                with self.assertRaises(ValueError):
+                    split_pipeline(text)
+                with self.assertRaises(ValueError):
+                    tokenize_inline(text)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from generate_page import collect_pages
+from inventory import scan_tree, stat_index
+
+
+def legacy_collect(content, dest):
+    """collect_pages as it was: a sorted recursive os.listdir walk."""
+    pages = []
+    for entry in sorted(os.listdir(content)):
+        entry_path = os.path.join(content, entry)
+        dest_path = os.path.join(dest, entry)
+        if os.path.isfile(entry_path) and entry_path.endswith(".md"):
+            pages.append((entry_path, os.path.splitext(dest_path)[0] + ".html"))
+        elif os.path.isdir(entry_path):
+            pages.extend(legacy_collect(entry_path, dest_path))
+    return pages
+
+
+class TestInventory(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        for rel in ["index.md", "blog.md", "blog/z.md", "blog/a/post.md", "blog/a.b.md", "b/notes.txt", "A.md"]:
+            path = self.root / rel
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(rel, encoding="utf-8")
+        (self.root / "empty").mkdir()
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_sorted_like_a_recursive_listdir_walk(self):
+        rels = [f.rel for f in scan_tree(self.root)]
+        self.assertEqual(
+            rels, ["A.md", "b/notes.txt", "blog/a/post.md", "blog/a.b.md", "blog/z.md", "blog.md", "index.md"]
+        )
+        self.assertEqual(collect_pages(str(self.root), "/out"), legacy_collect(str(self.root), "/out"))
+
+    def test_suffix_filter_and_stat(self):
+        files = scan_tree(self.root, ".md")
+        self.assertNotIn("b/notes.txt", [f.rel for f in files])
+        first = files[0]
+        st = os.stat(first.path)
+        self.assertEqual(first.path, os.path.join(str(self.root), "A.md"))
+        self.assertEqual((first.size, first.mtime_ns), (st.st_size, st.st_mtime_ns))
+        self.assertEqual(stat_index(files)[first.path], (st.st_size, st.st_mtime_ns))
+
+    def test_missing_root_is_empty(self):
+        self.assertEqual(scan_tree(self.root / "missing"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+import contextlib
+import io
+import tempfile
+import unittest
+from pathlib import Path
+
+import link_check
+import page_info
+import render_cache
+import site_index
+from build_manifest import BuildManifest
+from generate_page import collect_pages, generate_pages
+from link_check import BrokenRef, LinkChecker, site_targets
+from main import build_pages
+from markdown_to_html import markdown_to_html_node
+
+MD = """# Home
+
+Read the [post](/blog/post/) and
+the [missing one](/blog/gone) or
+[a relative one](blog/post/index.html).
+
+![logo](/img/logo.png) ![nope](img/nope.png)
+
+- [out](https://example.com/x) and [top](#top)
+"""
+
+
+class TestPageRefs(unittest.TestCase):
+    def tearDown(self):
+        page_info.end()
+        render_cache.disable()
+
+    def _refs(self):
+        summary = page_info.begin(full=False, refs=True)
+        markdown_to_html_node(MD)
+        page_info.end()
+        return summary.refs
+
+    def test_refs_have_their_block_line(self):
+        refs = self._refs()
+        self.assertEqual(
+            refs.links,
+            [
+                (3, "/blog/post/"),
+                (3, "/blog/gone"),
+                (3, "blog/post/index.html"),
+                (9, "https://example.com/x"),
+                (9, "#top"),
+            ],
+        )
+        self.assertEqual(refs.images, [(7, "/img/logo.png"), (7, "img/nope.png")])
+
+    def test_cached_blocks_give_the_same_refs(self):
+        plain = self._refs()
+        render_cache.enable()
+        for _ in range(2):
+            refs = self._refs()
+            self.assertEqual((refs.links, refs.images), (plain.links, plain.images))
+
+
+class TestLinkChecker(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        self.content = self.root / "content"
+        (self.content / "blog" / "post").mkdir(parents=True)
+        (self.content / "index.md").write_text(MD, encoding="utf-8")
+        (self.content / "blog" / "post" / "index.md").write_text("# Post\n\n[home](/) [up](../../)\n", encoding="utf-8")
+        (self.root / "static" / "img").mkdir(parents=True)
+        (self.root / "static" / "img" / "logo.png").write_bytes(b"png")
+        self.template = self.root / "template.html"
+        self.template.write_text("{{ Title }}{{ Content }}", encoding="utf-8")
+        self.public = self.root / "public"
+        self.pages = collect_pages(str(self.content), str(self.public))
+        self.targets = site_targets(["index.html", "blog/post/index.html"], self.root / "static")
+        self.expected = [
+            BrokenRef(str(self.content / "index.md"), 4, "/blog/gone", "link"),
+            BrokenRef(str(self.content / "index.md"), 7, "img/nope.png", "image"),
+        ]
+
+    def tearDown(self):
+        link_check.disable()
+        site_index.disable()
+        self._tmp.cleanup()
+
+    def test_site_targets(self):
+        self.assertEqual(self.targets, {"index.html", "blog/post/index.html", "img/logo.png"})
+
+    def test_broken_refs_are_found_while_rendering(self):
+        for jobs in (1, 2):
+            with self.subTest(jobs=jobs):
+                checker = link_check.enable(self.targets, self.public)
+                with contextlib.redirect_stdout(io.StringIO()):
+                    list(generate_pages(self.pages, str(self.template), jobs=jobs))
+                self.assertEqual(sorted(checker.take_updates()), self.expected)
+
+    def test_unchanged_pages_are_checked_from_the_site_index(self):
+        manifest = BuildManifest(self.root / "manifest.json")
+        site_index.enable(self.root / "index.sqlite", self.root)
+        with contextlib.redirect_stdout(io.StringIO()):
+            build_pages(self.pages, self.template, manifest)
+            checker = link_check.enable(self.targets, self.public)
+            build_pages(self.pages, self.template, manifest)
+        # not rendered again: the exact lines come from the sources
+        self.assertEqual(sorted(checker.take_updates()), self.expected)
+
+    def test_no_targets_checked_without_refs(self):
+        checker = LinkChecker(frozenset(), self.public)
+        summary = page_info.PageSummary(refs=True)
+        self.assertEqual(checker.check(str(self.content / "index.md"), str(self.public / "index.html"), summary), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,3 +1,4 @@
+import io
 import unittest
 from parentnode import ParentNode
 from leafnode import LeafNode
@@ -39,6 +40,32 @@ class TestParentNode(unittest.TestCase):
         with self.assertRaises(ValueError):
             ParentNode("div", []).to_html()
 
+    def _tree(self):
+        return ParentNode(
+            "div",
+            [ParentNode("p", [LeafNode(None, "caf\u00e9 "), LeafNode("a", "x", {"href": "/y"})])],
+        )
+
+    def test_render_to_text_sink(self):
+        buf = io.StringIO()
+        self._tree().render_to(buf)
+        self.assertEqual(buf.getvalue(), self._tree().to_html())
+
+    def test_render_to_binary_sink(self):
+        buf = io.BytesIO()
+        self._tree().render_to(buf)
+        self.assertEqual(buf.getvalue(), self._tree().to_html().encode("utf-8"))
+
+    def test_render_to_callable(self):
+        parts = []
+        self._tree().render_to(parts.append)
+        self.assertGreater(len(parts), 1)
+        self.assertEqual("".join(parts), '<div><p>caf\u00e9 <a href="/y">x</a></p></div>')
+
+    def test_render_to_validates_nested_nodes(self):
+        with self.assertRaises(ValueError):
+            ParentNode("div", [ParentNode("p", [])]).render_to(io.StringIO())
+
 
 if __name__ == "__main__":
     unittest.main()
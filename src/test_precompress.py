@@ -0,0 +1,97 @@
+import gzip
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from deploy import DeployManifest
+from inventory import scan_tree
+from precompress import Precompressor, gzip_file, remove_sidecars
+
+HTML = "<html>" + "<p>hello world</p>" * 200 + "</html>"
+
+
+class TestPrecompress(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        self.public = self.root / "public"
+        (self.public / "css").mkdir(parents=True)
+        (self.public / "index.html").write_text(HTML, encoding="utf-8")
+        (self.public / "css" / "site.css").write_text("body { margin: 0 }\n" * 100, encoding="utf-8")
+        (self.public / "tiny.html").write_text("<p>x</p>", encoding="utf-8")
+        (self.public / "logo.png").write_bytes(os.urandom(4096))
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _build(self, previous: DeployManifest, jobs: int = 1, level: int = 9):
+        compressor = Precompressor(self.public, previous.files, level, 1024, jobs, previous.gzip)
+        compressor.sweep(scan_tree(self.public))
+        result = compressor.finish()
+        previous.update(scan_tree(self.public))
+        previous.gzip = compressor.settings()
+        return result
+
+    def test_gzip_file_is_deterministic_and_round_trips(self):
+        path = str(self.public / "index.html")
+        size, compressed = gzip_file(path)
+        self.assertEqual(size, len(HTML))
+        first = Path(path + ".gz").read_bytes()
+        self.assertEqual(len(first), compressed)
+        self.assertEqual(gzip.decompress(first).decode("utf-8"), HTML)
+        gzip_file(path)
+        self.assertEqual(Path(path + ".gz").read_bytes(), first)
+
+    def test_only_large_text_files_get_sidecars(self):
+        result = self._build(DeployManifest(self.root / "deploy.json"), jobs=2)
+        self.assertEqual(result.compressed, ["css/site.css", "index.html"])
+        self.assertEqual(result.errors, [])
+        self.assertFalse((self.public / "tiny.html.gz").exists())
+        self.assertFalse((self.public / "logo.png.gz").exists())
+        self.assertGreater(result.saved, 0)
+        self.assertEqual(result.bytes_out, sum(os.path.getsize(p) for p in self.public.rglob("*.gz")))
+
+    def test_unchanged_files_are_skipped(self):
+        deploy = DeployManifest(self.root / "deploy.json")
+        first = self._build(deploy)
+        second = self._build(deploy)
+        self.assertEqual(second.compressed, [])
+        self.assertEqual(second.unchanged, ["css/site.css", "index.html"])
+        self.assertEqual(second.saved, first.saved)
+
+        # rewritten with the same bytes: hashed, not recompressed
+        (self.public / "index.html").write_text(HTML, encoding="utf-8")
+        (self.public / "css" / "site.css").write_text("p { color: red }\n" * 100, encoding="utf-8")
+        third = self._build(deploy)
+        self.assertEqual((third.compressed, third.unchanged), (["css/site.css"], ["index.html"]))
+        css = gzip.decompress((self.public / "css" / "site.css.gz").read_bytes()).decode("utf-8")
+        self.assertTrue(css.startswith("p { color: red }"))
+
+        # a new level recompresses everything
+        fourth = self._build(deploy, level=1)
+        self.assertEqual(fourth.compressed, ["css/site.css", "index.html"])
+
+    def test_submitted_pages_are_compressed_once(self):
+        compressor = Precompressor(self.public, {}, jobs=1)
+        compressor.submit(str(self.public / "index.html"))
+        compressor.sweep(scan_tree(self.public))
+        self.assertEqual(compressor.finish().compressed, ["css/site.css", "index.html"])
+
+    def test_static_sidecar_is_not_overwritten(self):
+        (self.public / "index.html.gz").write_bytes(b"owned by static/")
+        compressor = Precompressor(self.public, {})
+        compressor.sweep(scan_tree(self.public), exclude={"index.html.gz"})
+        self.assertEqual(compressor.finish().compressed, ["css/site.css"])
+        self.assertEqual((self.public / "index.html.gz").read_bytes(), b"owned by static/")
+
+    def test_remove_sidecars(self):
+        gzip_file(str(self.public / "index.html"))
+        gzip_file(str(self.public / "css" / "site.css"))
+        removed = remove_sidecars(self.public, ["index.html", "css/site.css", "missing.html"], {"css/site.css.gz"})
+        self.assertEqual(removed, ["index.html.gz"])
+        self.assertTrue((self.public / "css" / "site.css.gz").exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
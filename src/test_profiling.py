@@ -0,0 +1,70 @@
+import contextlib
+import io
+import tempfile
+import unittest
+from pathlib import Path
+
+import generate_page
+import markdown_to_html
+import profiling
+
+
+class TestProfiling(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        root = Path(self._tmp.name)
+        self.src = root / "page.md"
+        self.src.write_text("# Title\n\nSome **bold** text\n\n- a\n- b\n", encoding="utf-8")
+        self.template = root / "template.html"
+        self.template.write_text("<title>{{ Title }}</title>{{ Content }}", encoding="utf-8")
+        self.dest = root / "out" / "page.html"
+
+    def tearDown(self):
+        profiling.disable()
+        self._tmp.cleanup()
+
+    def build(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_page.generate_page(str(self.src), str(self.template), str(self.dest))
+
+    def test_disabled_leaves_functions_untouched(self):
+        original = markdown_to_html.text_to_textnodes
+        self.assertFalse(profiling.is_enabled())
+        self.assertIsNone(profiling.take_pages())
+        profiling.enable()
+        self.assertIsNot(markdown_to_html.text_to_textnodes, original)
+        profiling.disable()
+        self.assertIs(markdown_to_html.text_to_textnodes, original)
+
+    def test_records_every_stage_per_page(self):
+        profiling.enable()
+        self.build()
+        pages = profiling.take_pages()
+        self.assertEqual(len(pages), 1)
+        record = pages[0]
+        self.assertEqual(record["page"], str(self.src))
+        self.assertEqual(set(record["stages"]), set(profiling.STAGE_NAMES))
+        self.assertEqual(record["stages"]["block_classify"]["calls"], 3)
+        self.assertLessEqual(sum(s["seconds"] for s in record["stages"].values()), record["total"])
+
+    def test_profiled_output_matches_unprofiled(self):
+        self.build()
+        plain = self.dest.read_bytes()
+        profiling.enable()
+        self.build()
+        self.assertEqual(self.dest.read_bytes(), plain)
+
+    def test_report_aggregates_and_formats(self):
+        profiling.enable()
+        self.build()
+        self.build()
+        report = profiling.build_report(profiling.take_pages())
+        self.assertEqual(report["pages_profiled"], 2)
+        self.assertEqual(report["aggregate"]["read"]["calls"], 2)
+        text = profiling.format_report(report)
+        self.assertIn("Slowest 2 pages", text)
+        self.assertIn(str(self.src), text)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+import contextlib
+import io
+import tempfile
+import unittest
+from pathlib import Path
+
+import render_cache
+from generate_page import collect_pages, generate_pages
+from markdown_to_html import markdown_to_html_node
+from render_cache import RenderCache
+
+MD = "# Title\n\nShared **disclaimer** text\n\n```\ncode\n\nsample\n```\n\nShared **disclaimer** text"
+
+
+class TestRenderCache(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.root = Path(self._tmp.name)
+
+    def tearDown(self):
+        render_cache.disable()
+
+    def _cache(self, *args, **kwargs) -> RenderCache:
+        cache = RenderCache(*args, **kwargs)
+        self.addCleanup(cache.close)
+        return cache
+
+    def test_cached_render_matches_uncached(self):
+        plain = markdown_to_html_node(MD).to_html()
+        render_cache.enable()
+        self.assertEqual(markdown_to_html_node(MD).to_html(), plain)
+        self.assertEqual(markdown_to_html_node(MD).to_html(), plain)
+        # 4 blocks per render; only the first render's 3 distinct blocks miss
+        self.assertEqual(render_cache.take_updates()["stats"], {"memory_hits": 5, "disk_hits": 0, "misses": 3})
+
+    def test_key_depends_on_version_and_lines(self):
+        a = self._cache(version="1")
+        self.assertEqual(a.key(["x", "y"]), self._cache(version="1").key(["x", "y"]))
+        self.assertNotEqual(a.key(["x", "y"]), self._cache(version="2").key(["x", "y"]))
+        self.assertNotEqual(a.key(["x", "y"]), a.key(["x y"]))
+
+    def test_memory_lru_is_bounded(self):
+        cache = self._cache(memory_bytes=10, version="v")
+        cache.put("a", "12345")
+        cache.put("b", "12345")
+        self.assertEqual(cache.get("a"), "12345")  # a is now most recent
+        cache.put("c", "12345")
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), "12345")
+        self.assertEqual(cache.get("c"), "12345")
+
+    def test_disk_entries_survive_across_instances(self):
+        db = self.root / "cache.sqlite"
+        first = self._cache(db, version="v")
+        first.put(first.key(["block"]), "<p>block</p>")
+        self.assertIsNone(self._cache(db, version="v").get(first.key(["block"])))  # not flushed yet
+        first.close()
+        second = self._cache(db, version="v")
+        self.assertEqual(second.get(second.key(["block"])), "<p>block</p>")
+        self.assertEqual(second.stats["disk_hits"], 1)
+        other = self._cache(db, version="w")
+        self.assertIsNone(other.get(other.key(["block"])))
+
+    def test_prune_evicts_least_recently_used(self):
+        db = self.root / "cache.sqlite"
+        cache = self._cache(db, disk_bytes=20, version="v")
+        for name in ["old", "mid", "new"]:
+            cache.put(cache.key([name]), "x" * 10)
+            cache.flush()
+        self.assertEqual(cache.get(cache.key(["old"])), "x" * 10)  # memory hit: recency on disk unchanged
+        self.assertEqual(cache.prune(), 1)
+        fresh = self._cache(db, version="v")
+        self.assertIsNone(fresh.get(fresh.key(["old"])))
+        self.assertEqual(fresh.get(fresh.key(["new"])), "x" * 10)
+        self.assertEqual(fresh.get(fresh.key(["mid"])), "x" * 10)
+        # reading "mid" from disk makes it the most recent entry
+        fresh.put(fresh.key(["newest"]), "x" * 10)
+        fresh.disk_bytes = 20
+        self.assertEqual(fresh.prune(), 1)
+        self.assertEqual(self._cache(db, version="v").get(fresh.key(["mid"])), "x" * 10)
+
+    def test_worker_updates_are_merged_and_flushed(self):
+        db = self.root / "cache.sqlite"
+        worker = self._cache(db, version="v")
+        worker.put(worker.key(["a"]), "<p>a</p>")
+        worker.get(worker.key(["b"]))
+        parent = self._cache(db, version="v")
+        parent.merge(worker.take_updates())
+        self.assertEqual(parent.stats["misses"], 1)
+        self.assertEqual(worker.stats["misses"], 0)
+        parent.flush()
+        self.assertEqual(self._cache(db, version="v").get(worker.key(["a"])), "<p>a</p>")
+
+    def test_reset_drops_pending_blocks_unwritten(self):
+        # what a forked worker does with the parent's cache it inherited
+        db = self.root / "cache.sqlite"
+        inherited = render_cache.enable(db, version="v")
+        inherited.put(inherited.key(["a"]), "<p>a</p>")
+        render_cache.reset()
+        self.assertIsNone(render_cache.active())
+        self.assertIsNone(self._cache(db, version="v").get(inherited.key(["a"])))
+        inherited.take_updates()
+        inherited.close()
+
+    def test_worker_stats_are_collected(self):
+        content = self.root / "content"
+        content.mkdir()
+        for name in ("a", "b", "c"):
+            (content / f"{name}.md").write_text(MD, encoding="utf-8")
+        template = self.root / "template.html"
+        template.write_text("{{ Title }}{{ Content }}", encoding="utf-8")
+        pages = collect_pages(str(content), str(self.root / "out"))
+        cache = render_cache.enable(self.root / "cache.sqlite")
+        with contextlib.redirect_stdout(io.StringIO()):
+            results = list(generate_pages(pages, str(template), jobs=2))
+        self.assertEqual([error for _, _, error in results], [None, None, None])
+        self.assertEqual(sum(cache.stats.values()), 12)
+        self.assertGreaterEqual(cache.stats["misses"], 3)
+        cache.flush()
+        fresh = self._cache(self.root / "cache.sqlite")
+        self.assertEqual(fresh.get(fresh.key(["Shared **disclaimer** text"])), "<p>Shared <b>disclaimer</b> text</p>")
+
+
+if __name__ == "__main__":
+    unittest.main()
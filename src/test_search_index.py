@@ -0,0 +1,119 @@
+import contextlib
+import io
+import json
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+import site_index
+from build_manifest import BuildManifest
+from generate_page import collect_pages
+from main import build_pages, write_section_feed
+from page_info import search_terms, term_shard
+from search_index import write_search_index
+from site_index import page_url
+
+
+class TestSearchTerms(unittest.TestCase):
+    def test_terms_are_lowercased_words_without_stop_words(self):
+        terms = search_terms("The Ring of Power_Rangers, x 42 Ünïcode")
+        self.assertEqual(terms, ["ring", "power", "rangers", "42", "ünïcode"])
+
+    def test_term_shard_is_a_safe_name(self):
+        self.assertEqual(term_shard("ring"), "7269")
+        self.assertEqual(term_shard("ü"), "c3bc")
+
+    def test_page_url(self):
+        public = Path("/site/public")
+        self.assertEqual(page_url(public / "index.html", public), "/")
+        self.assertEqual(page_url(public / "blog" / "post" / "index.html", public), "/blog/post/")
+        self.assertEqual(page_url(public / "about.html", public), "/about.html")
+
+
+class TestSearchIndex(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        self.content = self.root / "content"
+        (self.content / "blog").mkdir(parents=True)
+        (self.content / "index.md").write_text("# Home\n\nWelcome to the shire\n", encoding="utf-8")
+        (self.content / "blog" / "ring.md").write_text("# The Ring\n\nOne ring to rule them\n", encoding="utf-8")
+        self.template = self.root / "template.html"
+        self.template.write_text("{{ Title }}{{ Content }}", encoding="utf-8")
+        self.public = self.root / "public"
+        self.search = self.public / "search"
+        self.manifest = BuildManifest(self.root / "manifest.json")
+        self.index = site_index.enable(self.root / "index.sqlite", self.root, search=True)
+
+    def tearDown(self):
+        site_index.disable()
+        self._tmp.cleanup()
+
+    def _build(self):
+        pages = collect_pages(str(self.content), str(self.public))
+        with contextlib.redirect_stdout(io.StringIO()):
+            build_pages(pages, self.template, self.manifest)
+        return write_search_index(self.index, self.public)
+
+    def _shard(self, term: str):
+        path = self.search / "terms" / f"{term_shard(term)}.json"
+        return json.loads(path.read_text(encoding="utf-8")) if path.exists() else {}
+
+    def _docs(self):
+        return json.loads((self.search / "docs" / "0.json").read_text(encoding="utf-8"))
+
+    def test_postings_and_documents(self):
+        self._build()
+        docs = self._docs()
+        ids = {url: int(page_id) for page_id, (url, _) in docs.items()}
+        self.assertEqual(sorted(ids), ["/", "/blog/ring.html"])
+        # heading words weigh more than body words
+        self.assertEqual(self._shard("ring")["ring"], [[ids["/blog/ring.html"], 3 + 1]])
+        self.assertNotIn("the", self._shard("the"))
+        meta = json.loads((self.search / "index.json").read_text(encoding="utf-8"))
+        self.assertEqual((meta["pages"], meta["term_prefix"]), (2, 2))
+
+    def test_only_affected_shards_are_rewritten(self):
+        first = self._build()
+        self.assertGreater(first.written, 0)
+        self.assertEqual(self._build(), (0, 0, 0))
+
+        (self.content / "blog" / "ring.md").write_text("# The Ring\n\nOne ring to find them\n", encoding="utf-8")
+        second = self._build()
+        # "rule" leaves the ru shard, "find" joins fi, and the docs shard is rechecked
+        self.assertEqual(second.removed, 1)
+        self.assertFalse((self.search / "terms" / f"{term_shard('rule')}.json").exists())
+        self.assertIn("find", self._shard("find"))
+        self.assertLess(second.written + second.unchanged, first.written)
+
+        (self.content / "blog" / "ring.md").unlink()
+        self._build()
+        self.assertEqual([url for url, _ in self._docs().values()], ["/"])
+        self.assertEqual(self._shard("ring"), {})
+
+    def test_deleted_page_leaves_the_index_on_a_clean_build(self):
+        self._build()
+        (self.content / "blog" / "ring.md").unlink()
+        # a clean build starts from an empty manifest, which knows of no removed page
+        shutil.rmtree(self.public)
+        self.manifest = BuildManifest(self.root / "manifest.json")
+        self._build()
+        self.assertEqual([url for url, _ in self._docs().values()], ["/"])
+        self.assertEqual(self._shard("ring"), {})
+        with contextlib.redirect_stdout(io.StringIO()):
+            write_section_feed(self.index, self.public, "blog", "https://example.com", {})
+        feed = (self.public / "blog" / "feed.xml").read_text(encoding="utf-8")
+        self.assertNotIn("The Ring", feed)
+        # the author defaults to the home page's title
+        self.assertIn("<name>Home</name>", feed)
+
+    def test_missing_shards_are_rewritten(self):
+        self._build()
+        (self.search / "terms" / f"{term_shard('shire')}.json").unlink()
+        self.assertEqual(self._build().written, 1)
+        self.assertIn("shire", self._shard("shire"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,217 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import page_info
+import render_cache
+import site_index
+from build_manifest import BuildManifest, hash_file
+from generate_page import collect_pages, generate_pages
+from main import build_pages
+from markdown_to_html import markdown_to_html_node
+from page_info import BlockInfo
+from site_index import SiteIndex, local_path
+
+MD = """# Hello **World**
+
+Some [docs](/docs) and ![logo](/img/logo.png) here.
+
+```
+# not a heading, not words
+```
+
+## Next _steps_
+
+- see [a](/a)
+- and [b](https://example.com/b)
+"""
+
+
+class TestPageInfo(unittest.TestCase):
+    def tearDown(self):
+        page_info.end()
+        render_cache.disable()
+
+    def _summary(self, markdown: str):
+        summary = page_info.begin()
+        markdown_to_html_node(markdown)
+        page_info.end()
+        return summary
+
+    def test_summary_from_textnodes(self):
+        summary = self._summary(MD)
+        self.assertEqual(summary.headings(), [(1, "Hello World"), (2, "Next steps")])
+        self.assertEqual(summary.links(), ["/docs", "/a", "https://example.com/b"])
+        self.assertEqual(summary.images(), ["/img/logo.png"])
+        # 2 + 4 + 2 + 2 + 2: image alt text and code are not counted
+        self.assertEqual(summary.words(), 12)
+
+    def test_cached_blocks_keep_their_info(self):
+        plain = self._summary(MD).blocks
+        render_cache.enable()
+        self.assertEqual(self._summary(MD).blocks, plain)
+        self.assertEqual(self._summary(MD).blocks, plain)
+        self.assertEqual(render_cache.active().stats["misses"], 5)
+
+    def test_block_info_json_round_trip(self):
+        info = BlockInfo(2, "Title", 3, ["/a"], ["/b.png"])
+        self.assertEqual(BlockInfo.from_json(info.to_json()), info)
+
+    def test_no_summary_outside_a_page(self):
+        self.assertIsNone(page_info.current())
+        markdown_to_html_node(MD)
+        self.assertIsNone(page_info.current())
+
+
+class TestLocalPath(unittest.TestCase):
+    def test_resolves_against_the_page_url(self):
+        self.assertEqual(local_path("/img/a.png", "/blog/post/"), "img/a.png")
+        self.assertEqual(local_path("a%20b.png?v=2", "/blog/post/"), "blog/post/a b.png")
+        self.assertEqual(local_path("../other/#top", "/blog/post/"), "blog/other/index.html")
+        self.assertEqual(local_path("../other", "/blog/post/"), "blog/other/index.html")
+        self.assertEqual(local_path("about.html", "/index.html"), "about.html")
+        self.assertEqual(local_path("/", "/blog/"), "index.html")
+
+    def test_external_urls_and_fragments_are_not_local(self):
+        for url in ("https://example.com/a.png", "//cdn.example.com/a.js", "mailto:a@b.c", "#top", ""):
+            self.assertIsNone(local_path(url, "/"))
+
+
+class TestSiteIndex(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.root = Path(self._tmp.name)
+        self.content = self.root / "content"
+        (self.content / "blog").mkdir(parents=True)
+        (self.content / "index.md").write_text(MD, encoding="utf-8")
+        (self.content / "blog" / "post.md").write_text("# Post\n\nOne two three\n", encoding="utf-8")
+        self.template = self.root / "template.html"
+        self.template.write_text("<title>{{ Title }}</title>{{ Content }}", encoding="utf-8")
+        self.public = self.root / "public"
+        self.db = self.root / "index.sqlite"
+
+    def tearDown(self):
+        site_index.disable()
+
+    def _open(self) -> SiteIndex:
+        index = SiteIndex(self.db, self.root)
+        self.addCleanup(index.close)
+        return index
+
+    def _generate(self, jobs: int):
+        pages = collect_pages(str(self.content), str(self.public))
+        with contextlib.redirect_stdout(io.StringIO()):
+            return list(generate_pages(pages, str(self.template), jobs=jobs))
+
+    def test_pages_are_indexed_serially_and_in_parallel(self):
+        for jobs in (1, 2):
+            with self.subTest(jobs=jobs):
+                site_index.enable(self.db, self.root)
+                self._generate(jobs)
+                site_index.flush()
+                index = SiteIndex(self.db, self.root)
+                post = index.page(str(self.public / "blog" / "post.html"))
+                self.assertEqual(post.source, "content/blog/post.md")
+                self.assertEqual((post.title, post.headings, post.words), ("Post", [(1, "Post")], 4))
+                self.assertEqual(post.hash, hash_file(self.content / "blog" / "post.md"))
+                home = index.page(str(self.public / "index.html"))
+                self.assertEqual(home.title, "Hello **World**")  # as in the page's <title>
+                self.assertEqual(home.links, ["/docs", "/a", "https://example.com/b"])
+                self.assertEqual([p.output for p in index.pages("public/blog/")], ["public/blog/post.html"])
+                index.close()
+                site_index.disable()
+                self.db.unlink()
+
+    def test_incremental_build_fills_and_trims_the_index(self):
+        pages = collect_pages(str(self.content), str(self.public))
+        manifest = BuildManifest(self.root / "manifest.json")
+        with contextlib.redirect_stdout(io.StringIO()):
+            build_pages(pages, self.template, manifest)
+            # enabled after the first build: up-to-date pages are indexed anyway
+            site_index.enable(self.db, self.root)
+            build_pages(pages, self.template, manifest)
+            self.assertEqual(len(list(self._open().pages())), 2)
+
+            (self.content / "blog" / "post.md").unlink()
+            pages = collect_pages(str(self.content), str(self.public))
+            build_pages(pages, self.template, manifest)
+        self.assertEqual([p.output for p in self._open().pages()], ["public/index.html"])
+
+    def test_build_passes_the_manifest_hash_to_the_index(self):
+        pages = collect_pages(str(self.content), str(self.public))
+        site_index.enable(self.db, self.root)
+        for jobs in (1, 2):
+            with self.subTest(jobs=jobs), contextlib.redirect_stdout(io.StringIO()):
+                with mock.patch.object(site_index, "hash_file", side_effect=AssertionError("hashed again")):
+                    errors, _ = build_pages(pages, self.template, BuildManifest(self.root / "manifest.json"), jobs)
+                self.assertEqual(errors, [])
+                home = self._open().page(str(self.public / "index.html"))
+                self.assertEqual(home.hash, hash_file(self.content / "index.md"))
+
+    def test_dependency_graph(self):
+        logo = self.root / "static" / "img" / "logo.png"
+        logo.parent.mkdir(parents=True)
+        logo.write_bytes(b"png")
+        pages = collect_pages(str(self.content), str(self.public))
+        manifest = BuildManifest(self.root / "manifest.json")
+        index = site_index.enable(self.db, self.root)
+        home = str(self.public / "index.html")
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            build_pages(pages, self.template, manifest)
+            info = index.why_rebuilt(home)
+            self.assertEqual(info["reason"], "no previous build")
+            self.assertEqual(
+                info["deps"],
+                {
+                    "asset": ["static/img/logo.png"],
+                    "page": ["public/a/index.html", "public/docs/index.html"],
+                    "template": ["template.html"],
+                },
+            )
+            # the same page, looked up by its source
+            self.assertEqual(index.why_rebuilt(str(self.content / "index.md")), info)
+            self.assertEqual(index.dependents([str(logo)]), [(str(self.content / "index.md"), home)])
+
+            # a changed asset rebuilds exactly the pages using it
+            os.utime(logo, ns=(1, 1))
+            self.assertEqual(index.outdated(), {home: "static/img/logo.png changed"})
+            build_pages(pages, self.template, manifest)
+            self.assertIn("Rebuilt 1 pages, skipped 1 unchanged", out.getvalue())
+            self.assertEqual(index.why_rebuilt(home)["reason"], "static/img/logo.png changed")
+            self.assertEqual(index.outdated(), {})
+
+            logo.unlink()
+            self.assertEqual(index.outdated(), {home: "static/img/logo.png removed"})
+
+        (self.content / "blog" / "post.md").write_text("# Post\n\n[home](/)\n", encoding="utf-8")
+        with contextlib.redirect_stdout(io.StringIO()):
+            build_pages(pages, self.template, manifest)
+        self.assertEqual(index.why_rebuilt(home)["linked_from"], ["public/blog/post.html"])
+        self.assertEqual(index.why_rebuilt(str(self.public / "blog" / "post.html"))["reason"], "source changed")
+
+    def test_reset_drops_pending_records_unwritten(self):
+        # what a forked worker does with the parent's index it inherited
+        inherited = site_index.enable(self.db, self.root)
+        inherited.forget(str(self.public / "index.html"))
+        self._generate(1)
+        site_index.reset()
+        self.assertIsNone(site_index.active())
+        index = SiteIndex(self.db, self.root)
+        self.assertEqual(list(index.pages()), [])
+        index.close()
+        inherited.take_updates()
+        inherited.close()
+
+    def test_record_defaults_are_not_shared(self):
+        record = site_index.PageRecord("out", "src", "", [], 0, [], [], "")
+        self.assertIsNone(record.terms)
+        self.assertEqual(record.deps, ())
+
+
+if __name__ == "__main__":
+    unittest.main()
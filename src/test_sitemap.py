@@ -0,0 +1,92 @@
+import os
+import tempfile
+import unittest
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+from sitemap import SITEMAP_NS, FeedEntry, absolute_url, w3c_datetime, write_feed, write_sitemaps
+
+NS = {"s": SITEMAP_NS, "a": "http://www.w3.org/2005/Atom"}
+
+
+class TestSitemap(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.public = Path(self._tmp.name)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _locs(self, name: str):
+        tree = ET.parse(self.public / name)
+        return [loc.text for loc in tree.getroot().iter(f"{{{SITEMAP_NS}}}loc")]
+
+    def test_absolute_url_is_escaped(self):
+        self.assertEqual(absolute_url("https://x.org", "/a b/ü?&.html"), "https://x.org/a%20b/%C3%BC%3F%26.html")
+
+    def test_single_sitemap(self):
+        urls = [("https://x.org/", 0), ("https://x.org/a&b/", None)]
+        written = write_sitemaps(iter(urls), self.public, "https://x.org")
+        self.assertEqual(written, [self.public / "sitemap.xml"])
+        self.assertEqual(self._locs("sitemap.xml"), ["https://x.org/", "https://x.org/a&b/"])
+        lastmods = ET.parse(self.public / "sitemap.xml").getroot().findall("s:url/s:lastmod", NS)
+        self.assertEqual([m.text for m in lastmods], [w3c_datetime(0)])
+        self.assertEqual(w3c_datetime(0), "1970-01-01T00:00:00Z")
+
+    def test_empty_site_gets_an_empty_sitemap(self):
+        write_sitemaps([], self.public, "https://x.org")
+        self.assertEqual(self._locs("sitemap.xml"), [])
+
+    def test_split_into_parts_with_an_index(self):
+        urls = [(f"https://x.org/{n}/", None) for n in range(5)]
+        written = write_sitemaps(urls, self.public, "https://x.org", limit=2)
+        self.assertEqual([p.name for p in written], ["sitemap.xml", "sitemap-1.xml", "sitemap-2.xml", "sitemap-3.xml"])
+        self.assertEqual(
+            self._locs("sitemap.xml"),
+            ["https://x.org/sitemap-1.xml", "https://x.org/sitemap-2.xml", "https://x.org/sitemap-3.xml"],
+        )
+        self.assertEqual(self._locs("sitemap-3.xml"), ["https://x.org/4/"])
+
+        # shrinking drops the stale parts, and then the index
+        write_sitemaps(urls[:3], self.public, "https://x.org", limit=2)
+        self.assertFalse((self.public / "sitemap-3.xml").exists())
+        write_sitemaps(urls[:1], self.public, "https://x.org", limit=2)
+        self.assertEqual(sorted(os.listdir(self.public)), ["sitemap.xml"])
+        self.assertEqual(self._locs("sitemap.xml"), ["https://x.org/0/"])
+
+    def test_unchanged_sitemap_keeps_its_mtime(self):
+        urls = [("https://x.org/", 0)]
+        write_sitemaps(urls, self.public, "https://x.org")
+        path = self.public / "sitemap.xml"
+        os.utime(path, ns=(1, 1))
+        write_sitemaps(urls, self.public, "https://x.org")
+        self.assertEqual(path.stat().st_mtime_ns, 1)
+        self.assertEqual(sorted(os.listdir(self.public)), ["sitemap.xml"])
+
+
+class TestFeed(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self._tmp.name) / "blog" / "feed.xml"
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_newest_entries_first(self):
+        entries = (FeedEntry(f"https://x.org/{n}/", f"Post <{n}>", n * 10**9) for n in range(5))
+        count = write_feed(entries, self.path, "https://x.org/feed.xml", "Blog & news", "Tolkien & co", limit=3)
+        self.assertEqual(count, 3)
+        root = ET.parse(self.path).getroot()
+        self.assertEqual(root.find("a:title", NS).text, "Blog & news")
+        self.assertEqual(root.find("a:author/a:name", NS).text, "Tolkien & co")
+        self.assertEqual([e.text for e in root.findall("a:entry/a:title", NS)], ["Post <4>", "Post <3>", "Post <2>"])
+        self.assertEqual(root.find("a:updated", NS).text, w3c_datetime(4 * 10**9))
+        self.assertEqual(root.find("a:entry/a:link", NS).get("href"), "https://x.org/4/")
+
+    def test_empty_feed(self):
+        self.assertEqual(write_feed([], self.path, "https://x.org/feed.xml", "Blog", "Me"), 0)
+        self.assertEqual(ET.parse(self.path).getroot().findall("a:entry", NS), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
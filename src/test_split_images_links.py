@@ -74,6 +74,33 @@ class TestSplitImagesLinks(unittest.TestCase):
         found_links = [n for n in step2 if n.text_type == TextType.LINK]
         self.assertEqual(len(found_links), 1)
         self.assertEqual(found_links[0], TextNode("link", TextType.LINK, "p.html"))
+    def test_repeated_links_with_same_text(self):
+        node = TextNode("[dup](a) and [dup](a) then [dup](b)", TextType.TEXT)
+        self.assertListEqual(
+            [
+                TextNode("dup", TextType.LINK, "a"),
+                TextNode(" and ", TextType.TEXT),
+                TextNode("dup", TextType.LINK, "a"),
+                TextNode(" then ", TextType.TEXT),
+                TextNode("dup", TextType.LINK, "b"),
+            ],
+            split_nodes_link([node]),
+        )
+
+    def test_link_split_uses_match_position_not_first_occurrence(self):
+        # the first "[a](b)" is the tail of an image and must stay in the text
+        node = TextNode("![a](b) [a](b)", TextType.TEXT)
+        self.assertListEqual(
+            [TextNode("![a](b) ", TextType.TEXT), TextNode("a", TextType.LINK, "b")],
+            split_nodes_link([node]),
+        )
+
+    def test_many_links_in_one_paragraph(self):
+        text = " ".join(f"[l{i}](/p/{i})" for i in range(500))
+        out = split_nodes_link([TextNode(text, TextType.TEXT)])
+        links = [n for n in out if n.text_type == TextType.LINK]
+        self.assertEqual(len(links), 500)
+        self.assertEqual(links[-1], TextNode("l499", TextType.LINK, "/p/499"))
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,93 @@
+import contextlib
+import io
+import tempfile
+import tracemalloc
+import unittest
+from pathlib import Path
+
+import generate_page
+import render_cache
+from generate_page import iter_source_lines, stream_page
+
+TEMPLATE = "<title>{{ Title }}</title><body>{{ Content }}</body>"
+
+MD = """Intro before the title
+
+# Big Reference
+
+Some **bold** and _italic_ text
+with a [link](/a) on two lines
+
+```python
+def f():
+
+    return 1
+```
+
+> quote
+> more
+
+- a
+- b
+
+1. one
+2. two
+"""
+
+
+class TestStreamPage(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        self.src = self.root / "page.md"
+        self.template = self.root / "template.html"
+        self.template.write_text(TEMPLATE, encoding="utf-8")
+
+    def tearDown(self):
+        generate_page.STREAM_THRESHOLD = 16 << 20
+        render_cache.disable()
+        self._tmp.cleanup()
+
+    def build(self, dest, threshold):
+        generate_page.STREAM_THRESHOLD = threshold
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_page.generate_page(str(self.src), str(self.template), str(dest))
+        return dest.read_text(encoding="utf-8")
+
+    def test_streamed_output_matches_in_memory_render(self):
+        self.src.write_text(MD, encoding="utf-8")
+        whole = self.build(self.root / "whole.html", 1 << 30)
+        self.assertEqual(self.build(self.root / "streamed.html", 0), whole)
+        render_cache.enable()
+        self.assertEqual(self.build(self.root / "cached.html", 0), whole)
+
+    def test_source_lines_match_splitlines(self):
+        text = "a\r\nb\rc\n\nd\x0ce f\n"
+        self.src.write_bytes(text.encode("utf-8"))
+        with open(self.src, encoding="utf-8") as f:
+            expected = f.read().splitlines()
+        self.assertEqual(list(iter_source_lines(str(self.src))), expected)
+
+    def test_missing_title_leaves_no_output(self):
+        self.src.write_text("no title\n\njust text", encoding="utf-8")
+        dest = self.root / "out" / "page.html"
+        with self.assertRaises(ValueError):
+            stream_page(str(self.src), str(self.template), str(dest))
+        self.assertFalse(dest.exists())
+
+    def test_peak_memory_does_not_grow_with_document(self):
+        section = "## Section\n\nParagraph with **bold** text and a [link](/x).\n\n- item one\n- item two\n\n"
+        self.src.write_text("# Huge\n\n" + section * 4000, encoding="utf-8")  # ~350 KB
+        dest = self.root / "huge.html"
+        tracemalloc.start()
+        try:
+            stream_page(str(self.src), str(self.template), str(dest))
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        self.assertLess(peak, 128 * 1024)
+        self.assertGreater(dest.stat().st_size, 400 * 1024)
+
+
+if __name__ == "__main__":
+    unittest.main()
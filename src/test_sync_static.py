@@ -0,0 +1,81 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from sync_static import sync_tree
+
+
+class TestSyncTree(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        root = Path(self._tmp.name)
+        self.src = root / "static"
+        self.dest = root / "public"
+        (self.src / "images").mkdir(parents=True)
+        (self.src / "index.css").write_text("body{}")
+        (self.src / "images" / "a.png").write_bytes(b"\x89PNG a")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_first_sync_copies_everything(self):
+        result = sync_tree(self.src, self.dest)
+        self.assertEqual(result.copied, ["images/a.png", "index.css"])
+        self.assertEqual((self.dest / "images" / "a.png").read_bytes(), b"\x89PNG a")
+
+    def test_second_sync_copies_nothing(self):
+        first = sync_tree(self.src, self.dest)
+        second = sync_tree(self.src, self.dest, first.files)
+        self.assertEqual(second.copied, [])
+        self.assertEqual(second.unchanged, ["images/a.png", "index.css"])
+
+    def test_changed_file_is_copied(self):
+        first = sync_tree(self.src, self.dest)
+        (self.src / "index.css").write_text("body{color:red}")
+        result = sync_tree(self.src, self.dest, first.files)
+        self.assertEqual(result.copied, ["index.css"])
+        self.assertEqual((self.dest / "index.css").read_text(), "body{color:red}")
+
+    def test_verify_hash_skips_touched_but_identical_files(self):
+        first = sync_tree(self.src, self.dest)
+        st = (self.src / "index.css").stat()
+        os.utime(self.src / "index.css", ns=(st.st_atime_ns, st.st_mtime_ns + 5_000_000_000))
+        result = sync_tree(self.src, self.dest, first.files, verify_hash=True)
+        self.assertEqual(result.copied, [])
+
+    def test_orphans_removed_but_other_files_kept(self):
+        first = sync_tree(self.src, self.dest)
+        (self.dest / "page.html").write_text("<p>generated</p>")
+        (self.src / "images" / "a.png").unlink()
+        result = sync_tree(self.src, self.dest, first.files)
+        self.assertEqual(result.removed, ["images/a.png"])
+        self.assertFalse((self.dest / "images" / "a.png").exists())
+        self.assertTrue((self.dest / "page.html").exists())
+
+    def test_excluded_paths_are_left_alone(self):
+        (self.src / "index.html").write_text("static")
+        self.dest.mkdir()
+        (self.dest / "index.html").write_text("generated")
+        result = sync_tree(self.src, self.dest, ["index.html"], exclude={"index.html"})
+        self.assertNotIn("index.html", result.files)
+        self.assertEqual((self.dest / "index.html").read_text(), "generated")
+
+    def test_hardlink_mode_links_and_stays_unchanged(self):
+        first = sync_tree(self.src, self.dest, link="hardlink")
+        self.assertEqual(len(first.copied), 2)
+        self.assertTrue(os.path.samefile(self.src / "index.css", self.dest / "index.css"))
+        second = sync_tree(self.src, self.dest, first.files, link="hardlink")
+        self.assertEqual(second.copied, [])
+
+    def test_reflink_falls_back_to_copy(self):
+        sync_tree(self.src, self.dest, link="reflink")
+        self.assertEqual((self.dest / "index.css").read_text(), "body{}")
+
+    def test_unknown_link_mode_rejected(self):
+        with self.assertRaises(ValueError):
+            sync_tree(self.src, self.dest, link="symlink")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+import os
+import tempfile
+import unittest
+
+from template import Template, load_template
+
+
+class TestTemplate(unittest.TestCase):
+    def test_compile_splits_segments_and_slots(self):
+        t = Template.compile("<title>{{ Title }}</title><main>{{ Content }}</main>")
+        self.assertEqual(t.segments, ["<title>", "</title><main>", "</main>"])
+        self.assertEqual(t.slots, ["Title", "Content"])
+
+    def test_render_matches_replace(self):
+        text = "<h1>{{ Title }}</h1>{{ Content }}<footer>{{ Title }}</footer>"
+        t = Template.compile(text)
+        expected = text.replace("{{ Title }}", "Hi").replace("{{ Content }}", "<p>x</p>")
+        self.assertEqual(t.render({"Title": "Hi", "Content": "<p>x</p>"}), expected)
+
+    def test_unknown_slot_left_in_place(self):
+        t = Template.compile("a {{ Other }} b")
+        self.assertEqual(t.render({"Title": "x"}), "a {{ Other }} b")
+
+    def test_render_to_streams_same_output(self):
+        t = Template.compile("<p>{{ Title }}</p>{{ Content }}")
+        parts = []
+        t.render_to(parts.append, {"Title": "T", "Content": "C"})
+        self.assertEqual("".join(parts), t.render({"Title": "T", "Content": "C"}))
+
+    def test_render_to_callable_slot(self):
+        t = Template.compile("<main>{{ Content }}</main>")
+        parts = []
+        t.render_to(parts.append, {"Content": lambda write: (write("a"), write("b"))})
+        self.assertEqual("".join(parts), "<main>ab</main>")
+
+    def test_load_template_reuses_compiled_form(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "template.html")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("<b>{{ Title }}</b>")
+            first = load_template(path)
+            self.assertIs(load_template(path), first)
+
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("<i>{{ Title }}</i>!")
+            self.assertEqual(load_template(path).render({"Title": "x"}), "<i>x</i>!")
+
+
+if __name__ == "__main__":
+    unittest.main()
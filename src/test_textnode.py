@@ -27,6 +27,16 @@ class TestTextNode(unittest.TestCase):
         node2 = TextNode("Click me", TextType.LINK, "https://boot.dev")
         self.assertNotEqual(node1, node2)
 
+    def test_slotted_no_instance_dict(self):
+        node = TextNode("x", TextType.TEXT)
+        self.assertFalse(hasattr(node, "__dict__"))
+        self.assertEqual(repr(node), "TextNode(x, text, None)")
+
+    def test_text_type_usable_as_dict_key(self):
+        table = {t: t.value for t in TextType}
+        self.assertEqual(table[TextType.LINK], "link")
+        self.assertEqual(table[TextType("bold")], "bold")
+
 
 if __name__ == "__main__":
     unittest.main()
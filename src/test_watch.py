@@ -0,0 +1,308 @@
+import contextlib
+import http.client
+import io
+import os
+import tempfile
+import threading
+import unittest
+from argparse import Namespace
+from pathlib import Path
+from unittest import mock
+
+import main
+import site_index
+from deploy import DeployManifest
+from generate_page import collect_pages
+from watch import (
+    LIVERELOAD_PATH,
+    LIVERELOAD_SCRIPT,
+    LiveReloadHandler,
+    LiveReloadServer,
+    SiteWatcher,
+    diff_snapshots,
+    snapshot,
+)
+
+
+class TestSnapshot(unittest.TestCase):
+    def test_diff_reports_changed_added_and_removed(self):
+        old = {"a": (1, 10), "b": (1, 10), "c": (1, 10)}
+        new = {"a": (1, 10), "b": (2, 11), "d": (1, 1)}
+        changed, removed = diff_snapshots(old, new)
+        self.assertEqual(changed, {"b", "d"})
+        self.assertEqual(removed, {"c"})
+
+    def test_snapshot_walks_directories_and_files(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            (root / "d" / "e").mkdir(parents=True)
+            (root / "d" / "e" / "x.md").write_text("x")
+            (root / "t.html").write_text("t")
+            snap = snapshot([root / "d", root / "t.html", root / "missing"])
+            self.assertEqual(set(snap), {str(root / "d" / "e" / "x.md"), str(root / "t.html")})
+
+
+class TestSiteWatcher(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = root = Path(self._tmp.name)
+        self.content = root / "content"
+        self.static = root / "static"
+        self.public = root / "public"
+        self.template = root / "template.html"
+        (self.content / "blog").mkdir(parents=True)
+        self.static.mkdir()
+        self.public.mkdir()
+        (self.content / "index.md").write_text("# Home\n\nhi")
+        (self.content / "blog" / "post.md").write_text("# Post\n\nbody")
+        self.template.write_text("<h1>{{ Title }}</h1>{{ Content }}")
+        self.watcher = SiteWatcher(
+            self.content, self.static, self.template, self.public, root / ".build-manifest.json"
+        )
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def poll(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return self.watcher.poll()
+
+    def touch(self, path: Path, text: str):
+        path.write_text(text)
+        # make sure the change is visible even on coarse mtime filesystems
+        st = path.stat()
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+    def test_no_changes_does_nothing(self):
+        self.assertEqual(self.poll(), [])
+
+    def test_changed_page_is_rebuilt_alone(self):
+        self.touch(self.content / "blog" / "post.md", "# Post\n\nedited")
+        touched = self.poll()
+        self.assertEqual(touched, [str(self.public / "blog" / "post.html")])
+        self.assertIn("edited", (self.public / "blog" / "post.html").read_text())
+        self.assertFalse((self.public / "index.html").exists())
+        # written by watch() when it stops, not on every rebuild
+        self.assertFalse((self.root / ".build-manifest.json").exists())
+
+    def test_template_change_rebuilds_every_page(self):
+        self.touch(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        self.assertEqual(len(self.poll()), 2)
+        self.assertIn("<title>Home</title>", (self.public / "index.html").read_text())
+
+    def test_static_files_are_copied_and_removed(self):
+        self.touch(self.static / "site.css", "body{}")
+        self.poll()
+        self.assertEqual((self.public / "site.css").read_text(), "body{}")
+        (self.static / "site.css").unlink()
+        self.poll()
+        self.assertFalse((self.public / "site.css").exists())
+
+    def test_deleted_page_output_is_removed(self):
+        self.touch(self.content / "index.md", "# Home\n\nagain")
+        self.poll()
+        (self.content / "index.md").unlink()
+        self.poll()
+        self.assertFalse((self.public / "index.html").exists())
+
+    def _refresher(self, deploy: DeployManifest, **options) -> main.WatchRefresher:
+        args = Namespace(
+            base_url="https://example.com",
+            search=False,
+            sitemap=False,
+            feed=False,
+            feed_author=None,
+            gzip=False,
+            gzip_level=6,
+            gzip_min_size=1,
+            image_sizes=False,
+            check_links=False,
+        )
+        vars(args).update(options)
+        pages = collect_pages(str(self.content), str(self.public))
+        return main.WatchRefresher(args, deploy, pages, self.watcher.files, [])
+
+    def _in_main(self, stack: contextlib.ExitStack) -> None:
+        dirs = {"CONTENT_DIR": self.content, "STATIC_DIR": self.static, "PUBLIC_DIR": self.public}
+        for name, value in dirs.items():
+            stack.enter_context(mock.patch.object(main, name, value))
+        stack.enter_context(contextlib.redirect_stdout(io.StringIO()))
+
+    def refresh(self, refresher: main.WatchRefresher) -> None:
+        refresher(self.watcher.poll(), set(self.watcher.manifest.static), self.watcher.files)
+
+    def test_rebuild_refreshes_derived_outputs(self):
+        deploy = DeployManifest(self.root / "deploy-manifest.json")
+        with contextlib.ExitStack() as stack:
+            self._in_main(stack)
+            refresher = self._refresher(deploy, sitemap=True, gzip=True)
+            # the touched outputs are all that is looked at
+            stack.enter_context(mock.patch.object(main, "scan_tree", side_effect=AssertionError("scanned")))
+
+            self.touch(self.content / "blog" / "post.md", "# Post\n\n" + "edited " * 100)
+            self.refresh(refresher)
+            post = self.public / "blog" / "post.html"
+            self.assertTrue(Path(f"{post}.gz").is_file())
+            sitemap = (self.public / "sitemap.xml").read_text()
+            self.assertIn("https://example.com/blog/post.html", sitemap)
+            self.assertLess(sitemap.index("https://example.com/blog/post.html"), sitemap.index("https://example.com/<"))
+            self.assertEqual(
+                sorted(deploy.files), ["blog/post.html", "blog/post.html.gz", "sitemap.xml", "sitemap.xml.gz"]
+            )
+
+            self.touch(self.content / "about.md", "# About")
+            self.refresh(refresher)
+            sitemap = (self.public / "sitemap.xml").read_text()
+            self.assertLess(sitemap.index("https://example.com/about.html"), sitemap.index("https://example.com/<"))
+
+            (self.content / "blog" / "post.md").unlink()
+            self.refresh(refresher)
+            self.assertFalse(Path(f"{post}.gz").exists())
+            self.assertNotIn("blog/post.html", (self.public / "sitemap.xml").read_text())
+            self.assertNotIn("blog/post.html", deploy.files)
+            # too small for gzip to shrink, so about.html has no sidecar
+            self.assertEqual(deploy.delta.added, ["about.html", "sitemap.xml", "sitemap.xml.gz"])
+        # saved by build() when watch mode stops
+        self.assertFalse(deploy.path.exists())
+
+    def test_links_are_rechecked_for_touched_pages_and_pages_linking_to_them(self):
+        site_index.enable(self.root / "index.sqlite", self.root, public=self.public, static=self.static)
+        self.addCleanup(site_index.disable)
+        deploy = DeployManifest(self.root / "deploy-manifest.json")
+        with contextlib.ExitStack() as stack:
+            self._in_main(stack)
+            errors = stack.enter_context(contextlib.redirect_stderr(io.StringIO()))
+            refresher = self._refresher(deploy, check_links=True)
+
+            self.touch(self.content / "index.md", "# Home\n\n[new](/blog/new.html)")
+            self.refresh(refresher)
+            self.assertIn("1 broken internal link(s) or image(s) in the rechecked pages (1 on the site)", errors.getvalue())
+            self.assertIn("content/index.md:3: link /blog/new.html", errors.getvalue())
+
+            errors.truncate(0)
+            self.touch(self.content / "blog" / "new.md", "# New")
+            self.refresh(refresher)
+            self.assertEqual(errors.getvalue(), "")
+
+            (self.content / "blog" / "new.md").unlink()
+            self.refresh(refresher)
+            self.assertIn("content/index.md:3: link /blog/new.html", errors.getvalue())
+
+
+class TestIncrementalPoll(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.root = root = Path(self._tmp.name)
+        self.content = root / "content"
+        (self.content / "a").mkdir(parents=True)
+        self.pages = [self.content / "a" / f"{n}.md" for n in range(8)]
+        for page in self.pages:
+            page.write_text(f"# {page.stem}")
+        self.template = root / "template.html"
+        self.template.write_text("{{ Content }}")
+        # long settled: only the sweep finds in-place edits
+        for path in (self.content, self.content / "a"):
+            os.utime(path, ns=(0, 0))
+        self.watcher = SiteWatcher(
+            self.content, root / "static", self.template, root / "public", root / ".build-manifest.json", 4
+        )
+
+    def changes(self):
+        return self.watcher._changes()
+
+    def edit(self, path: Path) -> None:
+        st = path.stat()
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+    def test_in_place_edits_are_found_by_the_sweep_then_kept_hot(self):
+        page = self.pages[5]
+        self.edit(page)
+        polls = 1
+        while self.changes() == (set(), set()):
+            polls += 1
+        # 9 files, a quarter of them per poll
+        self.assertLessEqual(polls, 4)
+        self.edit(page)
+        self.assertEqual(self.changes(), ({str(page)}, set()))
+
+    def test_viewed_pages_are_stat_ed_on_every_poll(self):
+        self.watcher.sweep_polls = 100
+        page = self.pages[5]
+        self.watcher.viewed(self.root / "public" / "a" / "5.html")
+        self.edit(page)
+        self.assertEqual(self.changes(), ({str(page)}, set()))
+
+    def test_directory_changes_are_found_at_once(self):
+        (self.content / "b").mkdir()
+        (self.content / "b" / "new.md").write_text("# New")
+        self.pages[0].unlink()
+        self.assertEqual(
+            self.changes(), ({str(self.content / "b" / "new.md")}, {str(self.pages[0])})
+        )
+        for page in self.pages[1:]:
+            page.unlink()
+        (self.content / "a").rmdir()
+        self.assertEqual(self.changes(), (set(), {str(page) for page in self.pages[1:]}))
+        self.assertEqual(set(self.watcher.files), {str(self.content / "b" / "new.md"), str(self.template)})
+
+
+class TestLiveReload(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.public = Path(self._tmp.name)
+        (self.public / "docs").mkdir()
+        (self.public / "index.html").write_text("<html><body><p>hi</p></body></html>")
+        (self.public / "docs" / "index.html").write_text("<p>no body tag</p>")
+        (self.public / "site.css").write_text("body{}")
+        self.viewed = []
+        self.server = LiveReloadServer(("127.0.0.1", 0), self.public, self.viewed.append)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+    def get(self, path: str):
+        connection = http.client.HTTPConnection(*self.server.server_address, timeout=5)
+        self.addCleanup(connection.close)
+        with mock.patch.object(LiveReloadHandler, "log_message"):
+            connection.request("GET", path)
+            response = connection.getresponse()
+            return response, response.read().decode("utf-8")
+
+    def test_script_is_injected_into_html_pages(self):
+        response, body = self.get("/")
+        self.assertEqual(response.status, 200)
+        self.assertEqual(body, f"<html><body><p>hi</p>{LIVERELOAD_SCRIPT}</body></html>")
+        self.assertEqual(int(response.getheader("Content-Length")), len(body.encode("utf-8")))
+        self.assertEqual(self.get("/docs/")[1], f"<p>no body tag</p>{LIVERELOAD_SCRIPT}")
+        self.assertEqual(self.get("/site.css")[1], "body{}")
+        self.assertEqual(self.viewed, [self.public / "index.html", self.public / "docs" / "index.html"])
+
+    def test_directory_without_slash_is_redirected(self):
+        response, _ = self.get("/docs?x=1")
+        self.assertEqual(response.status, 301)
+        self.assertEqual(response.getheader("Location"), "/docs/?x=1")
+
+    def test_reload_wakes_waiting_clients(self):
+        seen = self.server.reload_version
+        self.assertEqual(self.server.wait_for_reload(seen, timeout=0.01), seen)
+        versions = []
+        waiter = threading.Thread(target=lambda: versions.append(self.server.wait_for_reload(seen, timeout=5)))
+        waiter.start()
+        self.server.notify_reload()
+        waiter.join()
+        self.assertEqual(versions, [seen + 1])
+
+    def test_events_stream_announces_reloads(self):
+        connection = http.client.HTTPConnection(*self.server.server_address, timeout=5)
+        self.addCleanup(connection.close)
+        connection.request("GET", LIVERELOAD_PATH)
+        response = connection.getresponse()
+        self.assertEqual(response.getheader("Content-Type"), "text/event-stream")
+        self.server.notify_reload()
+        self.assertEqual(response.fp.readline(), b"data: reload\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
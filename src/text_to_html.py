@@ -1,24 +1,53 @@
 from textnode import TextNode, TextType
 from leafnode import LeafNode
+import image_size
 
 
-def text_node_to_html_node(text_node: TextNode) -> LeafNode:
-    if text_node.text_type == TextType.TEXT:
-        return LeafNode(None, text_node.text)
+def _text(text_node: TextNode) -> LeafNode:
+    return LeafNode(None, text_node.text)
+
+
+def _bold(text_node: TextNode) -> LeafNode:
+    return LeafNode("b", text_node.text)
+
+
+def _italic(text_node: TextNode) -> LeafNode:
+    return LeafNode("i", text_node.text)
 
-    if text_node.text_type == TextType.BOLD:
-        return LeafNode("b", text_node.text)
 
-    if text_node.text_type == TextType.ITALIC:
-        return LeafNode("i", text_node.text)
+def _code(text_node: TextNode) -> LeafNode:
+    return LeafNode("code", text_node.text)
 
-    if text_node.text_type == TextType.CODE:
-        return LeafNode("code", text_node.text)
 
-    if text_node.text_type == TextType.LINK:
-        return LeafNode("a", text_node.text, {"href": text_node.url})
+def _link(text_node: TextNode) -> LeafNode:
+    return LeafNode("a", text_node.text, {"href": text_node.url})
 
-    if text_node.text_type == TextType.IMAGE:
-        return LeafNode("img", "", {"src": text_node.url, "alt": text_node.text})
 
-    raise ValueError(f"Unsupported TextType: {text_node.text_type}")
+def _image(text_node: TextNode) -> LeafNode:
+    props = {"src": text_node.url, "alt": text_node.text}
+    sizes = image_size.active()
+    if sizes is not None:
+        props.update(sizes.attributes(text_node.url))
+    return LeafNode("img", "", props)
+
+
+# one dict lookup per node instead of a chain of comparisons
+_CONVERTERS = {
+    TextType.TEXT: _text,
+    TextType.BOLD: _bold,
+    TextType.ITALIC: _italic,
+    TextType.CODE: _code,
+    TextType.LINK: _link,
+    TextType.IMAGE: _image,
+}
+
+
+def text_node_to_html_node(text_node: TextNode) -> LeafNode:
+    """
+    The LeafNode for one TextNode. With image sizes enabled (image_size),
+    images also get width, height, loading="lazy" and decoding="async".
+    """
+    convert = _CONVERTERS.get(text_node.text_type)
+    if convert is None:
+        raise ValueError(f"Unsupported TextType: {text_node.text_type}")
+    return convert(text_node)
@@ -1,7 +1,6 @@
 from typing import List
-from textnode import TextNode, TextType
-from split_images_links import split_nodes_image, split_nodes_link
-from split_delimiter import split_nodes_delimiter
+from textnode import TextNode
+from inline_tokenizer import tokenize_inline
 
 def text_to_textnodes(text: str) -> List[TextNode]:
     """
@@ -14,6 +13,9 @@ def text_to_textnodes(text: str) -> List[TextNode]:
       4. bold        -> **bold**
       5. italic      -> _italic_
 
+    All five are recognised in one pass by tokenize_inline, which gives the same
+    result as applying the split_nodes_* helpers in that order.
+
     Returns an empty list for empty/whitespace-only input.
     """
     if text is None:
@@ -23,14 +25,4 @@ def text_to_textnodes(text: str) -> List[TextNode]:
     if text.strip() == "":
         return []
 
-    # Start with a single TEXT node
-    nodes: List[TextNode] = [TextNode(text, TextType.TEXT)]
-
-    # Apply splitters in recommended order
-    nodes = split_nodes_image(nodes)                        # images first
-    nodes = split_nodes_link(nodes)                         # then links
-    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)   # code
-    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)  # bold
-    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC) # italic
-
-    return nodes
+    return tokenize_inline(text)
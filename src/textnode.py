@@ -11,8 +11,15 @@ class TextType(Enum):
     LINK = "link"
     IMAGE = "image"
 
+    # members compare by identity, so the C-level identity hash is valid and
+    # makes TextType-keyed dispatch tables much cheaper than Enum.__hash__
+    __hash__ = object.__hash__
+
 
 class TextNode:
+    # pages create very many of these; slots drop the per-instance __dict__
+    __slots__ = ("text", "text_type", "url")
+
     def __init__(self, text: str, text_type: TextType, url: Optional[str] = None):
         self.text = text
         self.text_type = text_type
@@ -0,0 +1,441 @@
+import collections
+import functools
+import itertools
+import os
+import shutil
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+from build_manifest import BuildManifest, hash_file
+from generate_page import generate_page, render_code_hash
+import render_cache
+import site_index
+
+# (st_size, st_mtime_ns) for every watched file, keyed by path, as stat_index()
+Snapshot = Dict[str, Tuple[int, int]]
+# st_mtime_ns of every watched directory and the files listed in it
+Directories = Dict[str, Tuple[int, Set[str]]]
+
+# watch() has every file stat'ed at least this often (seconds), spread over its polls
+FULL_SWEEP = 0.5
+# the most recently changed files, stat'ed on every poll
+HOT_FILES = 64
+# a directory modified this recently (ns) is listed again on the next poll:
+# an entry added within the same timestamp tick would not change its mtime
+RACY_NS = 2_000_000_000
+
+LIVERELOAD_PATH = "/__livereload"
+LIVERELOAD_SCRIPT = (
+    '<script>new EventSource("%s").onmessage = function () { location.reload(); };</script>'
+    % LIVERELOAD_PATH
+)
+
+
+def _list_dirs(root: str, files: Snapshot, dirs: Directories) -> Tuple[Set[str], Set[str]]:
+    """
+    List directory root again into files and dirs, walking the subdirectories
+    dirs does not know yet (known ones are checked on their own). Returns the
+    (changed_or_added, removed) files found. A directory modified within
+    RACY_NS of being listed is listed again on the next poll.
+    """
+    changed: Set[str] = set()
+    removed: Set[str] = set()
+    stack = [root]
+    while stack:
+        path = stack.pop()
+        try:
+            listed_ns = time.time_ns()
+            mtime_ns = os.stat(path).st_mtime_ns
+            it = os.scandir(path)
+        except (FileNotFoundError, NotADirectoryError):
+            continue
+        listed: Set[str] = set()
+        with it:
+            for entry in it:
+                try:
+                    if entry.is_dir():
+                        if entry.path not in dirs:
+                            stack.append(entry.path)
+                    elif entry.is_file():
+                        st = entry.stat()
+                        listed.add(entry.path)
+                        stamp = (st.st_size, st.st_mtime_ns)
+                        if files.get(entry.path) != stamp:
+                            files[entry.path] = stamp
+                            changed.add(entry.path)
+                except FileNotFoundError:
+                    continue  # deleted while we were listing
+        if path in dirs:
+            removed |= dirs[path][1] - listed
+        # -1 never matches, so a racy directory is listed once more
+        dirs[path] = (mtime_ns if mtime_ns < listed_ns - RACY_NS else -1, listed)
+    return changed, removed
+
+
+def snapshot(paths: Iterable[Path], dirs: Optional[Directories] = None) -> Snapshot:
+    """
+    Record (size, mtime_ns) for every file under the given files/directories,
+    using os.scandir; no native file-watching dependency is needed. The
+    directories walked are recorded in dirs, if given.
+    """
+    result: Snapshot = {}
+    if dirs is None:
+        dirs = {}
+    for path in paths:
+        path = str(path)
+        if os.path.isdir(path):
+            _list_dirs(path, result, dirs)
+        elif os.path.isfile(path):
+            st = os.stat(path)
+            result[path] = (st.st_size, st.st_mtime_ns)
+    return result
+
+
+def diff_snapshots(old: Snapshot, new: Snapshot) -> Tuple[Set[str], Set[str]]:
+    """Return (changed_or_added, removed) paths between two snapshots."""
+    changed = {path for path, stamp in new.items() if old.get(path) != stamp}
+    removed = set(old) - set(new)
+    return changed, removed
+
+
+class SiteWatcher:
+    """
+    Poll content/, static/ and the template for changes and rebuild only what
+    they affect:
+      - a changed/added .md re-renders that page, a deleted one removes its output
+      - a template change re-renders every page
+      - a changed/added static file is copied, a deleted one removed from public/;
+        with the site index on, the pages using it are re-rendered too
+    Rendered pages are recorded in the build manifest, which watch() saves
+    when it stops, so a later --incremental build starts from where watch
+    mode left off.
+
+    A poll does not walk the trees again. It stats every directory and lists
+    again the ones whose mtime changed, which finds added, removed and
+    renamed files (and editors that save by renaming over the old file).
+    Files edited in place are found by a stat of their own: the template and
+    the HOT_FILES most recently changed or viewed files on every poll, every
+    other file on one poll in sweep_polls.
+    """
+
+    def __init__(
+        self,
+        content_dir: Path,
+        static_dir: Path,
+        template_path: Path,
+        public_dir: Path,
+        manifest_path: Path,
+        sweep_polls: int = 1,
+    ):
+        self.content_dir = Path(content_dir)
+        self.static_dir = Path(static_dir)
+        self.template_path = Path(template_path)
+        self.public_dir = Path(public_dir)
+        self.manifest = BuildManifest.load(manifest_path)
+        self.manifest.begin(hash_file(self.template_path), render_code_hash())
+        self.sweep_polls = sweep_polls
+        self._dirs: Directories = {}
+        self._files = snapshot([self.content_dir, self.static_dir, self.template_path], self._dirs)
+        # most recently changed or viewed last
+        self._hot: Dict[str, None] = {}
+        # outputs served since the last poll, from the server's threads
+        self._viewed: Deque[str] = collections.deque()
+        # the files in the order sweeps stat them (None once files come or
+        # go) and where the next sweep starts
+        self._order: Optional[List[str]] = None
+        self._next = 0
+
+    def viewed(self, output: Path) -> None:
+        """Note that a page output was served: the page open in a browser is likely the one being edited."""
+        self._viewed.append(str(output))
+
+    @property
+    def files(self) -> Snapshot:
+        """Every watched file as of the last poll: path -> (size, mtime_ns), like stat_index()."""
+        return self._files
+
+    def _dest_for(self, from_path: str) -> str:
+        rel = os.path.relpath(from_path, self.content_dir)
+        return os.path.splitext(os.path.join(self.public_dir, rel))[0] + ".html"
+
+    def _is_page_output(self, rel: Path) -> bool:
+        """True if the public/ path rel is rendered from a page in content/."""
+        return rel.suffix == ".html" and (self.content_dir / rel.with_suffix(".md")).is_file()
+
+    def _is_under(self, path: str, root: Path) -> bool:
+        return os.path.commonpath([path, str(root)]) == str(root)
+
+    def _sweep(self) -> List[str]:
+        # the files this poll stats besides the hot ones: the next
+        # 1/sweep_polls of them, wrapping around
+        if self._order is None:
+            self._order = list(self._files)
+        order = self._order
+        if self._next >= len(order):
+            self._next = 0
+        start = self._next
+        self._next += -(-len(order) // self.sweep_polls)
+        return order[start : self._next]
+
+    def _changes(self) -> Tuple[Set[str], Set[str]]:
+        """(changed_or_added, removed) files since the last poll; the snapshot is updated to match."""
+        files, dirs = self._files, self._dirs
+        changed: Set[str] = set()
+        removed: Set[str] = set()
+        for path, (mtime_ns, listed) in list(dirs.items()):
+            try:
+                moved = os.stat(path).st_mtime_ns != mtime_ns
+            except (FileNotFoundError, NotADirectoryError):
+                del dirs[path]
+                removed |= listed
+                continue
+            if moved:
+                found, gone = _list_dirs(path, files, dirs)
+                changed |= found
+                removed |= gone
+        for root in (self.content_dir, self.static_dir):
+            if str(root) not in dirs and root.is_dir():
+                changed |= _list_dirs(str(root), files, dirs)[0]
+
+        while self._viewed:
+            rel = os.path.relpath(self._viewed.popleft(), self.public_dir)
+            source = os.path.join(self.content_dir, os.path.splitext(rel)[0] + ".md")
+            if source in files:
+                self._hot.pop(source, None)
+                self._hot[source] = None
+
+        template = str(self.template_path)
+        for path in itertools.chain((template,), self._hot, self._sweep()):
+            try:
+                st = os.stat(path)
+            except (FileNotFoundError, NotADirectoryError):
+                if path in files:
+                    removed.add(path)
+                continue
+            stamp = (st.st_size, st.st_mtime_ns)
+            if files.get(path) != stamp:
+                files[path] = stamp
+                changed.add(path)
+
+        removed -= changed
+        for path in removed:
+            files.pop(path, None)
+            self._hot.pop(path, None)
+        for path in changed:
+            self._hot.pop(path, None)
+            self._hot[path] = None
+        while len(self._hot) > HOT_FILES:
+            del self._hot[next(iter(self._hot))]
+        if removed or len(files) != len(self._order or ()):
+            self._order = None
+        return changed, removed
+
+    def poll(self) -> List[str]:
+        """Check for changes once and rebuild. Returns the output paths that were written or removed."""
+        changed, removed = self._changes()
+        if not changed and not removed:
+            return []
+        current = self._files
+
+        touched: List[str] = []
+        template = str(self.template_path)
+        if template in changed:
+            self.manifest.begin(hash_file(template), self.manifest.code_hash)
+            pages = [p for p in current if self._is_under(p, self.content_dir) and p.endswith(".md")]
+        else:
+            pages = [p for p in changed if self._is_under(p, self.content_dir) and p.endswith(".md")]
+            index = site_index.active()
+            if index is not None:
+                # pages whose images or linked files changed, per the dependency graph
+                assets = [p for p in changed | removed if self._is_under(p, self.static_dir)]
+                pages += [from_path for from_path, _ in index.dependents(assets) if from_path in current]
+            pages = list(set(pages))
+
+        for from_path in sorted(pages):
+            dest_path = self._dest_for(from_path)
+            try:
+                source_hash = hash_file(from_path)
+                generate_page(from_path, template, dest_path, source_hash)
+            except Exception as e:
+                print(f"Error rendering {from_path}: {type(e).__name__}: {e}")
+                continue
+            self.manifest.record(from_path, dest_path, source_hash, current[from_path])
+            touched.append(dest_path)
+
+        for path in sorted(changed):
+            if self._is_under(path, self.static_dir):
+                rel = Path(os.path.relpath(path, self.static_dir))
+                if self._is_page_output(rel):
+                    continue  # generated pages win over static files with the same path
+                dest = self.public_dir / rel
+                dest.parent.mkdir(parents=True, exist_ok=True)
+                shutil.copy2(path, dest)
+                print(f"Copied {path} --> {dest}")
+                touched.append(str(dest))
+                if rel.as_posix() not in self.manifest.static:
+                    self.manifest.static.append(rel.as_posix())
+
+        for path in sorted(removed):
+            if self._is_under(path, self.content_dir) and path.endswith(".md"):
+                dest = self._dest_for(path)
+                self.manifest.forget(dest)
+                site_index.forget(dest)
+            elif self._is_under(path, self.static_dir):
+                rel = Path(os.path.relpath(path, self.static_dir))
+                if self._is_page_output(rel):
+                    continue
+                dest = str(self.public_dir / rel)
+                if rel.as_posix() in self.manifest.static:
+                    self.manifest.static.remove(rel.as_posix())
+            else:
+                continue
+            try:
+                os.remove(dest)
+                print(f"Removed {dest}")
+            except FileNotFoundError:
+                pass
+            touched.append(dest)
+
+        # the manifest is saved by watch() when it stops
+        render_cache.flush()
+        site_index.flush()
+        return touched
+
+
+class LiveReloadHandler(SimpleHTTPRequestHandler):
+    """
+    Serve public/ like `python3 -m http.server`, injecting a small script into
+    HTML pages that listens on LIVERELOAD_PATH (server-sent events) and reloads
+    the tab whenever the server announces a rebuild.
+    """
+
+    server: "LiveReloadServer"
+
+    def do_GET(self):
+        if self.path == LIVERELOAD_PATH:
+            self._serve_events()
+            return
+        html_path = self._html_file()
+        if html_path is None:
+            super().do_GET()
+            return
+        try:
+            body = html_path.read_bytes()
+        except OSError:
+            self.send_error(404, "File not found")
+            return
+        if self.server.on_page is not None:
+            self.server.on_page(html_path)
+        marker = body.rfind(b"</body>")
+        script = LIVERELOAD_SCRIPT.encode("utf-8")
+        body = body[:marker] + script + body[marker:] if marker != -1 else body + script
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _html_file(self) -> Optional[Path]:
+        fs_path = Path(self.translate_path(self.path))
+        if fs_path.is_dir():
+            # let the base class redirect "/dir" to "/dir/"
+            if not self.path.split("?", 1)[0].endswith("/"):
+                return None
+            fs_path = fs_path / "index.html"
+        if fs_path.suffix == ".html" and fs_path.is_file():
+            return fs_path
+        return None
+
+    def _serve_events(self):
+        # taken before the client sees the response, so no reload falls between
+        seen = self.server.reload_version
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        try:
+            while True:
+                version = self.server.wait_for_reload(seen, timeout=15)
+                if version == seen:
+                    self.wfile.write(b": keep-alive\n\n")
+                else:
+                    seen = version
+                    self.wfile.write(b"data: reload\n\n")
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            return
+
+    def log_message(self, format, *args):
+        if self.path != LIVERELOAD_PATH:
+            super().log_message(format, *args)
+
+
+class LiveReloadServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], directory: Path, on_page: Optional[Callable[[Path], None]] = None):
+        handler = functools.partial(LiveReloadHandler, directory=str(directory))
+        super().__init__(address, handler)
+        # called with the file of every HTML page served
+        self.on_page = on_page
+        self.reload_version = 0
+        self._reload = threading.Condition()
+
+    def notify_reload(self) -> None:
+        with self._reload:
+            self.reload_version += 1
+            self._reload.notify_all()
+
+    def wait_for_reload(self, seen: int, timeout: float) -> int:
+        with self._reload:
+            self._reload.wait_for(lambda: self.reload_version != seen, timeout=timeout)
+            return self.reload_version
+
+
+def watch(
+    content_dir: Path,
+    static_dir: Path,
+    template_path: Path,
+    public_dir: Path,
+    manifest_path: Path,
+    port: int = 8888,
+    interval: float = 0.05,
+    on_rebuilt: Optional[Callable[[List[str], Set[str], Snapshot], None]] = None,
+) -> None:
+    """
+    Serve public/ with live reload and rebuild on every change until interrupted.
+    on_rebuilt(touched, static_files, files) runs after every rebuild, before
+    browsers reload, to refresh what else the build derives from its outputs
+    (sidecars, search index, sitemap, ...) for the touched outputs alone;
+    static_files are the paths (relative to public/) mirrored from static/,
+    and files is the watcher's snapshot of the sources (SiteWatcher.files).
+    """
+    sweep_polls = max(1, round(FULL_SWEEP / interval))
+    watcher = SiteWatcher(content_dir, static_dir, template_path, public_dir, manifest_path, sweep_polls)
+    server = LiveReloadServer(("", port), public_dir, watcher.viewed)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"Serving {public_dir} at http://localhost:{port}/ (watching for changes, Ctrl-C to stop)")
+    try:
+        while True:
+            started = time.perf_counter()
+            touched = watcher.poll()
+            if touched and on_rebuilt is not None:
+                try:
+                    on_rebuilt(touched, set(watcher.manifest.static), watcher.files)
+                except Exception as e:
+                    print(f"Error refreshing outputs: {type(e).__name__}: {e}")
+            if touched:
+                elapsed = (time.perf_counter() - started) * 1000
+                print(f"Rebuilt {len(touched)} output(s) in {elapsed:.0f} ms; reloading browsers")
+                server.notify_reload()
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        print("Stopping watch mode.")
+    finally:
+        watcher.manifest.save()
+        server.shutdown()
+        server.server_close()